@@ -1,41 +1,201 @@
+import os
 import streamlit as st
-import random
-import string
-import numpy as np
-import pandas as pd
-from component import page_style
+import instrumentation
+from component import page_style, word_grid
+from puzzle_pool import PuzzlePool
+from puzzle_state import PuzzleState, word_table_size
+from puzzle_store import PuzzleStore, daily_name, share_key
+from difficulty import difficulty_label, DIFFICULTY_TARGETS
 from backend import (
-    get_topic_words,
+    generate_puzzle,
     play_sound,
-    create_word_search,
-    extract_word_from_grid,
-    display_grid_with_indices,
+    word_grid_args,
+    word_list_markdown,
+    grid_tiles,
+    GRID_TILE_SIZE,
     determine_difficulty,
-    check_word,
     is_straight_line,
-    play_background_audio
+    play_background_audio,
+    topic_cache_stats
 )
 
+# Timing spans for this rerun (only recorded when MINDFORGE_METRICS=1)
+instrumentation.begin_rerun()
+
 page_style()
 
+# One pool of ready-made puzzles per server process, shared by all sessions
+@st.cache_resource
+def get_puzzle_pool():
+    pool = PuzzlePool(generate_puzzle)
+    pool.warm([("Malaysia", 2, 13)])  # The default topic and sizes below
+    return pool
+
+puzzle_pool = get_puzzle_pool()
+
+# Content-addressed store behind share links, plus an optional precomputed file of
+# daily puzzles (built with puzzle_store.py; defaults to the same store)
+@st.cache_resource
+def get_puzzle_stores():
+    store = PuzzleStore()
+    daily_path = os.environ.get('MINDFORGE_DAILY_STORE')
+    daily_store = PuzzleStore(daily_path, readonly=True) if daily_path else store
+    return store, daily_store
+
+puzzle_store, daily_store = get_puzzle_stores()
+
+# Process-wide metrics: cache and pool gauges, plus an optional Prometheus endpoint
+@st.cache_resource
+def setup_metrics():
+    instrumentation.register_gauge('topic_cache', topic_cache_stats)
+    instrumentation.register_gauge('puzzle_pool', lambda: {
+        key: value for key, value in puzzle_pool.stats().items() if not isinstance(value, dict)
+    })
+    instrumentation.register_gauge('word_table_words', word_table_size)
+    port = os.environ.get('MINDFORGE_METRICS_PORT')
+    if instrumentation.ENABLED and port:
+        instrumentation.start_http_server(int(port))
+    path = os.environ.get('MINDFORGE_METRICS_FILE')
+    if instrumentation.ENABLED and path:
+        instrumentation.start_file_exporter(path, float(os.environ.get('MINDFORGE_METRICS_INTERVAL', 15)))
+    return True
+
+setup_metrics()
+
 # Initialize session state variables
 if 'game_started' not in st.session_state:
     st.session_state.game_started = False
-if 'words_found' not in st.session_state:
-    st.session_state.words_found = []
-if 'found_positions' not in st.session_state:
-    st.session_state.found_positions = set()
 if 'game_over' not in st.session_state:
     st.session_state.game_over = False
-if 'grid' not in st.session_state:
-    st.session_state.grid = None
-if 'words' not in st.session_state:
-    st.session_state.words = []
+if 'puzzle' not in st.session_state:
+    st.session_state.puzzle = None  # PuzzleState: grid, words and progress in a few hundred bytes
+if 'puzzle_code' not in st.session_state:
+    st.session_state.puzzle_code = None  # Share code of the puzzle being played, once it is stored
+if 'share_key' not in st.session_state:
+    st.session_state.share_key = None  # What the store needs to share a generated puzzle (see share_key)
 if 'show_words' not in st.session_state:
     st.session_state.show_words = True
 if 'game_stage' not in st.session_state:
     st.session_state.game_stage = 'before_game'  # Possible stages: before_game, during_game
 
+# Function to start playing a stored puzzle (from a share code or a daily puzzle name)
+def load_stored_puzzle(key):
+    for store in dict.fromkeys([puzzle_store, daily_store]):
+        record = store.get_record(key)
+        if record is not None:
+            code, _, state = record
+            st.session_state.puzzle = state
+            st.session_state.puzzle_code = code
+            st.session_state.share_key = None
+            st.session_state.game_over = False
+            st.session_state.show_words = True
+            st.session_state.game_stage = 'during_game'
+            st.query_params['puzzle'] = code
+            return True
+    return False
+
+# Function to show the outcome of a selection and play its sound
+def show_feedback(kind, message, sound=None):
+    getattr(st, kind)(message)
+    if sound:
+        play_sound(sound)
+
+# Function to check the selected coordinates (1-based) against the puzzle; True if a new word was found
+def check_selection_input(puzzle, start_row, start_col, end_row, end_col):
+    # Convert to 0-based index
+    start_row_idx = int(start_row) - 1
+    start_col_idx = int(start_col) - 1
+    end_row_idx = int(end_row) - 1
+    end_col_idx = int(end_col) - 1
+
+    # Validate coordinates
+    if not (0 <= start_row_idx < puzzle.rows and 0 <= start_col_idx < puzzle.cols and
+            0 <= end_row_idx < puzzle.rows and 0 <= end_col_idx < puzzle.cols):
+        show_feedback('error', "Coordinates out of bounds.", "assets/sounds/incorrect_sound.mp3")
+    # Check if the selection forms a straight line (horizontal, vertical, or diagonal)
+    elif not is_straight_line(start_row_idx, start_col_idx, end_row_idx, end_col_idx):
+        show_feedback('error', "Invalid selection. Words must be in straight lines.", "assets/sounds/incorrect_sound.mp3")
+    else:
+        # Look the endpoints up in the placed words (either direction matches)
+        word_index = puzzle.check(start_row_idx, start_col_idx, end_row_idx, end_col_idx)
+        if word_index is None:
+            show_feedback('error', "Incorrect selection. Try again!", "assets/sounds/incorrect_sound.mp3")
+        elif not puzzle.mark_found(word_index):
+            show_feedback('warning', "You've already found this word.")
+        else:
+            show_feedback('success', f"Correct! You found the word: {puzzle.words[word_index]}", "assets/sounds/correct_sound.mp3")
+            return True
+    return False
+
+# The game board: a selection reruns only this fragment, not the whole page. Words are
+# picked by dragging across the grid component, which checks that the line is straight
+# in the browser and sends just its two ends, so a found word costs one server run.
+# Typed coordinates stay available in a form (sent only on "Check Selection"); the grid
+# and word list are memoized on the puzzle's version and only rebuilt when a word is found.
+@st.fragment
+def game_board(puzzle):
+    with instrumentation.span('game_board'):
+        st.write("**Your Word Search Puzzle:**")
+        # Only shared puzzles are written to the store
+        if st.session_state.puzzle_code is None and st.button("Share this puzzle"):
+            st.session_state.puzzle_code = puzzle_store.put_state(puzzle, st.session_state.share_key)
+            st.query_params['puzzle'] = st.session_state.puzzle_code  # The address bar is now a share link
+        if st.session_state.puzzle_code is not None:
+            st.caption(f"Puzzle code {st.session_state.puzzle_code}: share this page's address to let others play the same puzzle.")
+        # Big grids are shown one tile at a time
+        tile = None
+        if puzzle.rows > GRID_TILE_SIZE or puzzle.cols > GRID_TILE_SIZE:
+            tile = st.selectbox(
+                "Part of the grid to show:", grid_tiles(puzzle.rows, puzzle.cols),
+                format_func=lambda tile: f"Rows {tile[0] + 1}-{min(tile[0] + GRID_TILE_SIZE, puzzle.rows)}, "
+                                         f"columns {tile[1] + 1}-{min(tile[1] + GRID_TILE_SIZE, puzzle.cols)}"
+            )
+        st.write("**Select a word by dragging from its first letter to its last:**")
+        # Drawn last, once this run's selection has been checked and marked
+        grid_slot = st.empty()
+        found = False
+        # The last drag (kept under the component's key) comes back on every rerun; check each one once
+        selection = st.session_state.get('word_grid')
+        if selection and selection['id'] != st.session_state.get('word_grid_selection'):
+            st.session_state.word_grid_selection = selection['id']
+            (start_row, start_col), (end_row, end_col) = selection['start'], selection['end']
+            found = check_selection_input(puzzle, start_row + 1, start_col + 1, end_row + 1, end_col + 1)
+
+        with st.expander("Enter coordinates instead"):
+            with st.form("selection", border=False):
+                col1, col2 = st.columns(2)
+                with col1:
+                    start_row = st.number_input("Start Row (1-based index):", min_value=1, max_value=puzzle.rows, value=1)
+                    start_col = st.number_input("Start Column (1-based index):", min_value=1, max_value=puzzle.cols, value=1)
+                with col2:
+                    end_row = st.number_input("End Row (1-based index):", min_value=1, max_value=puzzle.rows, value=1)
+                    end_col = st.number_input("End Column (1-based index):", min_value=1, max_value=puzzle.cols, value=1)
+                checked = st.form_submit_button("Check Selection")
+            if checked:
+                found = check_selection_input(puzzle, start_row, start_col, end_row, end_col)
+
+        with grid_slot:
+            word_grid(word_grid_args(puzzle, tile), key='word_grid')
+        word_list(puzzle)
+
+    if found and puzzle.all_found:
+        st.rerun()  # The last word: the end of the game is handled by the whole page
+
+# The words to find, with found ones crossed out; toggling it reruns only this fragment
+@st.fragment
+def word_list(puzzle):
+    with instrumentation.span('word_list'):
+        st.session_state.show_words = st.checkbox("Show Words to Find", value=st.session_state.show_words)
+        if st.session_state.show_words:
+            st.write("**Words to Find:**")
+            st.markdown(word_list_markdown(puzzle))
+
+# Open the puzzle of a shared link (?puzzle=<code>)
+shared_code = st.query_params.get('puzzle')
+if shared_code and shared_code != st.session_state.puzzle_code and not load_stored_puzzle(shared_code):
+    st.warning(f"Puzzle {shared_code} was not found.")
+    del st.query_params['puzzle']
+
 # Start Game Button
 if not st.session_state.game_started:
     # Display Start Game interface
@@ -46,128 +206,67 @@ if not st.session_state.game_started:
         st.session_state.game_stage = 'before_game'  # Set initial game stage
         # No need to rerun; the state is updated, and the app will refresh
 else:
-    # Play sounds based on the game stage
-    if st.session_state.game_stage == 'before_game':
-        play_background_audio("assets/sounds/during_the_game_sound.mp3")
-    elif st.session_state.game_stage == 'during_game':
-        play_background_audio("assets/sounds/during_the_game_sound.mp3")
+    # Background music for both stages (one shipped track, so it keeps playing between them)
+    if st.session_state.game_stage in ('before_game', 'during_game'):
+        play_background_audio("assets/sounds/before_the_game_sound.mp3")
     # Streamlit UI
     st.title("MindForge Puzzle: Forge your mind to any topic you want!")
     st.write("Enter any topic you want to master key terms for. Then,select the number of words and grid size, and generate a word search puzzle and forge your mind.")
 
     # User inputs for topic, word count, and grid size
-    topic = st.text_input("Enter a topic:", "Malaysia")
-    num_words = st.slider("Number of words:", 1, 20, 2)
-    grid_size = st.slider("Grid size:", 11, 13, 13)  # Increased max grid size
+    topic = st.text_input("Enter a topic:", "Malaysia", help="Join topics with | for a mixed puzzle, e.g. Malaysia | Volcano")
+    event_mode = st.toggle("Event mode (mega-puzzles)", help="Up to 500 words on a grid of up to 100x100")
+    if event_mode:
+        num_words = st.slider("Number of words:", 20, 500, 100)
+        grid_size = st.slider("Grid size:", 20, 100, 50)
+    else:
+        num_words = st.slider("Number of words:", 1, 20, 2)
+        grid_size = st.slider("Grid size:", 11, 13, 13)  # Increased max grid size
 
-    # Determine difficulty level based on num_words and grid_size
-    difficulty = determine_difficulty(num_words, grid_size)
-    st.write(f"**Difficulty Level:** {difficulty}")
+    target_difficulty = st.selectbox(
+        "Target difficulty:", ["Any"] + list(DIFFICULTY_TARGETS),
+        help="Pick the layout closest to this level (reversed and diagonal words, decoy letters)"
+    )
+    if target_difficulty == "Any":
+        # Determine difficulty level based on num_words and grid_size
+        difficulty = determine_difficulty(num_words, grid_size)
+        st.write(f"**Difficulty Level:** {difficulty}")
 
     if st.button("Generate Puzzle"):
-        max_word_length = grid_size  # Maximum word length based on grid size
-        words = get_topic_words(topic, num_words, max_word_length)
-        if words:
-            grid, words_not_placed = create_word_search(words, grid_size)
-            # Remove words that couldn't be placed
-            words = [word for word in words if word not in words_not_placed]
-            st.session_state.grid = grid
-            st.session_state.words = words
-            st.session_state.words_found = []
-            st.session_state.found_positions = set()
+        if target_difficulty == "Any":
+            # Take a pre-generated puzzle if one is ready, otherwise build it now
+            puzzle = puzzle_pool.take(topic, num_words, grid_size)
+            if puzzle is None:
+                puzzle = generate_puzzle(topic, num_words, grid_size)
+        else:
+            puzzle = generate_puzzle(topic, num_words, grid_size, difficulty=target_difficulty)
+        if puzzle:
+            words_not_placed = puzzle['words_not_placed']
+            st.session_state.puzzle = PuzzleState.from_puzzle(puzzle)
+            st.session_state.puzzle_code = None
+            st.session_state.share_key = share_key(puzzle)
+            st.query_params.pop('puzzle', None)
             st.session_state.game_over = False
             st.session_state.show_words = True  # Reset to show words by default
             st.session_state.game_stage = 'during_game'  # Update game stage
             # No need to rerun; the state is updated, and the app will refresh
+            if 'difficulty' in puzzle:
+                st.caption(f"Measured difficulty: {puzzle['difficulty']:.2f} ({difficulty_label(puzzle['difficulty'])})")
             if words_not_placed:
                 st.warning(f"The following words could not be placed due to size constraints and have been removed: {', '.join(words_not_placed)}")
         else:
             st.write("Sorry, couldn't find enough words for this topic. Please try another one.")
 
-    if st.session_state.grid is not None:
-        grid = st.session_state.grid
-        words = st.session_state.words
-
-        # Get user input for word selection
-        st.write("**Select a word by entering the coordinates:**")
-        col1, col2 = st.columns(2)
-        with col1:
-            start_row = st.number_input("Start Row (1-based index):", min_value=1, max_value=grid_size, value=1)
-            start_col = st.number_input("Start Column (1-based index):", min_value=1, max_value=grid_size, value=1)
-        with col2:
-            end_row = st.number_input("End Row (1-based index):", min_value=1, max_value=grid_size, value=1)
-            end_col = st.number_input("End Column (1-based index):", min_value=1, max_value=grid_size, value=1)
-
-        # Process the selection
-        if st.button("Check Selection"):
-            # Convert to 0-based index
-            start_row_idx = int(start_row) - 1
-            start_col_idx = int(start_col) - 1
-            end_row_idx = int(end_row) - 1
-            end_col_idx = int(end_col) - 1
-
-            # Validate coordinates
-            if (0 <= start_row_idx < grid_size and 0 <= start_col_idx < grid_size and
-                0 <= end_row_idx < grid_size and 0 <= end_col_idx < grid_size):
-
-                # Check if the selection forms a straight line (horizontal, vertical, or diagonal)
-                if is_straight_line(start_row_idx, start_col_idx, end_row_idx, end_col_idx):
-                    # Extract the word from grid based on coordinates
-                    word_selected, positions = extract_word_from_grid(
-                        grid, start_row_idx, start_col_idx, end_row_idx, end_col_idx
-                    )
-                    if word_selected:
-                        reversed_word = word_selected[::-1]
-                        if ((check_word(word_selected, words) or check_word(reversed_word, words)) and
-                            word_selected not in st.session_state.words_found and
-                            reversed_word not in st.session_state.words_found):
-                            found_word = word_selected if word_selected in words else reversed_word
-                            st.session_state.words_found.append(found_word)
-                            st.session_state.found_positions.update(positions)
-                            st.success(f"Correct! You found the word: {found_word}")
-                            
-                            # Play correct sound after user interaction
-                            play_sound("assets/sounds/correct_sound.mp3")
-                        elif (word_selected in st.session_state.words_found or reversed_word in st.session_state.words_found):
-                            st.warning("You've already found this word.")
-                        else:
-                            st.error("Incorrect selection. Try again!")
-                            # Play incorrect sound after user interaction
-                            play_sound("assets/sounds/incorrect_sound.mp3")
-                    else:
-                        st.error("Invalid selection. Words must be in straight lines.")
-                        # Play incorrect sound after user interaction
-                        play_sound("assets/sounds/incorrect_sound.mp3")
-                else:
-                    st.error("Invalid selection. Words must be in straight lines.")
-                    # Play incorrect sound after user interaction
-                    play_sound("assets/sounds/incorrect_sound.mp3")
-            else:
-                st.error("Coordinates out of bounds.")
-                # Play incorrect sound after user interaction
-                play_sound("assets/sounds/incorrect_sound.mp3")
-
-        # Display the puzzle grid with indices and highlighted found words
-        st.write("**Your Word Search Puzzle:**")
-        grid_display = display_grid_with_indices(grid, st.session_state.found_positions)
-        st.dataframe(grid_display, width=700, height=700)
+    if st.button("Today's Puzzle"):
+        if not load_stored_puzzle(daily_name()):
+            st.write("There is no daily puzzle for today yet.")
 
-        # Now display the word list after updating the session state
-        st.session_state.show_words = st.checkbox("Show Words to Find", value=st.session_state.show_words)
-
-        if st.session_state.show_words:
-            st.write("**Words to Find:**")
-            # Cross out found words
-            word_list_display = []
-            for word in words:
-                if word in st.session_state.words_found:
-                    word_list_display.append(f"~~{word}~~")
-                else:
-                    word_list_display.append(word)
-            st.markdown(", ".join(word_list_display))
+    if st.session_state.puzzle is not None:
+        puzzle = st.session_state.puzzle
+        game_board(puzzle)
 
         # Check if all words are found
-        if len(st.session_state.words_found) == len(words):
+        if puzzle.all_found:
             if not st.session_state.game_over:
                 st.balloons()
                 st.success("Congratulations! You've found all the words!")
@@ -183,10 +282,20 @@ else:
                     # Play the "play_again_sound.mp3" once after user clicks the button
                     play_sound("assets/sounds/play_again_sound.mp3")
                     # Reset the session state
-                    st.session_state.words_found = []
-                    st.session_state.found_positions = set()
                     st.session_state.game_over = False
-                    st.session_state.grid = None
-                    st.session_state.words = []
+                    st.session_state.puzzle = None
+                    st.session_state.puzzle_code = None
+                    st.session_state.share_key = None
+                    st.query_params.pop('puzzle', None)
                     st.session_state.game_stage = 'before_game'  # Reset game stage
                     # No need to call st.experimental_rerun(); the app will refresh automatically
+
+# Timing breakdown of the previous rerun; add ?debug=1 to the URL to see it
+last_rerun = st.session_state.get('last_rerun')
+if instrumentation.ENABLED and last_rerun and st.query_params.get('debug') == '1':
+    with st.expander("⏱️ Last rerun timing"):
+        st.write(f"**Total:** {last_rerun['total'] * 1000:.1f} ms")
+        st.table([{'span': name, 'ms': round(seconds * 1000, 2)} for name, seconds in last_rerun['spans']])
+        if last_rerun['counters']:
+            st.write(last_rerun['counters'])
+st.session_state.last_rerun = instrumentation.end_rerun()
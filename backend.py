@@ -1,43 +1,66 @@
+import os
+import logging
+import functools
+import threading
+from collections import OrderedDict
 import streamlit as st
-import wikipediaapi
+import streamlit.components.v1 as components
 import random
-import string
 import numpy as np
-import pandas as pd
 import base64
-from stop_words import get_stop_words
+from word_sources import WikipediaSource, CorpusSource, split_topics
+from wiki_fetch import LinkedWikipediaSource
+from placement import place_words, place_words_dense, fill_empty, to_char_grid, LARGE_WORD_COUNT
+from grid_scan import clean_fill
+from difficulty import generate_layout, difficulty_target, DIFFICULTY_TARGETS
+from tokenizer import word_rarity
+from instrumentation import timed, incr
 
-# Function to retrieve words related to a topic from Wikipedia
-def get_topic_words(topic, num_words, max_word_length):
+logger = logging.getLogger(__name__)
+
+# Where get_topic_words finds its words. Set MINDFORGE_CORPUS_INDEX to an index built
+# with build_corpus_index to run without network access.
+def default_word_source():
+    index_path = os.environ.get('MINDFORGE_CORPUS_INDEX')
+    if index_path:
+        return CorpusSource(index_path)
+    return LinkedWikipediaSource()
+
+word_source = default_word_source()
+
+def set_word_source(source):
+    global word_source
+    word_source = source
+
+# Function to report the topic cache counters of the active word source
+def topic_cache_stats():
+    cache = getattr(word_source, 'cache', None)
+    return cache.stats() if cache is not None else {}
+
+# Function to warm the topic cache in bulk (e.g. with the most requested topics)
+def warm_topic_cache(topics):
+    if isinstance(word_source, WikipediaSource):
+        return word_source.warm(topics)
+    return 0
+
+# Function to pick the puzzle words from a topic's candidates
+def select_words(candidates, num_words, max_word_length, challenging=False, rng=None):
     """
-    Fetch related words from Wikipedia for the given topic with some randomness
-    to provide different words each time.
-    Only include words shorter than or equal to max_word_length, avoid stop words,
-    and prioritize challenging words.
+    Pick num_words at random. With challenging=True the draw is weighted towards
+    rarer-looking words (see tokenizer.word_rarity). rng is a random.Random
+    (the global random module by default).
     """
-    stop_words = set(get_stop_words('english'))
-    
-    wiki = wikipediaapi.Wikipedia(
-        language='en',
-        user_agent='MindForgeWordPuzzle/1.0 (your_email@example.com)'
-    )
-    
-    page = wiki.page(topic)
-    if not page.exists():
-        return []
-    
-    # Split and clean text
-    words = list(set(page.summary.split()))
-    filtered_words = [
-        word.strip(string.punctuation).lower() for word in words 
-        if word.isalpha() and 4 < len(word) <= max_word_length
-    ]
-    
-    # Remove stop words
-    filtered_words = [word for word in filtered_words if word not in stop_words]
-    
+    rng = rng or random
+    filtered_words = [word for word in candidates if len(word) <= max_word_length]
+
+    if challenging:
+        # Weighted sampling without replacement: keep the words with the largest u ** (1 / weight)
+        keys = [rng.random() ** (1.0 / word_rarity(word)) for word in filtered_words]
+        ranked = sorted(zip(keys, filtered_words), reverse=True)
+        return [word.upper() for _, word in ranked[:num_words]]
+
     # Shuffle words to add randomness
-    random.shuffle(filtered_words)
+    rng.shuffle(filtered_words)
     
     # Sort words by length (optional: change order for more randomness)
     filtered_words = sorted(filtered_words, key=lambda x: len(x), reverse=True)
@@ -45,88 +68,205 @@ def get_topic_words(topic, num_words, max_word_length):
     # Temperature-like randomness: select a subset of words with random sampling
     temperature_factor = 30  # Lower values create more randomness; adjust as desired
     num_to_select = int(num_words * temperature_factor)
-    selected_words = random.sample(filtered_words, min(num_to_select, len(filtered_words)))
+    selected_words = rng.sample(filtered_words, min(num_to_select, len(filtered_words)))
     
-    # Ensure unique and formatted output
-    selected_words = list(set(selected_words))[:num_words]
+    # Ensure unique and formatted output (dict keeps the order stable, so seeded runs repeat)
+    selected_words = list(dict.fromkeys(selected_words))[:num_words]
     return [word.upper() for word in selected_words]
 
-# Define audio HTML function to embed looping background sound
+# Function to retrieve words related to a topic from Wikipedia
+@timed('get_topic_words')
+def get_topic_words(topic, num_words, max_word_length, source=None, challenging=False, rng=None):
+    """
+    Fetch related words from Wikipedia for the given topic with some randomness
+    to provide different words each time.
+    Only include words shorter than or equal to max_word_length, avoid stop words,
+    and, with challenging=True, prioritize challenging words.
+    Words come from the active word source (see word_sources.py); Wikipedia
+    summaries are cached, so repeat topics skip the network. Topics joined with
+    "|" make a mixed puzzle, and topics with too few words are topped up from
+    linked pages when the source supports it.
+    """
+    source = source or word_source
+    candidates = source.get_words(split_topics(topic), num_words, max_word_length)
+    if not candidates:
+        return []
+    return select_words(candidates, num_words, max_word_length, challenging, rng)
+
+# Audio is sent to the browser once per session: the first play of a sound creates a
+# hidden <audio> element in the page itself (outside Streamlit's element tree, so it
+# survives reruns) and every later play only sends a few hundred bytes of script.
+AUDIO_SCRIPT = """
+<script>
+(function() {{
+    const doc = window.parent.document;
+    let audio = doc.getElementById("{element_id}");
+    if (!audio) {{
+        audio = doc.createElement("audio");
+        audio.id = "{element_id}";
+        audio.src = "{src}";
+        doc.body.appendChild(audio);
+    }}
+    audio.loop = {loop};
+    {action}
+}})();
+// {nonce}
+</script>
+"""
+
+audio_stats = {'bytes_sent': 0, 'messages_sent': 0, 'encodes': 0}
+
+# Function to read and base64-encode an audio file once per process
+@functools.lru_cache(maxsize=32)
+def load_audio_base64(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        logger.warning("Audio file %s is missing; sound disabled", file_path)
+        return None
+    audio_stats['encodes'] += 1
+    return base64.b64encode(data).decode()
+
+def _audio_element_id(file_path):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return "mindforge-audio-" + "".join(ch if ch.isalnum() else "-" for ch in name)
+
+def _send_audio(file_path, loop, action):
+    """
+    Emit the audio script, embedding the file only the first time this session
+    uses it. Returns the number of bytes sent to the browser.
+    """
+    loaded = st.session_state.setdefault('audio_loaded', set())
+    nonce = st.session_state['audio_nonce'] = st.session_state.get('audio_nonce', 0) + 1
+    if file_path in loaded:
+        src = ""
+    else:
+        b64_encoded = load_audio_base64(file_path)
+        if b64_encoded is None:
+            return 0
+        src = f"data:audio/mp3;base64,{b64_encoded}"
+        loaded.add(file_path)
+    html = AUDIO_SCRIPT.format(
+        element_id=_audio_element_id(file_path),
+        src=src,
+        loop="true" if loop else "false",
+        action=action,
+        nonce=nonce
+    )
+    components.html(html, height=0)
+    sent = len(html)
+    incr('audio_bytes_sent', sent)
+    audio_stats['bytes_sent'] += sent
+    audio_stats['messages_sent'] += 1
+    st.session_state['audio_bytes_sent'] = st.session_state.get('audio_bytes_sent', 0) + sent
+    return sent
+
+# Define audio function to play a looping background sound
+@timed('play_background_audio')
 def play_background_audio(file_path, loop=True):
-    loop_attr = "loop" if loop else ""
-    with open(file_path, "rb") as f:
-        data = f.read()
-        b64_encoded = base64.b64encode(data).decode()
-    audio_html = f"""
-        <audio autoplay {loop_attr} >
-            <source src="data:audio/mp3;base64,{b64_encoded}" type="audio/mp3">
-            Your browser does not support the audio element.
-        </audio>
-    """
-    st.markdown(audio_html, unsafe_allow_html=True)
-
-# Function to play sound using base64 encoding
-def play_sound(file_path):
-    with open(file_path, "rb") as f:
-        data = f.read()
-        b64_encoded = base64.b64encode(data).decode()
-    md = f"""
-    <audio autoplay>
-        <source src="data:audio/mp3;base64,{b64_encoded}" type="audio/mp3">
-        Your browser does not support the audio element.
-    </audio>
     """
-    st.markdown(md, unsafe_allow_html=True)
+    Start the background track. It keeps playing across reruns, so nothing is
+    sent again until a different track is requested.
+    """
+    if st.session_state.get('background_audio') == file_path:
+        return 0
+    # Pause whatever track was playing before
+    previous = st.session_state.get('background_audio')
+    stop_previous = ""
+    if previous:
+        stop_previous = f'const previous = doc.getElementById("{_audio_element_id(previous)}"); if (previous) previous.pause();'
+    sent = _send_audio(file_path, loop, stop_previous + " audio.play().catch(() => {});")
+    if sent:
+        st.session_state['background_audio'] = file_path
+    return sent
+
+# Function to play a one-off sound effect
+@timed('play_sound')
+def play_sound(file_path):
+    return _send_audio(file_path, False, "audio.currentTime = 0; audio.play().catch(() => {});")
+
+# Function to tell whether a puzzle has enough words for the large-puzzle generator
+def is_large_puzzle(num_words, grid_size):
+    # Only the word count matters: a big board with few words is still best served by backtracking
+    return num_words >= LARGE_WORD_COUNT
+
+# Words that must never appear in a grid, in any direction (uppercase)
+BLOCKED_WORDS = frozenset()
 
 # Function to create a word search puzzle grid
-def create_word_search(words, grid_size=15):
-    grid = np.full((grid_size, grid_size), '', dtype='<U1')
-    # All possible directions (8 directions)
-    directions = [(1, 0), (0, 1), (1, 1), (-1, 1),
-                  (-1, 0), (0, -1), (-1, -1), (1, -1)]
-    
-    words_not_placed = []
-    
-    def place_word(word):
-        word_len = len(word)
-        placed = False
-        attempts = 0
-        while not placed and attempts < 1000:  # Increased attempts
-            row, col = random.randint(0, grid_size - 1), random.randint(0, grid_size - 1)
-            dir_r, dir_c = random.choice(directions)
-            end_r = row + dir_r * (word_len - 1)
-            end_c = col + dir_c * (word_len - 1)
-            if 0 <= end_r < grid_size and 0 <= end_c < grid_size:
-                can_place = True
-                for i in range(word_len):
-                    new_r = row + i * dir_r
-                    new_c = col + i * dir_c
-                    if grid[new_r, new_c] != '' and grid[new_r, new_c] != word[i]:
-                        can_place = False
-                        break
-                if can_place:
-                    for i in range(word_len):
-                        new_r = row + i * dir_r
-                        new_c = col + i * dir_c
-                        grid[new_r, new_c] = word[i]
-                    placed = True
-            attempts += 1
-        return placed  # Return whether the word was placed or not
-                
-    # Place longer words first
-    words = sorted(words, key=len, reverse=True)
-    
-    for word in words:
-        if not place_word(word):
-            words_not_placed.append(word)
-    
-    # Fill in the empty spaces with random letters
-    for r in range(grid_size):
-        for c in range(grid_size):
-            if grid[r, c] == '':
-                grid[r, c] = random.choice(string.ascii_uppercase)
-    
-    return grid, words_not_placed
+@timed('create_word_search')
+def create_word_search(words, grid_size=15, blocked_words=None, clean=True, rng=None, dense=None,
+                       direction_weights=None, alphabet=None):
+    """
+    Place the words in all 8 directions (see placement.py) and fill the rest of
+    the grid with random letters. Returns the letter grid, the words that could
+    not be placed, and the placement of every placed word as
+    {word: ((start_row, start_col), (end_row, end_col))}.
+    With clean=True the random letters are re-drawn wherever they spell a second
+    copy of a word or a blocked word (see grid_scan.py).
+    The same words, grid size and rng seed always give the same grid.
+    Puzzles with many words (see is_large_puzzle) use the scalable,
+    overlap-maximizing placement; pass dense=True/False to choose explicitly.
+    direction_weights (one per placement.DIRECTIONS entry) and the filler
+    alphabet are used by the difficulty-aware generator (see difficulty.py).
+    """
+    if dense is None:
+        dense = is_large_puzzle(len(words), grid_size)
+    place = place_words_dense if dense else place_words
+    result = place(words, grid_size, rng, direction_weights=direction_weights)
+    protected = result.grid != 0
+    grid = fill_empty(result.grid, rng, alphabet) if alphabet else fill_empty(result.grid, rng)
+    if clean:
+        blocked_words = BLOCKED_WORDS if blocked_words is None else blocked_words
+        leftover = clean_fill(grid, result.placements, protected, blocked_words, rng, alphabet=alphabet)
+        if leftover:
+            logger.debug("Unavoidable duplicate words in grid: %s", leftover)
+    return to_char_grid(grid), result.words_not_placed, result.placements
+
+# Function to list the cells of a straight line between two cells
+def line_positions(start_row, start_col, end_row, end_col):
+    length = max(abs(end_row - start_row), abs(end_col - start_col))
+    dir_row = (end_row - start_row) // length if length else 0
+    dir_col = (end_col - start_col) // length if length else 0
+    return [(start_row + i * dir_row, start_col + i * dir_col) for i in range(length + 1)]
+
+# Function to build a complete puzzle for a topic
+def generate_puzzle(topic, num_words, grid_size, source=None, seed=None, difficulty=None):
+    """
+    Fetch words for the topic and lay them out on a grid. Returns None when the
+    topic has no usable words; words that could not be placed are dropped from
+    the word list and reported in 'words_not_placed'.
+    Word choice and layout are drawn from random.Random(seed); the seed (a fresh
+    one when not given) is returned so the puzzle can be stored and shared.
+    With a difficulty (a label of DIFFICULTY_TARGETS or a score in [0, 1]) the
+    layout closest to it is picked from many candidates (see difficulty.py), and
+    the measured 'difficulty' score is returned with the puzzle.
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+    rng = random.Random(seed)
+    max_word_length = grid_size  # Maximum word length based on grid size
+    target = None if difficulty is None else difficulty_target(difficulty)
+    challenging = target is not None and target >= DIFFICULTY_TARGETS['Hard']
+    words = get_topic_words(topic, num_words, max_word_length, source, challenging, rng)
+    if not words:
+        return None
+    puzzle = {'topic': topic, 'seed': seed, 'grid_size': grid_size}
+    if target is None:
+        grid, words_not_placed, placements = create_word_search(words, grid_size, rng=rng)
+    else:
+        layout = generate_layout(words, grid_size, target, rng)
+        grid, words_not_placed, placements = layout.grid, layout.words_not_placed, layout.placements
+        # The target is part of the puzzle's identity (see puzzle_store.puzzle_digest)
+        puzzle.update(target=target, difficulty=layout.score, difficulty_features=layout.features)
+    puzzle.update(
+        grid=grid,
+        words=[word for word in words if word not in words_not_placed],
+        words_not_placed=words_not_placed,
+        placements=placements,
+    )
+    return puzzle
 
 # Function to extract word from grid based on coordinates
 def extract_word_from_grid(grid, start_row, start_col, end_row, end_col):
@@ -154,28 +294,66 @@ def extract_word_from_grid(grid, start_row, start_col, end_row, end_col):
             return None, None  # Out of bounds
     return word, positions
 
-# Function to display the grid as a DataFrame with indices
-def display_grid_with_indices(grid, found_positions):
-    grid_size = len(grid)
-    # Create a DataFrame from the grid
-    df = pd.DataFrame(grid)
-    # Adjust indices to be 1-based to match the grid display
-    df.index = df.index + 1
-    df.columns = df.columns + 1
-
-    # Function to highlight found letters
-    def highlight_found_letters(data):
-        styles = pd.DataFrame('', index=data.index, columns=data.columns)
-        for r in data.index:
-            for c in data.columns:
-                row_idx = r - 1  # Adjusting index to match 0-based indices
-                col_idx = c - 1
-                if (row_idx, col_idx) in found_positions:
-                    styles.loc[r, c] = "background-color: #90EE90; font-weight: bold"
-        return styles
-
-    styled_df = df.style.apply(highlight_found_letters, axis=None)
-    return styled_df
+GRID_RENDER_CACHE_SIZE = 64
+
+# Rendered grid arguments and word lists keyed by (state id, version); the owner itself
+# is kept alongside so a recycled id can never hit a stale entry
+_grid_render_cache = OrderedDict()
+_grid_render_lock = threading.Lock()
+
+def _memoized_render(owner, version, render):
+    key = (id(owner), version)
+    with _grid_render_lock:
+        cached = _grid_render_cache.get(key)
+        if cached is not None and cached[0] is owner:
+            _grid_render_cache.move_to_end(key)
+            incr('grid_render_cache_hits')
+            return cached[1]
+    incr('grid_render_cache_misses')
+    rendered = render()
+    with _grid_render_lock:
+        _grid_render_cache[key] = (owner, rendered)
+        while len(_grid_render_cache) > GRID_RENDER_CACHE_SIZE:
+            _grid_render_cache.popitem(last=False)
+    return rendered
+
+# Largest block of cells rendered at once; bigger grids are shown one tile at a time
+GRID_TILE_SIZE = 25
+
+# Function to list the tiles of a grid as (first row, first column), 0-based
+def grid_tiles(rows, cols, tile_size=GRID_TILE_SIZE):
+    return [(row, col) for row in range(0, rows, tile_size) for col in range(0, cols, tile_size)]
+
+# Function to build the arguments of the click-and-drag grid, memoized on the state's version
+@timed('word_grid_args')
+def word_grid_args(state, tile=None, tile_size=GRID_TILE_SIZE):
+    """
+    The letters and found cells (as '0'/'1' strings) of the whole grid or of one
+    tile, plus the tile's first row and column so selections come back in real
+    0-based grid coordinates.
+    """
+    first_row, first_col = tile or (0, 0)
+
+    def render():
+        rows = slice(first_row, first_row + tile_size) if tile else slice(None)
+        cols = slice(first_col, first_col + tile_size) if tile else slice(None)
+        letters = state.char_grid()[rows, cols]
+        found = np.where(state.found_mask()[rows, cols], '1', '0')
+        return {
+            'rows': [''.join(row) for row in letters],
+            'found': [''.join(row) for row in found],
+            'first_row': first_row,
+            'first_col': first_col,
+        }
+
+    return _memoized_render(state, ('word_grid', state.version, tile, tile_size), render)
+
+# Function to build the word list markdown (found words crossed out), memoized on the state's version
+@timed('word_list_markdown')
+def word_list_markdown(state):
+    return _memoized_render(state, ('words', state.version), lambda: ", ".join(
+        f"~~{word}~~" if state.is_found(index) else word for index, word in enumerate(state.words)
+    ))
 
 # Function to determine difficulty level
 def determine_difficulty(num_words, grid_size):
@@ -0,0 +1,177 @@
+import os
+import csv
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import backend
+from word_sources import CorpusSource, split_topics
+
+CSV_FIELDS = ['index', 'seed', 'topic', 'num_words', 'grid_size', 'words', 'words_not_placed', 'grid', 'placements']
+
+# Candidate words per topic, set once in each worker process
+_worker_candidates = {}
+_worker_challenging = False
+
+
+def puzzle_seed(base_seed, index):
+    """
+    Seed for the index-th puzzle of a batch. It only depends on the batch seed
+    and the puzzle's position, so results don't change with the number of workers.
+    """
+    digest = hashlib.blake2b(f"{base_seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+# Function to expand topics and sizes into one job per puzzle
+def build_jobs(topics, num_words_options, grid_sizes, count=1):
+    jobs = []
+    for topic, num_words, grid_size in itertools.product(topics, num_words_options, grid_sizes):
+        jobs.extend([(topic, num_words, grid_size)] * count)
+    return jobs
+
+
+def _init_worker(candidates, challenging=False):
+    global _worker_candidates, _worker_challenging
+    _worker_candidates = candidates
+    _worker_challenging = challenging
+
+
+def _generate_chunk(chunk):
+    records = []
+    for index, seed, (topic, num_words, grid_size) in chunk:
+        rng = random.Random(seed)
+        words = backend.select_words(_worker_candidates[topic], num_words, grid_size, _worker_challenging, rng)
+        grid, words_not_placed, placements = backend.create_word_search(words, grid_size, rng=rng)
+        records.append({
+            'index': index,
+            'seed': seed,
+            'topic': topic,
+            'num_words': num_words,
+            'grid_size': grid_size,
+            'words': [word for word in words if word not in words_not_placed],
+            'words_not_placed': words_not_placed,
+            'grid': [''.join(row) for row in grid],
+            'placements': placements,
+        })
+    return records
+
+
+# Function to generate puzzles in parallel, yielding them as they finish
+def iter_batch(jobs, seed=0, workers=None, source=None, chunk_size=16, challenging=False):
+    """
+    Generate one puzzle per (topic, num_words, grid_size) job. Words are fetched
+    once per topic up front (a topic may mix several, joined with "|"); the
+    puzzles are then built across a process pool and yielded in completion order
+    (each record carries its job index and seed).
+    Jobs whose topic has no words are skipped.
+    """
+    source = source or backend.word_source
+    most_words = {}
+    for topic, num_words, _ in jobs:
+        most_words[topic] = max(most_words.get(topic, 0), num_words)
+    candidates = {}
+    for topic, num_words in most_words.items():
+        words = source.get_words(split_topics(topic), num_words)
+        if words:
+            candidates[topic] = words
+
+    tasks = [(index, puzzle_seed(seed, index), job)
+             for index, job in enumerate(jobs) if job[0] in candidates]
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(candidates, challenging)
+        for chunk in chunks:
+            yield from _generate_chunk(chunk)
+        return
+
+    # Keep only a few chunks in flight so results stream out instead of piling up
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(candidates, challenging)) as executor:
+        pending = set()
+        chunks = iter(chunks)
+        for chunk in itertools.islice(chunks, workers * 2):
+            pending.add(executor.submit(_generate_chunk, chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(executor.submit(_generate_chunk, chunk))
+
+
+# Function to write a batch to a JSONL or CSV file as puzzles finish
+def generate_batch(jobs, output_path, fmt='jsonl', seed=0, workers=None, source=None, chunk_size=16,
+                   challenging=False):
+    """
+    Returns a summary with the number of puzzles written and the throughput.
+    """
+    started = time.perf_counter()
+    written = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+        for record in iter_batch(jobs, seed, workers, source, chunk_size, challenging):
+            if writer is None:
+                f.write(json.dumps(record) + '\n')
+            else:
+                writer.writerow(dict(
+                    record,
+                    words=' '.join(record['words']),
+                    words_not_placed=' '.join(record['words_not_placed']),
+                    grid='/'.join(record['grid']),
+                    placements=json.dumps(record['placements']),
+                ))
+            written += 1
+    elapsed = time.perf_counter() - started
+    return {
+        'puzzles': written,
+        'skipped': len(jobs) - written,
+        'seconds': elapsed,
+        'puzzles_per_second': written / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate word search puzzles in bulk.")
+    parser.add_argument('--topics', nargs='*', default=[], help="Topics to generate puzzles for")
+    parser.add_argument('--topics-file', help="File with one topic per line")
+    parser.add_argument('--num-words', nargs='+', type=int, default=[10])
+    parser.add_argument('--grid-size', nargs='+', type=int, default=[13])
+    parser.add_argument('--count', type=int, default=1, help="Puzzles per topic and size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="Defaults to all cores")
+    parser.add_argument('--challenging', action='store_true', help="Prefer rarer-looking words")
+    parser.add_argument('--corpus-index', help="Offline index built with word_sources.py")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default=None)
+    parser.add_argument('--output', '-o', required=True)
+    args = parser.parse_args(argv)
+
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, encoding='utf-8') as f:
+            topics.extend(line.strip() for line in f if line.strip())
+    if not topics:
+        parser.error("give at least one topic with --topics or --topics-file")
+
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    source = CorpusSource(args.corpus_index) if args.corpus_index else None
+    jobs = build_jobs(topics, args.num_words, args.grid_size, args.count)
+    summary = generate_batch(jobs, args.output, fmt, args.seed, args.workers, source,
+                             challenging=args.challenging)
+    print(f"Wrote {summary['puzzles']} puzzles to {args.output} in {summary['seconds']:.2f}s "
+          f"({summary['puzzles_per_second']:.1f} puzzles/s, {summary['skipped']} skipped)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+How closely the difficulty-aware generator hits each target, and what it costs.
+For every target the recorded topics are turned into puzzles and the measured
+score of the chosen layout is compared with the target; plain layouts (no target)
+are scored too, as the reference the targets are calibrated against.
+Runs without network access, using benchmarks/data/summaries.json.
+
+    python benchmarks/bench_difficulty.py --puzzles 40 --budget 0.5
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import backend
+import difficulty
+from word_sources import StaticSource
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        'mean': float(values.mean()),
+        'p10': float(np.percentile(values, 10)),
+        'p50': float(np.percentile(values, 50)),
+        'p90': float(np.percentile(values, 90)),
+    }
+
+
+def plain_scores(words_list, grid_size, seed):
+    scores = []
+    for i, words in enumerate(words_list):
+        grid, _, placements = backend.create_word_search(words, grid_size, rng=random.Random(seed + i))
+        features = difficulty.layout_features(grid[None], words, [placements])
+        scores.append(float(difficulty.difficulty_scores(features)[0]))
+    return scores
+
+
+def targeted(words_list, grid_size, target, seed, candidates, budget, workers):
+    scores, seconds, built = [], [], []
+    for i, words in enumerate(words_list):
+        started = time.perf_counter()
+        layout = difficulty.generate_layout(words, grid_size, target, random.Random(seed + i),
+                                            candidates, budget, workers)
+        seconds.append(time.perf_counter() - started)
+        scores.append(layout.score)
+        built.append(layout.candidates)
+    errors = np.abs(np.array(scores) - target)
+    return {
+        'target': target,
+        'score': summarize(scores),
+        'abs_error': summarize(errors),
+        'seconds': summarize(seconds),
+        'candidates_built': float(np.mean(built)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the difficulty-aware generator.")
+    parser.add_argument('--puzzles', type=int, default=40)
+    parser.add_argument('--num-words', type=int, default=10)
+    parser.add_argument('--grid-size', type=int, default=13)
+    parser.add_argument('--candidates', type=int, default=difficulty.DEFAULT_CANDIDATES)
+    parser.add_argument('--budget', type=float, default=difficulty.DEFAULT_BUDGET)
+    parser.add_argument('--workers', type=int, help="Processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(DATA_PATH, encoding='utf-8') as f:
+        summaries = json.load(f)
+    source = StaticSource(summaries)
+    topics = list(summaries)
+    words_list = []
+    for i in range(args.puzzles):
+        rng = random.Random(args.seed + i)
+        words_list.append(backend.get_topic_words(topics[i % len(topics)], args.num_words, args.grid_size,
+                                                  source, rng=rng))
+
+    result = {
+        'puzzles': args.puzzles,
+        'num_words': args.num_words,
+        'grid_size': args.grid_size,
+        'candidates': args.candidates,
+        'budget': args.budget,
+        'plain': summarize(plain_scores(words_list, args.grid_size, args.seed)),
+        'targets': {},
+    }
+    for label, target in difficulty.DIFFICULTY_TARGETS.items():
+        result['targets'][label] = targeted(words_list, args.grid_size, target, args.seed, args.candidates,
+                                            args.budget, args.workers)
+
+    plain = result['plain']
+    print(f"{args.puzzles} puzzles, {args.num_words} words on {args.grid_size}x{args.grid_size}, "
+          f"up to {args.candidates} candidates in {args.budget:.2f}s")
+    print(f"  plain layouts        score p10 {plain['p10']:.2f}  p50 {plain['p50']:.2f}  p90 {plain['p90']:.2f}")
+    for label, stats in result['targets'].items():
+        print(f"  {label:<12} {stats['target']:.2f}  score p10 {stats['score']['p10']:.2f}  "
+              f"p50 {stats['score']['p50']:.2f}  p90 {stats['score']['p90']:.2f}  "
+              f"|error| p50 {stats['abs_error']['p50']:.3f}  "
+              f"{stats['candidates_built']:.0f} candidates in p50 {stats['seconds']['p50'] * 1000:.0f} ms "
+              f"(p90 {stats['seconds']['p90'] * 1000:.0f} ms)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Latency of topping up short topics and of mixed-topic puzzles, measured against
+a local stub of the MediaWiki API (no network access needed). Every stub request
+takes --delay seconds, so a fetch that issued its requests one after another
+would take about requests * delay.
+
+    python benchmarks/bench_fetch.py --delay 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from topic_cache import TopicCache
+from wiki_fetch import LinkedWikipediaSource
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+# A stub article whose summary alone is too short for a puzzle
+SHORT_TOPIC = 'Obscure hamlet'
+SHORT_SUMMARY = 'Obscure hamlet is a tiny settlement.'
+
+
+def build_pages(summaries):
+    """
+    title -> {'intro', 'text', 'links'}: every recorded topic links to the others,
+    and SHORT_TOPIC links to all of them.
+    """
+    titles = list(summaries)
+    pages = {}
+    for title, summary in summaries.items():
+        pages[title] = {
+            'intro': summary,
+            'text': summary + '\n\n' + ' '.join(summaries[other][:200] for other in titles if other != title),
+            'links': [other for other in titles if other != title],
+        }
+    pages[SHORT_TOPIC] = {'intro': SHORT_SUMMARY, 'text': SHORT_SUMMARY, 'links': titles}
+    return pages
+
+
+class StubWiki:
+    """
+    Minimal MediaWiki 'action=query' endpoint (formatversion=2) serving prop=extracts
+    (with or without exintro) and prop=links for a fixed set of pages.
+    """
+
+    def __init__(self, pages, delay=0.0):
+        self.pages = pages
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.delay)
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                body = json.dumps({'query': {'pages': stub.answer(params)}}).encode('utf-8')
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client timed out and hung up
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/w/api.php"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, params):
+        props = params.get('prop', '').split('|')
+        result = []
+        for title in params.get('titles', '').split('|'):
+            page = self.pages.get(title)
+            if page is None:
+                result.append({'title': title, 'missing': True})
+                continue
+            entry = {'title': title}
+            if 'extracts' in props:
+                entry['extract'] = page['intro'] if 'exintro' in params else page['text']
+            if 'links' in props:
+                entry['links'] = [{'ns': 0, 'title': link} for link in page['links']]
+            result.append(entry)
+        return result
+
+    def close(self):
+        self.server.shutdown()
+
+
+def measure(stub, topics, num_words, max_word_length=13):
+    source = LinkedWikipediaSource(cache=TopicCache(path=None), api_url=stub.url)
+    stub.requests = 0
+    started = time.perf_counter()
+    words = source.get_words(topics, num_words, max_word_length)
+    elapsed = time.perf_counter() - started
+    return {
+        'topics': topics,
+        'num_words': num_words,
+        'words': len(words),
+        'requests': stub.requests,
+        'seconds': elapsed,
+        'sequential_seconds': stub.requests * stub.delay,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark linked-page and mixed-topic fetching.")
+    parser.add_argument('--delay', type=float, default=0.2, help="Seconds per stub request")
+    parser.add_argument('--num-words', type=int, default=20)
+    parser.add_argument('--output', '-o', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(DATA_PATH, encoding='utf-8') as f:
+        summaries = json.load(f)
+    stub = StubWiki(build_pages(summaries), args.delay)
+    try:
+        topics = list(summaries)
+        results = [
+            measure(stub, [topics[0]], args.num_words),
+            measure(stub, [SHORT_TOPIC], args.num_words),
+            measure(stub, [SHORT_TOPIC, 'Missing page'], args.num_words),
+            measure(stub, topics[:3], args.num_words),
+        ]
+    finally:
+        stub.close()
+
+    for result in results:
+        print(f"{' | '.join(result['topics']):<45} {result['words']:4d} words  {result['requests']:3d} requests  "
+              f"{result['seconds']:.2f}s (one after another: {result['sequential_seconds']:.2f}s)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
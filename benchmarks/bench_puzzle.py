@@ -0,0 +1,275 @@
+"""
+Benchmarks for puzzle generation, word extraction, selection checking and grid
+rendering. Runs without network access, using the Wikipedia summaries recorded in
+benchmarks/data/summaries.json.
+
+    python benchmarks/bench_puzzle.py -o results.json
+    python benchmarks/bench_puzzle.py -o new.json --compare results.json
+
+With --compare, any case whose median latency grew by more than --threshold
+(or whose placement success rate dropped) is reported and the exit code is 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+import backend
+from puzzle_state import PuzzleState
+from placement import place_words, place_words_dense, DIRECTIONS
+from tokenizer import extract_candidates
+from word_sources import StaticSource
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+GRID_SIZES = [10, 15, 20, 30, 40, 50, 100]
+WORD_COUNTS = [1, 5, 10, 20, 50, 100, 500]
+QUICK_GRID_SIZES = [10, 20, 50, 100]
+QUICK_WORD_COUNTS = [1, 10, 100, 500]
+
+
+def load_summaries():
+    with open(DATA_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(samples.mean()),
+    }
+
+
+def peak_memory_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+
+def bench_generation(candidates, grid_sizes, word_counts, repeats):
+    results = []
+    for grid_size in grid_sizes:
+        pool = [word.upper() for word in candidates if len(word) <= grid_size]
+        for num_words in word_counts:
+            timings, placed, attempts = [], 0, 0
+            for rep in range(repeats):
+                words = random.Random(rep).sample(pool, min(num_words, len(pool)))
+                # create_word_search consumes the random stream starting with place_words,
+                # so the same seed gives the attempts of the very layout that was timed
+                started = time.perf_counter()
+                grid, words_not_placed, placements = backend.create_word_search(
+                    words, grid_size, rng=random.Random(rep)
+                )
+                timings.append(time.perf_counter() - started)
+                place = place_words_dense if backend.is_large_puzzle(len(words), grid_size) else place_words
+                attempts += place(words, grid_size, random.Random(rep)).attempts
+                placed += len(placements)
+            requested = repeats * min(num_words, len(pool))
+            peak = peak_memory_kb(lambda: backend.create_word_search(words, grid_size, rng=random.Random(0)))
+            results.append(dict(
+                suite='create_word_search',
+                params={'grid_size': grid_size, 'num_words': num_words},
+                success_rate=placed / requested if requested else 1.0,
+                attempts_per_word=attempts / requested if requested else 0.0,
+                peak_kb=peak,
+                **percentiles(timings),
+            ))
+    return results
+
+
+def bench_extraction(summaries, repeats):
+    source = StaticSource(summaries)
+    topics = list(summaries)
+    text = ' '.join(summaries.values())
+    tokens = len(text.split())
+    results = []
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        extract_candidates(text)
+        timings.append(time.perf_counter() - started)
+    stats = percentiles(timings)
+    results.append(dict(
+        suite='extract_candidates',
+        params={'tokens': tokens},
+        tokens_per_second=tokens / (stats['p50_ms'] / 1000.0),
+        peak_kb=peak_memory_kb(lambda: extract_candidates(text)),
+        **stats,
+    ))
+
+    for num_words in (5, 20):
+        timings = []
+        for rep in range(repeats):
+            topic = topics[rep % len(topics)]
+            started = time.perf_counter()
+            backend.get_topic_words(topic, num_words, 13, source=source)
+            timings.append(time.perf_counter() - started)
+        results.append(dict(
+            suite='get_topic_words',
+            params={'num_words': num_words, 'max_word_length': 13},
+            **percentiles(timings),
+        ))
+    return results
+
+
+def random_selection(rng, grid_size):
+    dir_r, dir_c = rng.choice(DIRECTIONS)
+    length = rng.randint(1, grid_size - 1)
+    start_r = rng.randrange(grid_size) if dir_r == 0 else \
+        rng.randrange(0, grid_size - length) if dir_r > 0 else rng.randrange(length, grid_size)
+    start_c = rng.randrange(grid_size) if dir_c == 0 else \
+        rng.randrange(0, grid_size - length) if dir_c > 0 else rng.randrange(length, grid_size)
+    return start_r, start_c, start_r + dir_r * length, start_c + dir_c * length
+
+
+def bench_selection(grid_sizes, repeats):
+    results = []
+    for grid_size in grid_sizes:
+        grid, _, placements = backend.create_word_search(['BENCHMARK'], grid_size)
+        state = PuzzleState.from_puzzle({'grid': grid, 'words': list(placements), 'placements': placements})
+        rng = random.Random(grid_size)
+        selections = [random_selection(rng, grid_size) for _ in range(repeats)]
+        for suite, check in (
+            ('extract_word_from_grid', lambda s: backend.extract_word_from_grid(grid, *s)),
+            ('puzzle_state_check', lambda s: state.check(*s)),
+        ):
+            timings = []
+            for selection in selections:
+                started = time.perf_counter()
+                check(selection)
+                timings.append(time.perf_counter() - started)
+            results.append(dict(suite=suite, params={'grid_size': grid_size}, **percentiles(timings)))
+    return results
+
+
+def bench_rendering(grid_sizes, repeats):
+    results = []
+    for grid_size in grid_sizes:
+        grid, _, placements = backend.create_word_search(['BENCHMARK'], grid_size)
+        puzzle = {'grid': grid, 'words': list(placements), 'placements': placements}
+        rng = random.Random(grid_size)
+        found = {(rng.randrange(grid_size), rng.randrange(grid_size)) for _ in range(grid_size * 3)}
+        bits = sum(1 << (row * grid_size + col) for row, col in found)
+
+        def render():
+            # A fresh state every time measures the cold (non-memoized) path;
+            # json.dumps stands in for Streamlit serializing the component arguments
+            state = PuzzleState.from_puzzle(puzzle)
+            state.found_cells = bits
+            return json.dumps(backend.word_grid_args(state, None if grid_size <= backend.GRID_TILE_SIZE else (0, 0)))
+
+        timings = []
+        for rep in range(repeats):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        results.append(dict(
+            suite='word_grid_args',
+            params={'grid_size': grid_size, 'found_cells': len(found)},
+            peak_kb=peak_memory_kb(render),
+            **percentiles(timings),
+        ))
+    return results
+
+
+def case_key(result):
+    return result['suite'], json.dumps(result['params'], sort_keys=True)
+
+
+# Function to flag cases that got slower (or placed fewer words) than a previous run
+def compare(results, baseline, threshold):
+    previous = {case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get(case_key(result))
+        if before is None:
+            continue
+        if result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append(f"{result['suite']} {result['params']}: p50 "
+                               f"{before['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms")
+        if result.get('success_rate', 1.0) < before.get('success_rate', 1.0) - 1e-9:
+            regressions.append(f"{result['suite']} {result['params']}: success rate "
+                               f"{before['success_rate']:.3f} -> {result['success_rate']:.3f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark puzzle generation and rendering.")
+    parser.add_argument('--output', '-o', default='bench_results.json')
+    parser.add_argument('--compare', help="Previous results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--quick', action='store_true', help="Smaller sweep for a fast sanity check")
+    parser.add_argument('--suite', action='append',
+                        choices=['generation', 'extraction', 'selection', 'rendering'],
+                        help="Run only the given suites (repeatable)")
+    args = parser.parse_args(argv)
+
+    grid_sizes = QUICK_GRID_SIZES if args.quick else GRID_SIZES
+    word_counts = QUICK_WORD_COUNTS if args.quick else WORD_COUNTS
+    suites = args.suite or ['generation', 'extraction', 'selection', 'rendering']
+    summaries = load_summaries()
+    candidates = sorted({word for text in summaries.values() for word in extract_candidates(text)})
+
+    results = []
+    if 'generation' in suites:
+        results += bench_generation(candidates, grid_sizes, word_counts, args.repeats)
+    if 'extraction' in suites:
+        results += bench_extraction(summaries, args.repeats)
+    if 'selection' in suites:
+        results += bench_selection(grid_sizes, args.repeats * 50)
+    if 'rendering' in suites:
+        results += bench_rendering(grid_sizes, max(args.repeats // 4, 3))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'repeats': args.repeats,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        extra = ''
+        if 'success_rate' in result:
+            extra = (f"  placed {result['success_rate']:.0%}  attempts/word {result['attempts_per_word']:.1f}"
+                     f"  peak {result['peak_kb']:.0f} KB")
+        print(f"{result['suite']:<26} {json.dumps(result['params']):<40} "
+              f"p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms{extra}")
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
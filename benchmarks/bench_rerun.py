@@ -0,0 +1,260 @@
+"""
+Server time and bytes sent per interaction of the Streamlit app, measured against
+a real `streamlit run` server over its websocket, the way a browser talks to it:
+every interaction sends the widget states (and, inside a fragment, the fragment
+id) and waits for the run to finish. A widget inside a form sends nothing until
+the form is submitted, so changing it costs no server time at all. Dragging across
+the grid component sends its (start, end) value the same way; a bent line or a single
+cell is rejected in the browser and never reaches the server.
+
+A seeded puzzle is stored up front and opened with ?puzzle=<code>, so the right
+answers are known and no network access is needed. Pass --app to measure another
+checkout of app.py (e.g. the previous commit) for comparison.
+
+    python benchmarks/bench_rerun.py --rounds 3
+    python benchmarks/bench_rerun.py --app /tmp/old/app.py -o before.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from tornado.websocket import websocket_connect
+from tornado.httpclient import HTTPRequest
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+import backend
+from puzzle_store import PuzzleStore
+from word_sources import StaticSource, build_corpus_index
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+WIDGET_KINDS = ('button', 'number_input', 'checkbox', 'selectbox', 'text_input', 'slider')
+FINISHED = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+            ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppClient:
+    """
+    A minimal Streamlit browser: keeps the widgets seen so far (by label) and the
+    values set on them, and reports bytes received and seconds per run.
+    """
+
+    def __init__(self, url, query_string=''):
+        self.url = url
+        self.query_string = query_string
+        self.widgets = {}  # label -> (kind, widget id, form id, fragment id)
+        self.values = {}   # widget id -> (field, value)
+        self.conn = None
+
+    async def connect(self):
+        request = HTTPRequest(self.url, headers={'Sec-WebSocket-Protocol': 'streamlit'})
+        self.conn = await websocket_connect(request)
+
+    async def _run(self, trigger=None, fragment_id=''):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query_string
+        state.fragment_id = fragment_id
+        for widget_id, (field, value) in self.values.items():
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            setattr(widget, field, value)
+        if trigger is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = trigger
+            widget.trigger_value = True
+        started = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        received = 0
+        while True:
+            data = await self.conn.read_message()
+            if data is None:
+                raise RuntimeError("Streamlit closed the connection")
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_kind = element.WhichOneof('type')
+                if element_kind in WIDGET_KINDS:
+                    widget = getattr(element, element_kind)
+                    self.widgets[widget.label] = (element_kind, widget.id, widget.form_id,
+                                                  forward.delta.fragment_id)
+                elif element_kind == 'component_instance':
+                    component = element.component_instance
+                    self.widgets[component.component_name] = (element_kind, component.id, component.form_id,
+                                                              forward.delta.fragment_id)
+            elif kind == 'script_finished' and forward.script_finished in FINISHED:
+                return {'bytes': received, 'seconds': time.perf_counter() - started, 'requests': 1}
+
+    async def load(self):
+        return await self._run()
+
+    async def click(self, label):
+        _, widget_id, _, fragment_id = self.widgets[label]
+        return await self._run(trigger=widget_id, fragment_id=fragment_id)
+
+    async def set_value(self, label, field, value):
+        _, widget_id, form_id, fragment_id = self.widgets[label]
+        self.values[widget_id] = (field, value)
+        if form_id:
+            # Held by the browser until the form is submitted
+            return {'bytes': 0, 'seconds': 0.0, 'requests': 0}
+        return await self._run(fragment_id=fragment_id)
+
+    async def drag(self, component, start, end):
+        value = {'start': list(start), 'end': list(end), 'id': os.urandom(6).hex()}
+        return await self.set_value(component, 'json_value', json.dumps(value))
+
+    def close(self):
+        self.conn.close()
+
+
+def prepare(workdir, seed):
+    """
+    Store a seeded puzzle and an offline corpus index; returns (code, puzzle, env).
+    """
+    with open(DATA_PATH, encoding='utf-8') as f:
+        summaries = json.load(f)
+    corpus_path = os.path.join(workdir, 'corpus.jsonl')
+    with open(corpus_path, 'w', encoding='utf-8') as f:
+        for title, text in summaries.items():
+            f.write(json.dumps({'title': title, 'abstract': text}) + '\n')
+    index_path = os.path.join(workdir, 'corpus.idx')
+    build_corpus_index(corpus_path, index_path)
+    store_path = os.path.join(workdir, 'puzzles.mfpz')
+    puzzle = backend.generate_puzzle(list(summaries)[0], 8, 13, StaticSource(summaries), seed=seed)
+    store = PuzzleStore(store_path)
+    code = store.put(puzzle)
+    store.close()
+    env = dict(os.environ, MINDFORGE_CORPUS_INDEX=index_path, MINDFORGE_PUZZLE_STORE=store_path,
+               MINDFORGE_METRICS='1', MINDFORGE_METRICS_FILE=os.path.join(workdir, 'metrics.prom'))
+    return code, puzzle, env
+
+
+def start_streamlit(app_path, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1',
+         '--browser.gatherUsageStats', 'false', '--server.fileWatcherType', 'none'],
+        cwd=os.path.dirname(os.path.abspath(app_path)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f"ws://127.0.0.1:{port}/_stcore/stream"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Streamlit did not start")
+
+
+async def play(url, code, puzzle, rounds, seed):
+    client = AppClient(url, f"puzzle={code}")
+    await client.connect()
+    samples = {}
+
+    def record(name, result):
+        samples.setdefault(name, []).append(result)
+
+    try:
+        await client.load()
+        await client.click("Start Game")
+        await client.load()  # The start page needs a second run (see the app's "click two times")
+        rng = random.Random(seed)
+        grid_size = puzzle['grid_size']
+        placements = list(puzzle['placements'].values())
+        grid = next((name for name in client.widgets if name.endswith('word_grid')), None)
+        labels = ["Start Row (1-based index):", "Start Column (1-based index):",
+                  "End Row (1-based index):", "End Column (1-based index):"]
+        for round_ in range(rounds):
+            # Four coordinate changes and a wrong check (a single cell is never a placed word)
+            cell = [rng.randrange(grid_size) + 1, rng.randrange(grid_size) + 1]
+            for label, value in zip(labels, cell + cell):
+                record('change_coordinate', await client.set_value(label, 'int_value', value))
+            record('wrong_check', await client.click("Check Selection"))
+            # Then the right coordinates of the next word
+            (start_row, start_col), (end_row, end_col) = placements[round_ % len(placements)]
+            for label, value in zip(labels, (start_row + 1, start_col + 1, end_row + 1, end_col + 1)):
+                await client.set_value(label, 'int_value', value)
+            record('correct_check', await client.click("Check Selection"))
+            show = round_ % 2 == 1
+            if grid:
+                # The same by dragging: two cells of a row (shorter than any word), then another word
+                row = cell[0] - 1
+                record('drag_wrong', await client.drag(grid, (row, 0), (row, 1)))
+                start, end = placements[-1 - round_ % len(placements)]
+                record('drag_correct', await client.drag(grid, start, end))
+            record('toggle_word_list', await client.set_value("Show Words to Find", 'bool_value', show))
+    finally:
+        client.close()
+    return samples
+
+
+def summarize(samples):
+    result = {}
+    for name, runs in samples.items():
+        seconds = [run['seconds'] * 1000 for run in runs]
+        result[name] = {
+            'interactions': len(runs),
+            'server_requests': sum(run['requests'] for run in runs) / len(runs),
+            'bytes': sum(run['bytes'] for run in runs) / len(runs),
+            'p50_ms': float(np.percentile(seconds, 50)),
+            'max_ms': max(seconds),
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-interaction server time and bytes of the app.")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', '-o', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        code, puzzle, env = prepare(workdir, args.seed)
+        process, url = start_streamlit(args.app, env)
+        try:
+            samples = asyncio.run(play(url, code, puzzle, args.rounds, args.seed))
+        finally:
+            process.terminate()
+            process.wait()
+
+    result = summarize(samples)
+    print(f"{args.app}: {args.rounds} rounds")
+    for name, stats in result.items():
+        print(f"  {name:<18} {stats['server_requests']:4.1f} runs  {stats['bytes']:9.0f} bytes  "
+              f"p50 {stats['p50_ms']:7.1f} ms  max {stats['max_ms']:7.1f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
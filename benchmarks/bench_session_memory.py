@@ -0,0 +1,135 @@
+"""
+Per-session memory of the app's puzzle state: the original session_state layout
+(a '<U1' grid, word list, answer index and sets of found words and cells) against
+a PuzzleState, for many simulated sessions with half of their words found
+(through check(), so the state's answer index is counted too).
+Runs without network access, using benchmarks/data/summaries.json.
+
+    python benchmarks/bench_session_memory.py --sessions 2000 -o memory.json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import backend
+from puzzle_state import PuzzleState
+from word_sources import StaticSource
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+
+def legacy_session(puzzle):
+    found = puzzle['words'][::2]
+    return {
+        'game_started': True,
+        'grid': puzzle['grid'],
+        'words': puzzle['words'],
+        'answer_index': {tuple(sorted(ends)): word for word, ends in puzzle['placements'].items()},
+        'words_found': set(found),
+        'found_positions': {cell for word in found
+                            for cell in backend.line_positions(*puzzle['placements'][word][0],
+                                                               *puzzle['placements'][word][1])},
+        'found_version': len(found),
+        'game_over': False,
+        'show_words': True,
+        'game_stage': 'during_game',
+    }
+
+
+def compact_session(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    for index in range(0, state.word_count, 2):
+        sr, sc, er, ec = state.endpoints(index)
+        state.mark_found(state.check(sr, sc, er, ec))  # As a player would, so the answer index is built
+    return {
+        'game_started': True,
+        'puzzle': state,
+        'game_over': False,
+        'show_words': True,
+        'game_stage': 'during_game',
+    }
+
+
+def retained_bytes(make_session, sessions, source, topics, num_words, grid_size):
+    """
+    Memory still held after building the sessions (puzzle generation garbage excluded).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = []
+        for i in range(sessions):
+            puzzle = backend.generate_puzzle(topics[i % len(topics)], num_words, grid_size, source, seed=i)
+            kept.append(make_session(puzzle))
+            del puzzle
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return retained, kept
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-session puzzle state memory.")
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--num-words', type=int, default=10)
+    parser.add_argument('--grid-size', type=int, default=13)
+    parser.add_argument('--output', '-o', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(DATA_PATH, encoding='utf-8') as f:
+        summaries = json.load(f)
+    source = StaticSource(summaries)
+    topics = list(summaries)
+    # Warm up module-level caches so they are not charged to the first layout measured
+    retained_bytes(legacy_session, 20, source, topics, args.num_words, args.grid_size)
+    retained_bytes(compact_session, 20, source, topics, args.num_words, args.grid_size)
+
+    legacy, _ = retained_bytes(legacy_session, args.sessions, source, topics, args.num_words, args.grid_size)
+    compact, states = retained_bytes(compact_session, args.sessions, source, topics,
+                                     args.num_words, args.grid_size)
+    states = [session['puzzle'] for session in states]
+
+    started = time.perf_counter()
+    blobs = [state.to_bytes() for state in states]
+    dump_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    restored = [PuzzleState.from_bytes(blob) for blob in blobs]
+    load_seconds = time.perf_counter() - started
+    assert all(a.found_cells == b.found_cells and a.words == b.words and
+               np.array_equal(a.char_grid(), b.char_grid()) for a, b in zip(states, restored))
+
+    result = {
+        'sessions': args.sessions,
+        'num_words': args.num_words,
+        'grid_size': args.grid_size,
+        'legacy_bytes_per_session': legacy / args.sessions,
+        'compact_bytes_per_session': compact / args.sessions,
+        'reduction': legacy / compact if compact else float('inf'),
+        'serialized_bytes_per_session': sum(map(len, blobs)) / len(blobs),
+        'to_bytes_us': dump_seconds / len(blobs) * 1e6,
+        'from_bytes_us': load_seconds / len(blobs) * 1e6,
+    }
+    print(f"{args.sessions} sessions, {args.num_words} words on {args.grid_size}x{args.grid_size}")
+    print(f"  session_state dict  {result['legacy_bytes_per_session']:9.0f} bytes/session")
+    print(f"  PuzzleState         {result['compact_bytes_per_session']:9.0f} bytes/session "
+          f"({result['reduction']:.1f}x smaller)")
+    print(f"  to_bytes            {result['serialized_bytes_per_session']:9.0f} bytes/session, "
+          f"{result['to_bytes_us']:.1f} us to write, {result['from_bytes_us']:.1f} us to read")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Load test of game_server.py: many simulated players each start a game and submit
+selections (a few misses, then every word) over keep-alive connections, reporting
+throughput and tail latency per endpoint. By default a server is started as a
+subprocess on a free port with the recorded topics in benchmarks/data/summaries.json,
+so no network access is needed.
+
+    python benchmarks/load_test.py --players 2000 --concurrency 64
+    python benchmarks/load_test.py --sessions sqlite:/tmp/sessions.db
+    python benchmarks/load_test.py --url http://127.0.0.1:8000   # an already running server
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from grid_scan import find_occurrences
+
+DATA_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'summaries.json')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(sessions):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'game_server.py'), '--port', str(port),
+         '--sessions', sessions, '--static-topics', DATA_PATH],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Game server did not start")
+
+
+class Player:
+    """
+    One client with its own keep-alive connection; records (endpoint, seconds) per request.
+    """
+
+    def __init__(self, url, latencies):
+        parsed = urlparse(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+        self.latencies = latencies
+
+    def request(self, endpoint, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body else {}
+        started = time.perf_counter()
+        self.conn.request(method, path, body, headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        self.latencies.append((endpoint, time.perf_counter() - started, response.status))
+        return response.status, json.loads(data)
+
+    def play(self, topic, num_words, grid_size, seed, misses, rng):
+        status, game = self.request('new_game', 'POST', '/games', {
+            'topic': topic, 'num_words': num_words, 'grid_size': grid_size, 'seed': seed
+        })
+        if status != 201:
+            return False
+        check = f"/games/{game['game_id']}/check"
+        grid = np.array([list(row) for row in game['grid']])
+        # A word can also show up inside a longer one (BORDER in BORDERS), so keep every occurrence
+        answers = {}
+        for word, start, end in find_occurrences(grid, game['words']):
+            answers.setdefault(word, []).append((list(start), list(end)))
+        for _ in range(misses):
+            row, col = rng.randrange(game['rows']), rng.randrange(game['cols'])
+            self.request('check', 'POST', check, {'start': [row, col], 'end': [row, col]})
+        words = list(answers.items())
+        rng.shuffle(words)
+        result = None
+        for word, occurrences in words:
+            for start, end in occurrences:
+                _, result = self.request('check', 'POST', check, {'start': start, 'end': end})
+                if result.get('correct'):
+                    break
+        self.request('state', 'GET', f"/games/{game['game_id']}")
+        return bool(result and result.get('complete'))
+
+    def close(self):
+        self.conn.close()
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run(url, players, concurrency, topics, num_words, grid_size, misses, seed):
+    latencies = []  # list.append is atomic, so the worker threads share one list
+    completed = []
+    local = threading.local()
+    connections = []
+    lock = threading.Lock()
+
+    def player(i):
+        client = getattr(local, 'player', None)
+        if client is None:
+            client = local.player = Player(url, latencies)
+            with lock:
+                connections.append(client)
+        rng = random.Random(seed + i)
+        completed.append(client.play(topics[i % len(topics)], num_words, grid_size, seed + i, misses, rng))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(player, range(players)))
+    elapsed = time.perf_counter() - started
+    for client in connections:
+        client.close()
+
+    result = {
+        'players': players,
+        'concurrency': concurrency,
+        'num_words': num_words,
+        'grid_size': grid_size,
+        'seconds': elapsed,
+        'completed_games': sum(completed),
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / elapsed,
+        'errors': sum(1 for _, _, status in latencies if status >= 500),
+        'endpoints': {},
+    }
+    for endpoint in ('new_game', 'check', 'state'):
+        values = [seconds * 1000 for name, seconds, _ in latencies if name == endpoint]
+        result['endpoints'][endpoint] = {
+            'requests': len(values),
+            'p50_ms': percentile(values, 50),
+            'p90_ms': percentile(values, 90),
+            'p99_ms': percentile(values, 99),
+            'max_ms': max(values, default=0.0),
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HTTP game server.")
+    parser.add_argument('--url', help="Test a running server instead of starting one")
+    parser.add_argument('--sessions', default='memory', help="Session store of the started server")
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--num-words', type=int, default=10)
+    parser.add_argument('--grid-size', type=int, default=13)
+    parser.add_argument('--misses', type=int, default=3, help="Wrong selections per player")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(DATA_PATH, encoding='utf-8') as f:
+        topics = list(json.load(f))
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_local_server(args.sessions)
+    try:
+        result = run(url, args.players, args.concurrency, topics, args.num_words, args.grid_size,
+                     args.misses, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"{result['players']} players ({result['concurrency']} at a time), {result['num_words']} words on "
+          f"{result['grid_size']}x{result['grid_size']}: {result['requests']} requests in {result['seconds']:.1f}s "
+          f"({result['requests_per_second']:.0f}/s), {result['completed_games']} games completed, "
+          f"{result['errors']} errors")
+    for endpoint, stats in result['endpoints'].items():
+        print(f"  {endpoint:<9} {stats['requests']:7d}  p50 {stats['p50_ms']:7.2f} ms  p90 {stats['p90_ms']:7.2f} ms  "
+              f"p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:7.2f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0 if result['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,34 @@
-import streamlit as st
-from PIL import Image
+import os
+import io
+import sys
 import base64
+import streamlit as st
+import streamlit.components.v1 as components
+from instrumentation import timed
+
+# Images are shipped at the size they are displayed at. `python component.py` writes the
+# resized copies to ASSET_BUILD_DIR; without them they are resized once per process.
+ASSET_BUILD_DIR = 'assets/build'
+# name -> (source file, display width in pixels, output format)
+IMAGE_ASSETS = {
+    'sidebar_background.jpg': ('assets/backgrounds/puzzle_sidebar_background.jpg', 640, 'JPEG'),
+    'main_background.png': ('assets/backgrounds/main_puzzle_background.png', 1460, 'PNG'),
+    'profile_photo.png': ('photos/Round_Profile_Photo.png', 200, 'PNG'),  # Shown at 100px, 2x for HiDPI
+    'page_icon.png': ('photos/rubiks.jpg', 64, 'PNG'),
+}
+
+# The click-and-drag puzzle grid: a static page served by Streamlit, no frontend build needed
+WORD_GRID_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend', 'word_grid')
+_word_grid = components.declare_component('word_grid', path=WORD_GRID_FRONTEND)
+
+def word_grid(grid_args, key=None):
+    """
+    Show the grid described by backend.word_grid_args and return the last selection
+    dragged across it as {'start': [row, col], 'end': [row, col], 'id': ...} (0-based,
+    always a straight line), or None. The value stays the same on later reruns until
+    the next drag, so compare its id with the last one handled.
+    """
+    return _word_grid(**grid_args, key=key, default=None)
 
 def get_base64_of_bin_file(bin_file):
     """
@@ -10,12 +38,56 @@ def get_base64_of_bin_file(bin_file):
         data = f.read()
     return base64.b64encode(data).decode()
 
-def page_style():
+def optimize_image(source, width, image_format):
+    """
+    Downscale an image to the given width (keeping its aspect ratio) and recompress it.
+    """
+    from PIL import Image  # Only needed when the build step has not run
+
+    image = Image.open(source)
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(output, format='JPEG', quality=82, optimize=True, progressive=True)
+    else:
+        image.save(output, format=image_format, optimize=True)
+    return output.getvalue()
+
+def build_assets(build_dir=ASSET_BUILD_DIR):
+    """
+    Write display-size copies of all page images (run once at build/deploy time).
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    for name, (source, width, image_format) in IMAGE_ASSETS.items():
+        data = optimize_image(source, width, image_format)
+        with open(os.path.join(build_dir, name), 'wb') as f:
+            f.write(data)
+        print(f"{name}: {os.path.getsize(source)} -> {len(data)} bytes")
+
+@st.cache_resource(show_spinner=False)
+def load_image_asset(name):
+    """
+    Bytes of a display-size image, loaded (or resized) once per process.
+    """
+    built = os.path.join(ASSET_BUILD_DIR, name)
+    if os.path.exists(built):
+        with open(built, 'rb') as f:
+            return f.read()
+    return optimize_image(*IMAGE_ASSETS[name])
+
+@st.cache_resource(show_spinner=False)
+def get_custom_style():
+    """
+    The page CSS, with the sidebar background inlined, rendered once per process.
+    """
     # Encode the local image to base64
-    sidebar_image_base64 = get_base64_of_bin_file('assets/backgrounds/puzzle_sidebar_background.jpg')
+    sidebar_image_base64 = base64.b64encode(load_image_asset('sidebar_background.jpg')).decode()
 
     # Apply custom styles, including the sidebar background image
-    custom_style = f"""
+    return f"""
         <style>
             /* Hide Streamlit default elements */
             #MainMenu {{visibility: hidden;}}
@@ -59,22 +131,22 @@ def page_style():
             }}
         </style>
     """
-    
+
+@timed('page_style')
+def page_style():
     # Set the page configuration with a custom icon
-    icon = Image.open('photos/rubiks.jpg')
-    st.set_page_config(page_title="MasterMind Puzzle", page_icon=icon, layout="wide")
+    st.set_page_config(page_title="MasterMind Puzzle", page_icon=load_image_asset('page_icon.png'), layout="wide")
 
     # Apply custom styles to the page
-    st.markdown(custom_style, unsafe_allow_html=True)
+    st.markdown(get_custom_style(), unsafe_allow_html=True)
 
     # Display the main background image (optional)
-    image = Image.open('assets/backgrounds/main_puzzle_background.png')
-    st.image(image)
+    st.image(load_image_asset('main_background.png'))
 
     # Sidebar content
     with st.sidebar:
         # Display the round profile picture at the top of the sidebar
-        st.image("photos/Round_Profile_Photo.png", width=100)
+        st.image(load_image_asset('profile_photo.png'), width=100)
 
         st.markdown("""
             ## MindForge Puzzle Game 🧩
@@ -87,7 +159,7 @@ def page_style():
         ### Features
         - **Dynamic Word Generation**: Words are fetched from Wikipedia summaries based on your chosen topic.
         - **Customizable Difficulty**: Adjust the number of words and grid size to change the difficulty level.
-        - **Interactive Gameplay**: Select words by entering coordinates and receive immediate feedback with sounds and highlights.
+        - **Interactive Gameplay**: Select words by dragging across the grid and receive immediate feedback with sounds and highlights.
         - **Educational Focus**: Enhance your vocabulary and understanding of various topics while having fun.
         """)
 
@@ -129,3 +201,7 @@ def page_style():
                 </button>
             </a>
         """, unsafe_allow_html=True)
+
+
+if __name__ == '__main__':
+    build_assets(sys.argv[1] if len(sys.argv) > 1 else ASSET_BUILD_DIR)
@@ -0,0 +1,239 @@
+import os
+import time
+import atexit
+import random
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from placement import DIRECTIONS
+
+# Measured difficulty score each label aims for. Plain layouts score about 0.4 and
+# targeted ones can reach roughly 0.1-0.8 (see benchmarks/bench_difficulty.py)
+DIFFICULTY_TARGETS = {'Beginner': 0.2, 'Intermediate': 0.4, 'Hard': 0.7}
+
+# How much each layout feature adds to the score (the weights sum to 1)
+FEATURE_NAMES = ('reversed', 'diagonal', 'overlap', 'decoys')
+FEATURE_WEIGHTS = np.array([0.35, 0.25, 0.1, 0.3])
+DECOY_SCALE = 2.0  # False leads per word at which the decoy feature reaches 0.5
+
+DEFAULT_CANDIDATES = 32
+DEFAULT_BUDGET = 0.5  # Seconds to spend building candidate layouts
+PROFILE_SPREAD = 0.2  # Spread of the per-candidate profiles around the target
+
+UNIFORM_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Directions read backwards (right to left, or bottom to top) and diagonal ones
+_REVERSED = np.array([dir_c < 0 or (dir_c == 0 and dir_r < 0) for dir_r, dir_c in DIRECTIONS])
+_DIAGONAL = np.array([dir_r != 0 and dir_c != 0 for dir_r, dir_c in DIRECTIONS])
+
+LayoutChoice = namedtuple('LayoutChoice', ['grid', 'words_not_placed', 'placements', 'score', 'features',
+                                           'candidates'])
+
+def difficulty_target(difficulty):
+    """
+    Target score for a label ('Beginner', 'Intermediate', 'Hard') or a number in [0, 1].
+    """
+    if isinstance(difficulty, str):
+        if difficulty not in DIFFICULTY_TARGETS:
+            raise ValueError(f"Unknown difficulty {difficulty!r}; use one of {', '.join(DIFFICULTY_TARGETS)}")
+        return DIFFICULTY_TARGETS[difficulty]
+    return min(max(float(difficulty), 0.0), 1.0)
+
+
+# Function to name the label closest to a measured score
+def difficulty_label(score):
+    return min(DIFFICULTY_TARGETS, key=lambda label: abs(DIFFICULTY_TARGETS[label] - score))
+
+
+def layout_profile(words, target):
+    """
+    Direction weights and filler alphabet for a layout aimed at target: low targets
+    favour forward, straight words and fill with letters no word starts with; high
+    targets favour reversed and diagonal words and fill with the words' own letters.
+    """
+    weights = (np.where(_REVERSED, target, 1 - target) * np.where(_DIAGONAL, target, 1 - target)) + 0.01
+    mix = 2 * target - 1
+    if mix > 0:
+        decoys = ''.join(words)
+    else:
+        starts = {word[0] for word in words if word}
+        decoys = ''.join(letter for letter in UNIFORM_ALPHABET if letter not in starts)
+    share = abs(mix)
+    if not decoys or share < 0.05:
+        return weights, UNIFORM_ALPHABET
+    # Repeat both alphabets so a filler letter comes from the decoys with probability ~share
+    uniform_copies = max(round(len(decoys) * (1 - share) / (share * len(UNIFORM_ALPHABET))), 0)
+    return weights, UNIFORM_ALPHABET * uniform_copies + decoys
+
+
+def _build_candidates(words, grid_size, jobs, deadline, minimum=0):
+    # Runs in a worker process (or inline); after `minimum` layouts, stops once time.time()
+    # passes deadline (set by the caller before submitting, so queueing counts too)
+    from backend import create_word_search
+    built = []
+    for index, seed, target in jobs:
+        if len(built) >= minimum and time.time() > deadline:
+            break
+        rng = random.Random(seed)
+        weights, alphabet = layout_profile(words, target)
+        grid, words_not_placed, placements = create_word_search(
+            words, grid_size, rng=rng, direction_weights=weights, alphabet=alphabet
+        )
+        built.append((index, grid, words_not_placed, placements))
+    return built
+
+
+def _pool_context():
+    # Workers are forked from a small single-threaded server process that has already
+    # imported the generator, not from the (threaded) Streamlit server itself
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['backend'])
+        return context
+    return None
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    # One pool per process, started (with `workers` processes) on first use and shut
+    # down at exit. Returns the pool and its size, which later calls cannot change.
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _pool_workers = workers
+        return _pool, _pool_workers
+
+
+def _drop_pool(pool):
+    # Forget a broken pool so the next call starts a new one
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False)
+
+
+@atexit.register
+def _shutdown_pool():
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Function to measure layout features of many candidate grids at once
+def layout_features(grids, words, placements_list):
+    """
+    grids is a (K, rows, cols) array of code points and placements_list holds each
+    grid's {word: (start, end)}. Returns a (K, 4) array with, per grid:
+    - reversed: share of placed words read backwards
+    - diagonal: share of placed words on a diagonal
+    - overlap: share of word letters on cells shared with another word
+    - decoys: false leads (cell pairs spelling a word's first two letters, in any
+      direction, that are not where a word starts) per word, squashed into [0, 1)
+    """
+    grids = np.asarray(grids)
+    if grids.dtype.kind == 'U':
+        grids = grids.view('<u4')
+    count, rows, cols = grids.shape
+    size = rows * cols
+    lengths = np.array([len(word) for word in words])
+    ends = np.zeros((count, len(words), 4), dtype=np.intp)
+    placed = np.zeros((count, len(words)), dtype=bool)
+    for k, placements in enumerate(placements_list):
+        for w, word in enumerate(words):
+            if word in placements:
+                (sr, sc), (er, ec) = placements[word]
+                ends[k, w] = (sr, sc, er, ec)
+                placed[k, w] = True
+    n_placed = np.maximum(placed.sum(axis=1), 1)
+
+    dir_r = np.sign(ends[..., 2] - ends[..., 0])
+    dir_c = np.sign(ends[..., 3] - ends[..., 1])
+    reversed_ = ((dir_c < 0) | ((dir_c == 0) & (dir_r < 0))) & placed
+    diagonal = (dir_r != 0) & (dir_c != 0) & placed
+
+    # Cells of every placed letter, counted per grid with one bincount
+    steps = np.arange(lengths.max(initial=1))
+    cell_r = ends[..., 0, None] + dir_r[..., None] * steps
+    cell_c = ends[..., 1, None] + dir_c[..., None] * steps
+    valid = (steps < lengths[None, :, None]) & placed[..., None]
+    flat = (np.arange(count)[:, None, None] * size + cell_r * cols + cell_c)[valid]
+    coverage = np.bincount(flat, minlength=count * size).reshape(count, size)
+    letters = valid.sum(axis=(1, 2))
+    overlap = 1 - (coverage > 0).sum(axis=1) / np.maximum(letters, 1)
+
+    # Two-letter leads in all 8 directions, matched against the words' first two letters
+    bigrams = np.unique([(ord(word[0]) << 21) | ord(word[1]) for word in words if len(word) > 1])
+    leads = np.zeros(count, dtype=np.intp)
+    for step_r, step_c in DIRECTIONS:
+        first = grids[:, max(-step_r, 0):rows - max(step_r, 0), max(-step_c, 0):cols - max(step_c, 0)]
+        second = grids[:, max(step_r, 0):rows + min(step_r, 0), max(step_c, 0):cols + min(step_c, 0)]
+        keys = (first.astype(np.int64) << 21) | second
+        leads += np.isin(keys, bigrams).sum(axis=(1, 2))
+    true_leads = (placed & (lengths > 1)).sum(axis=1)
+    false_leads = np.maximum(leads - true_leads, 0) / n_placed
+    decoys = false_leads / (false_leads + DECOY_SCALE)
+
+    return np.stack([reversed_.sum(axis=1) / n_placed, diagonal.sum(axis=1) / n_placed, overlap, decoys], axis=1)
+
+
+def difficulty_scores(features):
+    return features @ FEATURE_WEIGHTS
+
+
+# Function to build candidate layouts and keep the one closest to a difficulty target
+def generate_layout(words, grid_size, difficulty, rng=None, candidates=DEFAULT_CANDIDATES,
+                    budget=DEFAULT_BUDGET, workers=None):
+    """
+    Build up to `candidates` layouts of the words, each with its own profile
+    (see layout_profile) drawn around the target, score them all at once with
+    layout_features and return the one closest to the target among those that
+    place the most words. When more than one core is available, candidates are
+    built on a process pool shared by all calls. Building stops `budget` seconds
+    after the call starts (at least one layout is always built), and every
+    layout built by then is scored. With the same rng seed the result is the
+    same, whatever the number of workers, whenever all candidates fit in the
+    budget.
+    """
+    target = difficulty_target(difficulty)
+    rng = rng or random
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    profiles = np.clip(target + np_rng.normal(0, PROFILE_SPREAD, candidates), 0, 1)
+    profiles[0] = target
+    jobs = [(i, rng.getrandbits(64), float(profiles[i])) for i in range(candidates)]
+
+    deadline = time.time() + budget
+    workers = min(workers or os.cpu_count() or 1, candidates)
+    built = None
+    if workers > 1:
+        # The deadline is fixed before submitting, so starting the pool's workers or
+        # waiting behind other calls' jobs uses up the budget instead of adding to it.
+        # Workers return everything they built by then, so nothing built is thrown away.
+        pool, size = _get_pool(workers)
+        workers = min(workers, size)
+        try:
+            futures = [pool.submit(_build_candidates, words, grid_size, jobs[w::workers], deadline,
+                                   1 if w == 0 else 0)
+                       for w in range(workers)]
+            built = sorted((item for future in futures for item in future.result()), key=lambda item: item[0])
+        except BrokenProcessPool:
+            _drop_pool(pool)  # A worker died; build inline this time and start a new pool next time
+    if built is None:
+        built = _build_candidates(words, grid_size, jobs, deadline, 1)
+
+    features = layout_features(np.stack([grid for _, grid, _, _ in built]), words,
+                               [placements for _, _, _, placements in built])
+    scores = difficulty_scores(features)
+    missing = np.array([len(words_not_placed) for _, _, words_not_placed, _ in built])
+    best = int(np.lexsort((np.abs(scores - target), missing))[0])
+    _, grid, words_not_placed, placements = built[best]
+    return LayoutChoice(grid, words_not_placed, placements, float(scores[best]),
+                        dict(zip(FEATURE_NAMES, features[best].tolist())), len(built))
@@ -0,0 +1,289 @@
+import re
+import sys
+import json
+import logging
+import secrets
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import backend
+from puzzle_state import PuzzleState
+from puzzle_store import PuzzleStore, share_key
+from session_store import open_session_store
+from word_sources import StaticSource, CorpusSource
+from instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_NUM_WORDS = 500
+MAX_GRID_SIZE = 100
+MAX_SEED = 2 ** 64 - 1  # Seeds are stored as unsigned 64-bit integers (see puzzle_store.py)
+
+GAME_PATH = re.compile(r'^/games/([A-Za-z0-9_-]+)(/check|/share)?$')
+
+
+class GameError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(name, value, low, high):
+    # Whole numbers (or strings of them) within [low, high]; anything else is the client's error
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise GameError(400, f"{name} must be an integer")
+    try:
+        number = int(value)
+    except ValueError:
+        raise GameError(400, f"{name} must be an integer")
+    if not low <= number <= high:
+        raise GameError(400, f"{name} must be {low}-{high}")
+    return number
+
+
+def _share_id(session_id):
+    # Where a game's share key waits until the player shares it ('.' never appears in a game id)
+    return session_id + '.share'
+
+
+def _point(value):
+    # A [row, col] pair of whole numbers; 2.5, true or "3" are the client's error
+    if not isinstance(value, (list, tuple)) or len(value) != 2 or \
+            not all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        raise GameError(400, "start and end must be [row, col] pairs of integers")
+    return value
+
+
+def _state_json(session_id, state, code=None):
+    return {
+        'game_id': session_id,
+        'code': code,
+        'topic': state.topic,
+        'rows': state.rows,
+        'cols': state.cols,
+        'grid': [''.join(row) for row in state.char_grid()],
+        'words': state.words,
+        'found': [i for i in range(state.word_count) if state.is_found(i)],
+        'complete': state.all_found,
+        'version': state.version,
+    }
+
+
+class GameService:
+    """
+    The game without Streamlit: start a game, check a selection, read the state,
+    share the puzzle. Each game is a PuzzleState kept as bytes in a session store,
+    so any number of server threads or processes sharing that store can serve the
+    same player. Puzzles are only written to the puzzle store when shared.
+    """
+
+    def __init__(self, sessions, source=None, puzzles=None):
+        self.sessions = sessions
+        self.source = source
+        self.puzzles = puzzles
+
+    @timed('server_new_game')
+    def new_game(self, topic=None, num_words=10, grid_size=13, seed=None, code=None, difficulty=None):
+        if code is not None:
+            if not isinstance(code, str) or self.puzzles is None or code not in self.puzzles:
+                raise GameError(404, f"Unknown puzzle code {code}")
+            state = self.puzzles.get(code)
+            shared = {'code': code}
+        else:
+            if not topic or not isinstance(topic, str):
+                raise GameError(400, "Give a topic or a puzzle code")
+            num_words = _int_param('num_words', num_words, 1, MAX_NUM_WORDS)
+            grid_size = _int_param('grid_size', grid_size, 5, MAX_GRID_SIZE)
+            if seed is not None:
+                seed = _int_param('seed', seed, 0, MAX_SEED)
+            if difficulty is not None:
+                try:
+                    backend.difficulty_target(difficulty)
+                except (TypeError, ValueError) as error:
+                    raise GameError(400, str(error))
+            puzzle = backend.generate_puzzle(topic, num_words, grid_size, self.source, seed, difficulty)
+            if puzzle is None:
+                raise GameError(404, f"No words found for {topic!r}")
+            state = PuzzleState.from_puzzle(puzzle)
+            shared = {'key': share_key(puzzle)}
+        session_id = secrets.token_urlsafe(12)
+        self.sessions.put(session_id, state.to_bytes())
+        if self.puzzles is not None:
+            self.sessions.put(_share_id(session_id), json.dumps(shared).encode('utf-8'))
+        return _state_json(session_id, state, code)
+
+    @timed('server_state')
+    def state(self, session_id):
+        data = self.sessions.get(session_id)
+        if data is None:
+            raise GameError(404, "Unknown game")
+        return _state_json(session_id, PuzzleState.from_bytes(data))
+
+    @timed('server_share')
+    def share(self, session_id):
+        """
+        Store a game's puzzle (without its progress) and return its code, which
+        new_game(code=...) opens for anyone.
+        """
+        if self.puzzles is None:
+            raise GameError(404, "Sharing is not enabled")
+        shared = self.sessions.get(_share_id(session_id))
+        data = self.sessions.get(session_id)
+        if shared is None or data is None:
+            raise GameError(404, "Unknown game")
+        shared = json.loads(shared)
+        if 'code' not in shared:
+            topic, words, grid_size, seed, target = shared['key']
+            key = (topic, tuple(words), grid_size, seed, target)
+            shared = {'code': self.puzzles.put_state(PuzzleState.from_bytes(data), key)}
+            self.sessions.put(_share_id(session_id), json.dumps(shared).encode('utf-8'))
+        return {'game_id': session_id, 'code': shared['code']}
+
+    @timed('server_check')
+    def check(self, session_id, start, end):
+        (start_row, start_col), (end_row, end_col) = _point(start), _point(end)
+
+        def change(data):
+            state = PuzzleState.from_bytes(data)
+            result = {'correct': False, 'word': None, 'already_found': False}
+            if not (0 <= min(start_row, end_row) and max(start_row, end_row) < state.rows and
+                    0 <= min(start_col, end_col) and max(start_col, end_col) < state.cols):
+                result['error'] = 'out_of_bounds'
+            elif not backend.is_straight_line(start_row, start_col, end_row, end_col):
+                result['error'] = 'not_straight'
+            else:
+                index = state.check(start_row, start_col, end_row, end_col)
+                if index is not None:
+                    result.update(correct=True, word=state.words[index], index=index,
+                                  already_found=not state.mark_found(index))
+            result.update(found=state.found_count, remaining=state.word_count - state.found_count,
+                          complete=state.all_found)
+            changed = result['correct'] and not result['already_found']
+            return (state.to_bytes() if changed else None), result
+
+        result = self.sessions.update(session_id, change)
+        if result is None:
+            raise GameError(404, "Unknown game")
+        return result
+
+
+class GameRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP/1.1 (keep-alive), so a client reuses one connection per player:
+
+        POST /games              {"topic", "num_words", "grid_size", "seed", "difficulty"} or {"code"}
+        GET  /games/<id>         grid, words and progress
+        POST /games/<id>/check   {"start": [row, col], "end": [row, col]} (0-based)
+        POST /games/<id>/share   store the puzzle and return its code
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and body go out in two writes; don't wait on delayed ACKs
+    service = None  # Set by make_server
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise GameError(413, "Request body too large")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise GameError(400, "Body must be JSON")
+        if not isinstance(body, dict):
+            raise GameError(400, "Body must be a JSON object")
+        return body
+
+    def _handle(self, method):
+        try:
+            path = self.path.split('?')[0]
+            match = GAME_PATH.match(path)
+            if method == 'POST' and path == '/games':
+                body = self._body()
+                payload = self.service.new_game(
+                    body.get('topic'), body.get('num_words', 10), body.get('grid_size', 13),
+                    body.get('seed'), body.get('code'), body.get('difficulty')
+                )
+                self._send(201, payload)
+            elif method == 'GET' and match and not match.group(2):
+                self._send(200, self.service.state(match.group(1)))
+            elif method == 'POST' and match and match.group(2) == '/check':
+                body = self._body()
+                self._send(200, self.service.check(match.group(1), body.get('start'), body.get('end')))
+            elif method == 'POST' and match and match.group(2) == '/share':
+                self._body()  # Drain any body so the connection can be reused
+                self._send(200, self.service.share(match.group(1)))
+            else:
+                raise GameError(404, "Not found")
+        except GameError as error:
+            self._send(error.status, {'error': str(error)})
+        except Exception:
+            logger.exception("Request failed: %s %s", method, self.path)
+            self._send(500, {'error': "Internal error"})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GameHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Many players connect at once
+
+
+# Function to build a game server (call serve_forever, or start_server for a background thread)
+def make_server(service, host='127.0.0.1', port=8000):
+    handler = type('BoundGameRequestHandler', (GameRequestHandler,), {'service': service})
+    server = GameHTTPServer((host, port), handler)
+    return server
+
+
+def start_server(service, host='127.0.0.1', port=0):
+    server = make_server(service, host, port)
+    threading.Thread(target=server.serve_forever, name='game-server', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the word search game over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--sessions', default='memory', help="'memory' or 'sqlite:<path>' (shared by processes)")
+    parser.add_argument('--static-topics', help="JSON file of topic -> text, instead of Wikipedia")
+    parser.add_argument('--corpus-index', help="Offline index built with word_sources.py")
+    parser.add_argument('--puzzle-store', help="Puzzle store for share codes")
+    args = parser.parse_args(argv)
+
+    source = None
+    if args.static_topics:
+        with open(args.static_topics, encoding='utf-8') as f:
+            source = StaticSource(json.load(f))
+    elif args.corpus_index:
+        source = CorpusSource(args.corpus_index)
+    puzzles = PuzzleStore(args.puzzle_store) if args.puzzle_store else None
+    service = GameService(open_session_store(args.sessions), source, puzzles)
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import functools
+from collections import deque
+import numpy as np
+from placement import fill_empty
+
+# Rounds of re-filling before clean_fill gives up on a stubborn duplicate
+MAX_REFILL_ROUNDS = 20
+
+
+class WordScanner:
+    """
+    Aho-Corasick automaton over a set of words and their reverses, so scanning the
+    4 forward line directions of a grid covers all 8 reading directions.
+    """
+
+    def __init__(self, words):
+        self.words = list(dict.fromkeys(words))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for word_id, word in enumerate(self.words):
+            self._add(word, word_id, False)
+            if word[::-1] != word:
+                self._add(word[::-1], word_id, True)
+        self._link()
+
+    def _add(self, pattern, word_id, reversed_):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((word_id, len(pattern), reversed_))
+
+    def _link(self):
+        # Breadth-first failure links; outputs are merged along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def scan(self, text):
+        """
+        Yield (end position, word id, pattern length, reversed) for every match in text.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for word_id, length, reversed_ in out[state]:
+                    yield i, word_id, length, reversed_
+
+
+@functools.lru_cache(maxsize=64)
+def scan_index(rows, cols):
+    """
+    Flat cell indices of every row, column, diagonal and anti-diagonal of a
+    rows x cols grid, joined into one array with -1 between lines.
+    """
+    cells = np.arange(rows * cols).reshape(rows, cols)
+    flipped = np.fliplr(cells)
+    lines = list(cells) + list(cells.T)
+    for offset in range(-(rows - 1), cols):
+        lines.append(np.diagonal(cells, offset))
+        # Anti-diagonals read bottom-left to top-right (the (-1, 1) direction)
+        lines.append(np.diagonal(flipped, offset)[::-1])
+    separator = np.array([-1])
+    index = np.concatenate([part for line in lines for part in (line, separator)])
+    index.flags.writeable = False
+    return index
+
+
+def _as_codes(grid):
+    grid = np.asarray(grid)
+    if grid.dtype.kind == 'U':
+        return np.ascontiguousarray(grid, dtype='<U1').view('<u4')
+    return grid
+
+
+# Function to find every occurrence of every word in a grid in a single pass
+def find_occurrences(grid, words, scanner=None):
+    """
+    Returns a list of (word, (start_row, start_col), (end_row, end_col)), with start
+    being the cell holding the word's first letter.
+    """
+    codes = _as_codes(grid)
+    rows, cols = codes.shape
+    index = scan_index(rows, cols)
+    flat = codes.reshape(-1)
+    text = np.where(index >= 0, flat[index], 0).astype('<u4').tobytes().decode('utf-32-le')
+    scanner = scanner or WordScanner(words)
+    rows_end = rows * (cols + 1)  # The rows come first in the scan index
+    occurrences = []
+    for end, word_id, length, reversed_ in scanner.scan(text):
+        if length == 1 and end >= rows_end:
+            continue  # A single letter lies on four lines; count it on its row only
+        first, last = int(index[end - length + 1]), int(index[end])
+        if reversed_:
+            first, last = last, first
+        occurrences.append((scanner.words[word_id], divmod(first, cols), divmod(last, cols)))
+    return occurrences
+
+
+def _line_cells(start, end, cols):
+    length = max(abs(end[0] - start[0]), abs(end[1] - start[1]))
+    dir_r = (end[0] - start[0]) // length if length else 0
+    dir_c = (end[1] - start[1]) // length if length else 0
+    return [(start[0] + i * dir_r) * cols + start[1] + i * dir_c for i in range(length + 1)]
+
+
+# Function to re-fill random letters until no word shows up where it was not placed
+def clean_fill(grid, placements, protected, blocked_words=(), rng=None, max_rounds=MAX_REFILL_ROUNDS,
+               alphabet=None):
+    """
+    grid is a filled code point grid, placements maps each placed word to its
+    (start, end) and protected marks the cells holding placed letters. Accidental
+    copies of placed words and any blocked word are broken up by re-filling only
+    their unprotected cells, drawing from the same filler alphabet as the first
+    fill (A-Z by default). Returns the occurrences that could not be removed
+    (e.g. ones made entirely of placed letters).
+    """
+    words = list(placements) + [word for word in blocked_words if word not in placements]
+    scanner = WordScanner(words)
+    intended = {(word, start, end) for word, (start, end) in placements.items()}
+    # Palindromes are found in both directions over the same cells
+    intended |= {(word, end, start) for word, (start, end) in placements.items() if word == word[::-1]}
+    cols = grid.shape[1]
+    flat = grid.reshape(-1)
+    protected = protected.reshape(-1)
+    for _ in range(max_rounds):
+        unwanted = [occ for occ in find_occurrences(grid, words, scanner) if occ not in intended]
+        if not unwanted:
+            return []
+        refill = [cell for word, start, end in unwanted for cell in _line_cells(start, end, cols)
+                  if not protected[cell]]
+        if not refill:
+            return unwanted
+        flat[refill] = 0
+        if alphabet:
+            fill_empty(flat, rng, alphabet)
+        else:
+            fill_empty(flat, rng)
+    return [occ for occ in find_occurrences(grid, words, scanner) if occ not in intended]
@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+import functools
+import threading
+import tempfile
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Timing is off unless MINDFORGE_METRICS is set; when off, timed functions cost one flag check
+ENABLED = os.environ.get('MINDFORGE_METRICS', '').lower() not in ('', '0', 'false', 'no')
+
+# Latency histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_spans = {}     # name -> [count, total seconds, bucket counts]
+_counters = {}  # name -> value
+_gauges = {}    # name -> callable returning {label: value} or a number
+_local = threading.local()
+_export_lock = threading.Lock()
+_exporters = {}  # path -> exporter thread
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def _record(name, seconds):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            entry = _spans[name] = [0, 0.0, [0] * len(BUCKETS)]
+        entry[0] += 1
+        entry[1] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry[2][i] += 1
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run.append((name, seconds))
+
+
+@contextlib.contextmanager
+def _timing(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - started)
+
+
+# Function to time a block of code
+def span(name):
+    if not ENABLED:
+        return contextlib.nullcontext()
+    return _timing(name)
+
+
+# Decorator to time every call of a function
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def incr(name, value=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    run = getattr(_local, 'counters', None)
+    if run is not None:
+        run[name] = run.get(name, 0) + value
+
+
+def register_gauge(name, read):
+    """
+    read() is called at export time and returns a number or a {label: number} dict.
+    """
+    with _lock:
+        _gauges[name] = read
+
+
+# Functions to collect the spans of one Streamlit rerun (one script thread)
+def begin_rerun():
+    if not ENABLED:
+        return
+    _local.run = []
+    _local.counters = {}
+    _local.started = time.perf_counter()
+
+
+def end_rerun():
+    """
+    Returns {'total': seconds, 'spans': [(name, seconds), ...], 'counters': {...}}
+    for the rerun that began on this thread, or None when timing is off.
+    """
+    run = getattr(_local, 'run', None)
+    if not ENABLED or run is None:
+        return None
+    total = time.perf_counter() - _local.started
+    breakdown = {'total': total, 'spans': run, 'counters': _local.counters}
+    _local.run = _local.counters = None
+    _record('rerun', total)
+    return breakdown
+
+
+def _metric_name(name):
+    return 'mindforge_' + ''.join(ch if ch.isalnum() else '_' for ch in name)
+
+
+# Function to render all metrics in the Prometheus text exposition format
+def render_prometheus():
+    lines = []
+    with _lock:
+        spans = {name: (entry[0], entry[1], list(entry[2])) for name, entry in _spans.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines.append('# TYPE mindforge_span_seconds histogram')
+    for name, (count, total, buckets) in sorted(spans.items()):
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f'mindforge_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'mindforge_span_seconds_bucket{{span="{name}",le="+Inf"}} {count}')
+        lines.append(f'mindforge_span_seconds_sum{{span="{name}"}} {total}')
+        lines.append(f'mindforge_span_seconds_count{{span="{name}"}} {count}')
+
+    for name, value in sorted(counters.items()):
+        metric = _metric_name(name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+
+    for name, read in sorted(gauges.items()):
+        try:
+            value = read()
+        except Exception:
+            logger.exception("Gauge %s failed", name)
+            continue
+        metric = _metric_name(name)
+        lines.append(f'# TYPE {metric} gauge')
+        if isinstance(value, dict):
+            for label, item in sorted(value.items()):
+                lines.append(f'{metric}{{key="{label}"}} {float(item)}')
+        else:
+            lines.append(f'{metric} {float(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# Function to write the metrics to a file (e.g. for node_exporter's textfile collector)
+def export_to_file(path):
+    """
+    Writes through a temporary file of its own in the same directory and renames it
+    over path, so readers never see a half-written file, even with several writers.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with _export_lock:
+        fd, tmp_path = tempfile.mkstemp(prefix='.metrics-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+def _export_loop(path, interval):
+    while True:
+        try:
+            export_to_file(path)
+        except Exception:
+            logger.exception("Writing metrics to %s failed", path)
+        time.sleep(interval)
+
+
+# Function to write the metrics to a file every `interval` seconds from a background thread
+def start_file_exporter(path, interval=15.0):
+    """
+    One thread per path and process, however often this is called; gauges are read
+    once per interval instead of on every rerun.
+    """
+    with _export_lock:
+        thread = _exporters.get(path)
+        if thread is None:
+            thread = _exporters[path] = threading.Thread(
+                target=_export_loop, args=(path, interval), name='metrics-file', daemon=True
+            )
+            thread.start()
+    return thread
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Function to serve /metrics for Prometheus from a background thread
+def start_http_server(port, host='0.0.0.0'):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,301 @@
+import random
+import functools
+from collections import namedtuple
+import numpy as np
+
+# All possible directions (8 directions), as (row step, column step)
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (-1, 1),
+              (-1, 0), (0, -1), (-1, -1), (1, -1)]
+
+# Number of slots tried before backtracking gives up and falls back to dense placement
+# (a full placement is rarely found after a few thousand tries, so more only costs time)
+DEFAULT_MAX_STEPS = 5000
+
+# Word lists at least this long (event mode only; the normal game tops out at 20 words)
+# go straight to place_words_dense. Shorter lists always get the backtracking search,
+# whatever the board size, and only fall back to dense placement past its step budget.
+LARGE_WORD_COUNT = 40
+DENSE_SAMPLES = 64  # Random free starts (and overlapping anchors) tried per word
+
+# grid holds one Unicode code point per cell (0 = empty), placements maps each placed
+# word to its ((start_row, start_col), (end_row, end_col)), attempts counts slots tried
+PlacementResult = namedtuple('PlacementResult', ['grid', 'placements', 'words_not_placed', 'attempts'])
+
+
+@functools.lru_cache(maxsize=256)
+def slot_table(grid_size, length):
+    """
+    Every way a word of the given length fits on the board, as a read-only
+    (n_slots, length) array of flat cell indices, one row per (start, direction).
+    """
+    steps = np.arange(length)
+    tables = []
+    for dir_r, dir_c in DIRECTIONS:
+        # Valid start rows/cols are those whose end cell stays on the board
+        rows = np.arange(grid_size)
+        rows = rows[(rows + dir_r * (length - 1) >= 0) & (rows + dir_r * (length - 1) < grid_size)]
+        cols = np.arange(grid_size)
+        cols = cols[(cols + dir_c * (length - 1) >= 0) & (cols + dir_c * (length - 1) < grid_size)]
+        start_r, start_c = np.meshgrid(rows, cols, indexing='ij')
+        cell_r = start_r.reshape(-1, 1) + dir_r * steps
+        cell_c = start_c.reshape(-1, 1) + dir_c * steps
+        tables.append(cell_r * grid_size + cell_c)
+    cells = np.concatenate(tables).astype(np.intp)
+    cells.flags.writeable = False
+    return cells
+
+
+@functools.lru_cache(maxsize=256)
+def slot_directions(grid_size, length):
+    """
+    Index into DIRECTIONS of every row of slot_table(grid_size, length).
+    """
+    counts = [max(grid_size - abs(dir_r) * (length - 1), 0) * max(grid_size - abs(dir_c) * (length - 1), 0)
+              for dir_r, dir_c in DIRECTIONS]
+    directions = np.repeat(np.arange(len(DIRECTIONS)), counts)
+    directions.flags.writeable = False
+    return directions
+
+
+def weighted_order(directions, weights, np_rng):
+    """
+    A random order of slots in which a slot's chance to come early is proportional
+    to the weight of its direction (weighted sampling without replacement in one
+    vectorized step). Slots in zero-weight directions are dropped.
+    """
+    w = weights[directions]
+    keep = np.flatnonzero(w > 0)
+    keys = np.log(np_rng.random(len(keep))) / w[keep]
+    return keep[np.argsort(-keys)]
+
+
+def encode_word(word):
+    return np.frombuffer(word.encode('utf-32-le'), dtype='<u4')
+
+
+def feasible_slots(grid, cells, codes):
+    """
+    Indices of the slots in cells where every letter is either empty or already
+    equal to the word's letter, checked for all slots in one comparison. A slot
+    whose letters are all already there is rejected (as in place_words_dense):
+    the word would only be hidden inside another one, sharing its endpoints.
+    """
+    current = grid[cells]
+    empty = current == 0
+    fits = np.all(empty | (current == codes), axis=1) & empty.any(axis=1)
+    return np.flatnonzero(fits)
+
+
+def _endpoints(slot, grid_size):
+    return (int(slot[0] // grid_size), int(slot[0] % grid_size)), \
+           (int(slot[-1] // grid_size), int(slot[-1] % grid_size))
+
+
+# Function to place words on an empty grid
+def place_words(words, grid_size, rng=None, max_steps=DEFAULT_MAX_STEPS, direction_weights=None):
+    """
+    Place words (longest first) on a grid_size x grid_size board.
+
+    For each word the feasible slots are found with one vectorized check and one is
+    picked at random; when a word has no feasible slot the search backtracks and
+    moves earlier words. Within max_steps slot tries this finds a full placement
+    whenever one exists (max_steps=None searches exhaustively); past the budget it
+    falls back to place_words_dense and reports the words it could not place.
+    direction_weights (one per DIRECTIONS entry) biases the draw towards some
+    directions; directions with weight 0 are never used.
+    """
+    rng = rng or random
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    if direction_weights is not None:
+        direction_weights = np.asarray(direction_weights, dtype=float)
+    grid = np.zeros(grid_size * grid_size, dtype=np.uint32)
+
+    words = sorted(words, key=len, reverse=True)
+    # Words longer than the board can never be placed
+    words_not_placed = [word for word in words if not 0 < len(word) <= grid_size]
+    items = [(word, encode_word(word), slot_table(grid_size, len(word)))
+             for word in words if 0 < len(word) <= grid_size]
+
+    # Iterative depth-first search; each frame is [candidate slots, next candidate, letters overwritten]
+    stack = []
+    depth = 0
+    attempts = 0
+    exhausted = False
+    while depth < len(items):
+        word, codes, cells = items[depth]
+        if len(stack) == depth:
+            feasible = feasible_slots(grid, cells, codes)
+            if direction_weights is None:
+                feasible = np_rng.permutation(feasible)
+            else:
+                directions = slot_directions(grid_size, len(codes))[feasible]
+                feasible = feasible[weighted_order(directions, direction_weights, np_rng)]
+            stack.append([feasible, 0, None])
+        frame = stack[depth]
+        if frame[2] is not None:
+            # Back here after a dead end further down: lift this word off the grid first
+            grid[cells[frame[0][frame[1] - 1]]] = frame[2]
+            frame[2] = None
+        if frame[1] == len(frame[0]):
+            stack.pop()
+            depth -= 1
+            if depth < 0:
+                exhausted = True
+                break
+            continue
+        if max_steps is not None and attempts >= max_steps:
+            exhausted = True
+            break
+        slot = cells[frame[0][frame[1]]]
+        frame[1] += 1
+        attempts += 1
+        frame[2] = grid[slot].copy()
+        grid[slot] = codes
+        depth += 1
+
+    if exhausted:
+        # Past the budget a full placement is unlikely; pack as many words as possible instead
+        dense = place_words_dense([word for word, _, _ in items], grid_size, np_rng=np_rng,
+                                  direction_weights=direction_weights)
+        grid = dense.grid.reshape(-1)
+        placements = dense.placements
+        words_not_placed.extend(dense.words_not_placed)
+        attempts += dense.attempts
+    else:
+        placements = {word: _endpoints(cells[frame[0][frame[1] - 1]], grid_size)
+                      for (word, codes, cells), frame in zip(items, stack)}
+
+    return PlacementResult(grid.reshape(grid_size, grid_size), placements, words_not_placed, attempts)
+
+
+class FreeCells:
+    """
+    Spatial index of the empty cells of a board: a packed array of free cell
+    indices plus each cell's position in it, so a cell is removed in O(1) and
+    random free cells are drawn without scanning the board.
+    """
+
+    def __init__(self, size):
+        self.cells = np.arange(size)
+        self.position = np.arange(size)
+        self.count = size
+
+    def remove(self, cell):
+        i = self.position[cell]
+        if i >= self.count:
+            return  # Already taken
+        last = self.cells[self.count - 1]
+        self.cells[i], self.cells[self.count - 1] = last, cell
+        self.position[last], self.position[cell] = i, self.count - 1
+        self.count -= 1
+
+    def sample(self, k, np_rng):
+        if self.count == 0:
+            return self.cells[:0]
+        return self.cells[np_rng.integers(self.count, size=k)]
+
+
+# Function to place many words on a big board in one greedy pass
+def place_words_dense(words, grid_size, rng=None, samples=DENSE_SAMPLES, overlap=True, np_rng=None,
+                      direction_weights=None):
+    """
+    Scalable alternative to place_words for mega-puzzles (and for word lists too
+    long to fit, where backtracking would only burn its step budget).
+
+    Words go longest first, without backtracking. Each word is tried on a batch
+    of candidate slots, all checked in one vectorized step:
+    - starts drawn from the free-cell index
+    - with overlap=True, slots that cross letters already on the board where the
+      word shares them (found through the index of placed cells)
+    The feasible slot sharing the most letters wins (ties at random), which packs
+    the words densely. Words that fit none of the sampled slots are reported as
+    not placed. direction_weights biases the tie-break as in place_words.
+    """
+    if np_rng is None:
+        np_rng = np.random.default_rng((rng or random).getrandbits(64))
+    size = grid_size * grid_size
+    grid = np.zeros(size, dtype=np.uint32)
+    free = FreeCells(size)
+    placed_cells = np.empty(size, dtype=np.intp)  # Index of occupied cells, in placement order
+    n_placed = 0
+    steps = np.array(DIRECTIONS)
+    if direction_weights is not None:
+        direction_weights = np.asarray(direction_weights, dtype=float)
+
+    words = sorted(words, key=len, reverse=True)
+    words_not_placed = [word for word in words if not 0 < len(word) <= grid_size]
+    placements = {}
+    attempts = 0
+    for word in words:
+        if not 0 < len(word) <= grid_size:
+            continue
+        codes = encode_word(word)
+        length = len(codes)
+        offsets = np.arange(length)
+        attempts += 1
+
+        # Candidate (start cell, direction) pairs: random free starts in every direction...
+        starts = np.repeat(free.sample(samples, np_rng), len(DIRECTIONS))
+        dirs = np.tile(np.arange(len(DIRECTIONS)), len(starts) // len(DIRECTIONS))
+        if overlap and n_placed:
+            # ...plus slots crossing a placed cell at a position where the word has that letter
+            hits, letter_pos = np.nonzero(grid[placed_cells[:n_placed]][:, None] == codes[None, :])
+            if len(hits) > samples:
+                keep = np_rng.choice(len(hits), samples, replace=False)
+                hits, letter_pos = hits[keep], letter_pos[keep]
+            anchor = np.repeat(placed_cells[:n_placed][hits], len(DIRECTIONS))
+            anchor_dirs = np.tile(np.arange(len(DIRECTIONS)), len(hits))
+            back = np.repeat(letter_pos, len(DIRECTIONS))
+            anchor_r = anchor // grid_size - steps[anchor_dirs, 0] * back
+            anchor_c = anchor % grid_size - steps[anchor_dirs, 1] * back
+            on_board = (anchor_r >= 0) & (anchor_r < grid_size) & (anchor_c >= 0) & (anchor_c < grid_size)
+            starts = np.concatenate([starts, (anchor_r * grid_size + anchor_c)[on_board]])
+            dirs = np.concatenate([dirs, anchor_dirs[on_board]])
+
+        rows = starts[:, None] // grid_size + steps[dirs, 0][:, None] * offsets
+        cols = starts[:, None] % grid_size + steps[dirs, 1][:, None] * offsets
+        fits = np.all((rows >= 0) & (rows < grid_size) & (cols >= 0) & (cols < grid_size), axis=1)
+        cells = (rows * grid_size + cols)[fits]
+        current = grid[cells]
+        shared = np.sum(current == codes, axis=1)
+        # A slot made entirely of letters already there would just hide the word in another one
+        ok = np.all((current == 0) | (current == codes), axis=1) & (shared < length)
+        if not ok.any():
+            words_not_placed.append(word)
+            continue
+        if direction_weights is None:
+            tie_break = np_rng.random(len(ok))
+        else:
+            # Weighted random keys in (0, 1]; zero-weight directions rank below every feasible slot
+            w = direction_weights[dirs[fits]]
+            ok &= w > 0
+            tie_break = np_rng.random(len(ok)) ** (1 / np.where(w > 0, w, 1))
+        score = tie_break + (shared if overlap else 0)
+        slot = cells[np.argmax(np.where(ok, score, -1.0))]
+
+        new_cells = slot[grid[slot] == 0]
+        grid[slot] = codes
+        placed_cells[n_placed:n_placed + len(new_cells)] = new_cells
+        n_placed += len(new_cells)
+        for cell in new_cells.tolist():
+            free.remove(cell)
+        placements[word] = _endpoints(slot, grid_size)
+
+    return PlacementResult(grid.reshape(grid_size, grid_size), placements, words_not_placed, attempts)
+
+
+# Function to fill the empty cells with random letters in one step
+def fill_empty(grid, rng=None, alphabet='ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
+    rng = rng or random
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    empty = grid == 0
+    letters = encode_word(alphabet)
+    grid[empty] = letters[np_rng.integers(len(letters), size=int(empty.sum()))]
+    return grid
+
+
+def to_char_grid(grid):
+    """
+    View a code point grid as the '<U1' letter grid the app works with.
+    """
+    return np.ascontiguousarray(grid, dtype='<u4').view('<U1')
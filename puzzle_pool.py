@@ -0,0 +1,163 @@
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from topic_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+class PuzzlePool:
+    """
+    Keeps a few ready-made puzzles per (topic, num_words, grid_size) so that
+    "Generate Puzzle" can hand one out instantly. A combination is pooled once it
+    has been asked for popular_after times (or was warmed explicitly), and every
+    puzzle taken out is replaced by a background worker.
+
+    generate(topic, num_words, grid_size) must return a puzzle, or None when the
+    topic has no usable words (such keys are dropped from the pool). An exception
+    (e.g. a network error) is logged and the refill is retried after a delay that
+    doubles with each failure in a row, from retry_delay up to max_retry_delay.
+    """
+
+    def __init__(self, generate, depth=3, workers=2, popular_after=2, max_keys=32, rate_window=60.0,
+                 retry_delay=1.0, max_retry_delay=300.0):
+        self.generate = generate
+        self.depth = depth
+        self.popular_after = popular_after
+        self.max_keys = max_keys
+        self.rate_window = rate_window
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='puzzle-pool')
+        self._lock = threading.Lock()
+        self._ready = OrderedDict()  # key -> deque of puzzles, least recently requested first
+        self._in_flight = {}
+        self._requests = {}
+        self._failures = {}  # key -> refills failed in a row
+        self._closed = False
+        self._refill_times = deque()
+        self._started = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.refilled = 0
+        self.refill_errors = 0
+
+    def _key(self, topic, num_words, grid_size):
+        return (normalize_topic(topic), int(num_words), int(grid_size))
+
+    def _track(self, key):
+        # Caller holds the lock
+        if key not in self._ready:
+            self._ready[key] = deque()
+            self._in_flight[key] = 0
+            while len(self._ready) > self.max_keys:
+                old_key, _ = self._ready.popitem(last=False)
+                self._in_flight.pop(old_key, None)
+                self._failures.pop(old_key, None)
+        self._ready.move_to_end(key)
+
+    def _schedule(self, key, topic):
+        # Caller holds the lock
+        missing = self.depth - len(self._ready[key]) - self._in_flight[key]
+        for _ in range(max(missing, 0)):
+            self._in_flight[key] += 1
+            self._executor.submit(self._refill, key, topic)
+
+    def _refill(self, key, topic):
+        try:
+            puzzle = self.generate(topic, key[1], key[2])
+        except Exception:
+            logger.warning("Refilling the puzzle pool for %r failed", key, exc_info=True)
+            with self._lock:
+                self.refill_errors += 1
+                if self._closed or key not in self._ready:
+                    return
+                failures = self._failures[key] = self._failures.get(key, 0) + 1
+                delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+            # Most likely transient: keep the key (still in flight) and try again later
+            timer = threading.Timer(delay, self._retry, (key, topic))
+            timer.daemon = True
+            timer.start()
+            return
+        with self._lock:
+            if key not in self._ready:
+                return  # Evicted while we were generating
+            self._in_flight[key] = max(self._in_flight[key] - 1, 0)
+            self._failures.pop(key, None)
+            if puzzle is None:
+                # Nothing to pool for this topic; stop refilling it until it is popular again
+                self._requests.pop(key, None)
+                if not self._ready[key] and not self._in_flight[key]:
+                    del self._ready[key], self._in_flight[key]
+                return
+            self._ready[key].append(puzzle)
+            self.refilled += 1
+            self._refill_times.append(time.monotonic())
+
+    def _retry(self, key, topic):
+        with self._lock:
+            if self._closed or key not in self._ready:
+                return
+            self._executor.submit(self._refill, key, topic)
+
+    def take(self, topic, num_words, grid_size):
+        """
+        Return a ready puzzle, or None on a miss (the caller should then generate
+        one on demand). Either way the pool is topped up in the background.
+        """
+        key = self._key(topic, num_words, grid_size)
+        with self._lock:
+            self._requests[key] = self._requests.pop(key, 0) + 1
+            if len(self._requests) > 4096:
+                del self._requests[next(iter(self._requests))]  # Forget the stalest combination
+            ready = self._ready.get(key)
+            puzzle = ready.popleft() if ready else None
+            if puzzle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if key in self._ready or self._requests[key] >= self.popular_after:
+                self._track(key)
+                self._schedule(key, topic)
+        return puzzle
+
+    def warm(self, combinations):
+        """
+        Start pooling the given (topic, num_words, grid_size) combinations right away.
+        """
+        with self._lock:
+            for topic, num_words, grid_size in combinations:
+                key = self._key(topic, num_words, grid_size)
+                self._track(key)
+                self._schedule(key, topic)
+
+    def stats(self):
+        """
+        Pool depth per combination, refill rate (puzzles/s over the last
+        rate_window seconds) and miss rate, for sizing the pool.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._refill_times and now - self._refill_times[0] > self.rate_window:
+                self._refill_times.popleft()
+            window = min(self.rate_window, now - self._started) or 1.0
+            takes = self.hits + self.misses
+            return {
+                'depth': {key: len(ready) for key, ready in self._ready.items()},
+                'ready': sum(len(ready) for ready in self._ready.values()),
+                'in_flight': sum(self._in_flight.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'miss_rate': self.misses / takes if takes else 0.0,
+                'refilled': self.refilled,
+                'refill_errors': self.refill_errors,
+                'retrying': len(self._failures),
+                'refill_rate': len(self._refill_times) / window,
+            }
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,235 @@
+import sys
+import array
+import bisect
+import struct
+import string
+import functools
+import threading
+import numpy as np
+
+# Serialized layout: magic, format version, rows, cols, number of words, state version,
+# then the length-prefixed topic, alphabet and words, and the raw letters/placements/bits
+STATE_MAGIC = b'MFPS'
+STATE_FORMAT = 1
+STATE_HEADER = struct.Struct('<4sBHHHI')
+
+# PuzzleState.layout: every word's WORD_ENDS (start_row, start_col, end_row, end_col),
+# then every word's uint32 id in the word table
+WORD_ENDS = struct.Struct('<4H')
+LAYOUT_BYTES_PER_WORD = WORD_ENDS.size + 4
+
+# Puzzles made of A-Z only (the usual case) all share this alphabet string
+BASE_ALPHABET = string.ascii_uppercase
+
+# Process-wide word table: sessions keep integer ids instead of their own word strings.
+# Entries are never freed, since any live state may hold an id, so the table grows
+# with the vocabulary the process has served: about 110 bytes per distinct word on
+# top of the interned string (roughly 17 MB for 100k words). See word_table_size.
+_word_ids = {}
+_words = []
+_word_lock = threading.Lock()
+_alphabets = {}
+
+
+# Function to get the id of a word, adding it to the word table if needed
+def word_id(word):
+    wid = _word_ids.get(word)
+    if wid is None:
+        with _word_lock:
+            wid = _word_ids.get(word)
+            if wid is None:
+                wid = _word_ids[word] = len(_words)
+                _words.append(sys.intern(word))
+    return wid
+
+
+def word_for_id(wid):
+    return _words[wid]
+
+
+def word_table_size():
+    return len(_words)
+
+
+def _shared_alphabet(chars):
+    alphabet = BASE_ALPHABET + ''.join(sorted(set(chars) - set(BASE_ALPHABET)))
+    if len(alphabet) > 256:
+        raise ValueError("A puzzle can use at most 256 distinct letters")
+    return _alphabets.setdefault(alphabet, alphabet)
+
+
+@functools.lru_cache(maxsize=64)
+def _alphabet_table(alphabet):
+    return np.array(list(alphabet), dtype='<U1')
+
+
+def _pack_word_ids(words):
+    return struct.pack(f'<{len(words)}I', *map(word_id, words))
+
+
+def _bits_to_mask(bits, size):
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(packed, count=size, bitorder='little').astype(bool)
+
+
+class PuzzleState:
+    """
+    One player's puzzle and progress, kept small enough to hold thousands of them
+    per process: one byte per grid cell (an index into a shared alphabet), a
+    layout of uint16 word endpoints and ids into the process-wide word table
+    (12 bytes per word) and int bitsets for the found cells and found words. Fixed parts are plain bytes, which carry far less overhead than
+    arrays or tuples. version is bumped on every change so renders can be
+    memoized on it. check() looks selections up in a sorted answer index (8 bytes
+    per word), built on the first check and never serialized.
+    to_bytes/from_bytes move a state between processes (word ids are
+    process-local, so words are written out as text).
+    """
+
+    __slots__ = ('topic', 'rows', 'cols', 'alphabet', 'letters', 'layout',
+                 'found_cells', 'found_words', 'version', '_answers')
+
+    def __init__(self, topic, rows, cols, alphabet, letters, layout,
+                 found_cells=0, found_words=0, version=0):
+        self.topic = topic
+        self.rows = rows
+        self.cols = cols
+        self.alphabet = alphabet
+        self.letters = letters          # bytes, rows * cols alphabet indices
+        self.layout = layout            # bytes, see LAYOUT_BYTES_PER_WORD
+        self.found_cells = found_cells  # bit r * cols + c is set once that cell is found
+        self.found_words = found_words  # bit i is set once the i-th word is found
+        self.version = version
+        self._answers = None            # native uint64 bytes of selection key << 16 | word index, see check()
+
+    @classmethod
+    def from_puzzle(cls, puzzle):
+        """
+        Build a state from a generate_puzzle() result (only placed words are kept).
+        """
+        grid = np.asarray(puzzle['grid'])
+        rows, cols = grid.shape
+        alphabet = _shared_alphabet(np.unique(grid).tolist())
+        # Extra letters all sort after Z, so the alphabet is in code point order
+        codes = np.searchsorted(_alphabet_table(alphabet), grid)
+        placements = puzzle['placements']
+        words = [word for word in puzzle['words'] if word in placements]
+        layout = b''.join(WORD_ENDS.pack(*placements[word][0], *placements[word][1]) for word in words)
+        return cls(puzzle.get('topic', ''), rows, cols, alphabet, codes.astype(np.uint8).tobytes(),
+                   layout + _pack_word_ids(words))
+
+    @property
+    def words(self):
+        count = self.word_count
+        return [_words[wid] for wid in struct.unpack_from(f'<{count}I', self.layout, count * WORD_ENDS.size)]
+
+    @property
+    def word_count(self):
+        return len(self.layout) // LAYOUT_BYTES_PER_WORD
+
+    @property
+    def found_count(self):
+        return bin(self.found_words).count('1')
+
+    @property
+    def all_found(self):
+        return self.found_words == (1 << self.word_count) - 1
+
+    def endpoints(self, index):
+        """
+        (start_row, start_col, end_row, end_col) of the index-th word.
+        """
+        return WORD_ENDS.unpack_from(self.layout, index * WORD_ENDS.size)
+
+    def is_found(self, index):
+        return bool(self.found_words >> index & 1)
+
+    def char_grid(self):
+        codes = np.frombuffer(self.letters, dtype=np.uint8).reshape(self.rows, self.cols)
+        return _alphabet_table(self.alphabet)[codes]
+
+    def found_mask(self):
+        return _bits_to_mask(self.found_cells, self.rows * self.cols).reshape(self.rows, self.cols)
+
+    def _selection_key(self, start_row, start_col, end_row, end_col):
+        # Both endpoints as cell numbers, smaller first, so either end can start a selection
+        first, last = sorted((start_row * self.cols + start_col, end_row * self.cols + end_col))
+        return first * self.rows * self.cols + last
+
+    def check(self, start_row, start_col, end_row, end_col):
+        """
+        Index of the word placed exactly between the two cells (from either end), or None.
+        """
+        if not (0 <= min(start_row, end_row) and max(start_row, end_row) < self.rows and
+                0 <= min(start_col, end_col) and max(start_col, end_col) < self.cols):
+            return None  # Off-grid cells would alias other cells' keys
+        if self._answers is None:
+            self._answers = array.array('Q', sorted(self._selection_key(*self.endpoints(i)) << 16 | i
+                                                    for i in range(self.word_count))).tobytes()
+        answers = memoryview(self._answers).cast('Q')
+        key = self._selection_key(start_row, start_col, end_row, end_col)
+        # Entries sort by key, then word index: the first one at or after key << 16 is the match
+        # (keys fit in 48 bits for grids of up to 16M cells; word indices fit in 16, see STATE_HEADER)
+        i = bisect.bisect_left(answers, key << 16)
+        if i < len(answers) and answers[i] >> 16 == key:
+            return answers[i] & 0xFFFF
+        return None
+
+    def mark_found(self, index):
+        """
+        Mark the index-th word and its cells as found. Returns False if it already was.
+        """
+        if self.is_found(index):
+            return False
+        sr, sc, er, ec = self.endpoints(index)
+        length = max(abs(er - sr), abs(ec - sc))
+        dir_r = (er - sr) // length if length else 0
+        dir_c = (ec - sc) // length if length else 0
+        for i in range(length + 1):
+            self.found_cells |= 1 << ((sr + i * dir_r) * self.cols + sc + i * dir_c)
+        self.found_words |= 1 << index
+        self.version += 1
+        return True
+
+    def reset_progress(self):
+        self.found_cells = self.found_words = 0
+        self.version += 1
+
+    def to_bytes(self):
+        cells_bytes = (self.rows * self.cols + 7) // 8
+        words_bytes = (self.word_count + 7) // 8
+        text = [self.topic.encode('utf-8'), self.alphabet.encode('utf-8'),
+                '\n'.join(self.words).encode('utf-8')]
+        return b''.join([
+            STATE_HEADER.pack(STATE_MAGIC, STATE_FORMAT, self.rows, self.cols, self.word_count, self.version),
+            *(struct.pack('<I', len(part)) + part for part in text),
+            self.letters,
+            self.layout[:self.word_count * WORD_ENDS.size],
+            self.found_cells.to_bytes(cells_bytes, 'little'),
+            self.found_words.to_bytes(words_bytes, 'little'),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        magic, fmt, rows, cols, count, version = STATE_HEADER.unpack_from(data)
+        if magic != STATE_MAGIC or fmt != STATE_FORMAT:
+            raise ValueError("Not a serialized puzzle state")
+        offset = STATE_HEADER.size
+        text = []
+        for _ in range(3):
+            (length,) = struct.unpack_from('<I', data, offset)
+            text.append(bytes(data[offset + 4:offset + 4 + length]).decode('utf-8'))
+            offset += 4 + length
+        topic, alphabet, words = text
+        sizes = [rows * cols, 8 * count, (rows * cols + 7) // 8, (count + 7) // 8]
+        if offset + sum(sizes) != len(data):
+            raise ValueError("Truncated or corrupt puzzle state")
+        parts = []
+        for size in sizes:
+            parts.append(bytes(data[offset:offset + size]))
+            offset += size
+        letters, ends, cells, found = parts
+        layout = ends + _pack_word_ids(words.split('\n') if count else [])
+        return cls(topic, rows, cols, _alphabets.setdefault(alphabet, alphabet), letters, layout,
+                   int.from_bytes(cells, 'little'), int.from_bytes(found, 'little'), version)
+
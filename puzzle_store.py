@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import mmap
+import base64
+import struct
+import hashlib
+import datetime
+import argparse
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+from puzzle_state import PuzzleState
+from topic_cache import normalize_topic
+
+# File layout: STORE_MAGIC, then records appended one after another. Each record is
+# a RECORD_HEADER (content digest, seed, name length, payload length), an optional
+# name (e.g. "daily:2026-10-18") and a PuzzleState.to_bytes() payload.
+STORE_MAGIC = b'MFPZ0001'
+RECORD_HEADER = struct.Struct('<8sQHI')
+
+CODE_LENGTH = 10  # Base32 characters of the digest used as a share code (50 bits)
+
+# Default location of the app's store (can be overridden with MINDFORGE_PUZZLE_STORE)
+DEFAULT_STORE_PATH = os.environ.get(
+    'MINDFORGE_PUZZLE_STORE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'puzzles.mfpz')
+)
+
+
+def puzzle_digest(topic, words, grid_size, seed, target=None):
+    key = [normalize_topic(topic), list(words), int(grid_size), int(seed)]
+    if target is not None:
+        key.append(round(float(target), 4))  # Same seed, different difficulty target: another layout
+    key = json.dumps(key)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+
+
+def digest_code(digest):
+    return base64.b32encode(digest).decode('ascii')[:CODE_LENGTH].lower()
+
+
+# Function to get the short share code of a puzzle
+def puzzle_code(topic, words, grid_size, seed, target=None):
+    """
+    The same topic, word list, grid size and seed (and difficulty target, if
+    any) always give the same code.
+    """
+    return digest_code(puzzle_digest(topic, words, grid_size, seed, target))
+
+
+def share_key(puzzle):
+    """
+    What identifies a generate_puzzle() result in a store: (topic, words, grid_size,
+    seed, target). Small enough to keep per session until the puzzle is shared.
+    """
+    return (puzzle['topic'], tuple(puzzle['words']), puzzle.get('grid_size', len(puzzle['grid'])),
+            puzzle['seed'], puzzle.get('target'))
+
+
+def daily_name(date=None):
+    return f"daily:{(date or datetime.date.today()).isoformat()}"
+
+
+def daily_seed(date):
+    digest = hashlib.blake2b(daily_name(date).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+
+class PuzzleStore:
+    """
+    Append-only, content-addressed puzzle file. Each puzzle is keyed by a digest
+    of (topic, word list, grid size, seed) and can be looked up by its short code
+    (or by an optional name) in O(1): the file is memory-mapped and an in-memory
+    index maps codes and names to record offsets, rebuilt by skipping from one
+    record header to the next when the file is opened. Storing a puzzle that is
+    already there is a no-op, so identical puzzles are kept once.
+
+    Several processes can share a file: records are appended with O_APPEND under
+    an exclusive file lock (where fcntl is available), and a code or name that
+    is not in the index yet triggers a refresh() to pick up their records.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._offsets = {}  # code or name -> offset of the record header
+        self._end = len(STORE_MAGIC)
+        self._records = 0
+        self._mmap = None
+        if not readonly:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                with open(path, 'wb') as f:
+                    f.write(STORE_MAGIC)
+        self._file = open(path, 'rb')
+        self._append_fd = None if readonly else os.open(path, os.O_WRONLY | os.O_APPEND)
+        if self._file.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a puzzle store")
+        self.refresh()
+
+    def refresh(self):
+        """
+        Map the file again and index any records appended since the last call.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        # Caller holds the lock. Whether there is anything new depends on what has been
+        # indexed, not on the map's length: another process can append between the
+        # fstat and the mmap, leaving mapped records that are not indexed yet.
+        size = os.fstat(self._file.fileno()).st_size
+        if self._end + RECORD_HEADER.size > size:
+            return
+        if self._mmap is None or len(self._mmap) < size:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = self._end
+        while offset + RECORD_HEADER.size <= size:
+            digest, _, name_length, payload_length = RECORD_HEADER.unpack_from(self._mmap, offset)
+            end = offset + RECORD_HEADER.size + name_length + payload_length
+            if end > size:
+                break  # A record still being written by another process
+            self._offsets[digest_code(digest)] = offset
+            if name_length:
+                name = self._mmap[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + name_length]
+                self._offsets[name.decode('utf-8')] = offset
+            self._records += 1
+            offset = end
+        self._end = offset
+
+    def _offset(self, key):
+        # Caller holds the lock; a miss may be a record another process has just added
+        offset = self._offsets.get(key)
+        if offset is None:
+            self._refresh()
+            offset = self._offsets.get(key)
+        return offset
+
+    def put(self, puzzle, name=None):
+        """
+        Store a generate_puzzle() result (it must carry its 'seed') and return its code.
+        A name makes the puzzle reachable under that name as well.
+        """
+        return self.put_state(PuzzleState.from_puzzle(puzzle), share_key(puzzle), name)
+
+    def put_state(self, state, key, name=None):
+        """
+        Store the puzzle of a PuzzleState (without its progress) under a share_key()
+        of the puzzle it was built from, and return its code.
+        """
+        if self.readonly:
+            raise ValueError("Puzzle store was opened read-only")
+        topic, words, grid_size, seed, target = key
+        digest = puzzle_digest(topic, words, grid_size, seed, target)
+        code = digest_code(digest)
+        with self._lock:
+            if self._offset(code) is not None and (name is None or self._offset(name) is not None):
+                return code
+            name_bytes = (name or '').encode('utf-8')
+            fresh = PuzzleState(state.topic, state.rows, state.cols, state.alphabet, state.letters, state.layout)
+            payload = fresh.to_bytes()
+            record = RECORD_HEADER.pack(digest, seed, len(name_bytes), len(payload)) + name_bytes + payload
+            if fcntl is not None:
+                fcntl.flock(self._append_fd, fcntl.LOCK_EX)
+            try:
+                # Another process may have stored it while we waited for the lock
+                self._refresh()
+                if code not in self._offsets or (name and name not in self._offsets):
+                    written = 0
+                    while written < len(record):
+                        written += os.write(self._append_fd, record[written:])
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._append_fd, fcntl.LOCK_UN)
+            self._refresh()
+        return code
+
+    def get_record(self, key):
+        """
+        (code, seed, PuzzleState) for a share code or name, or None.
+        """
+        with self._lock:
+            offset = self._offset(key)
+            if offset is None:
+                return None
+            digest, seed, name_length, payload_length = RECORD_HEADER.unpack_from(self._mmap, offset)
+            start = offset + RECORD_HEADER.size + name_length
+            payload = self._mmap[start:start + payload_length]
+        return digest_code(digest), seed, PuzzleState.from_bytes(payload)
+
+    def get(self, key):
+        record = self.get_record(key)
+        return record[2] if record else None
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._offset(key) is not None
+
+    def __len__(self):
+        return self._records
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+            if self._append_fd is not None:
+                os.close(self._append_fd)
+            self._file.close()
+
+
+# Function to precompute a run of daily puzzles into one store file
+def build_daily(store, topics, start, days, num_words, grid_size, generate=None):
+    """
+    Day i gets topics[i % len(topics)] with a seed derived from its date, stored
+    under daily_name(date). Returns the number of days stored.
+    """
+    if generate is None:
+        from backend import generate_puzzle as generate
+    stored = 0
+    for i in range(days):
+        date = start + datetime.timedelta(days=i)
+        puzzle = generate(topics[i % len(topics)], num_words, grid_size, seed=daily_seed(date))
+        if puzzle:
+            store.put(puzzle, name=daily_name(date))
+            stored += 1
+    return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute daily puzzles into a puzzle store.")
+    parser.add_argument('output', help="Store file to create or extend")
+    parser.add_argument('--topics', nargs='*', default=[])
+    parser.add_argument('--topics-file', help="File with one topic per line")
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--num-words', type=int, default=10)
+    parser.add_argument('--grid-size', type=int, default=13)
+    args = parser.parse_args(argv)
+
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, encoding='utf-8') as f:
+            topics.extend(line.strip() for line in f if line.strip())
+    if not topics:
+        parser.error("give at least one topic with --topics or --topics-file")
+
+    store = PuzzleStore(args.output)
+    stored = build_daily(store, topics, args.start, args.days, args.num_words, args.grid_size)
+    store.close()
+    print(f"Stored {stored} of {args.days} daily puzzles in {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
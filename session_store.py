@@ -0,0 +1,155 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+DEFAULT_SESSION_TTL = 24 * 60 * 60  # Idle sessions are dropped after a day
+
+
+class MemorySessionStore:
+    """
+    Sessions of one server process: session id -> serialized state (bytes), least
+    recently used first, bounded by max_sessions and expired after ttl seconds idle.
+    """
+
+    def __init__(self, max_sessions=100000, ttl=DEFAULT_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # session id -> (last used, data)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _live(self, session_id, now):
+        # Caller holds the lock
+        item = self._sessions.get(session_id)
+        if item is None:
+            return None
+        if self.ttl is not None and now - item[0] > self.ttl:
+            del self._sessions[session_id]
+            self.evictions += 1
+            return None
+        return item[1]
+
+    def _store(self, session_id, data, now):
+        # Caller holds the lock
+        self._sessions[session_id] = (now, data)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, session_id):
+        with self._lock:
+            return self._live(session_id, time.time())
+
+    def put(self, session_id, data):
+        with self._lock:
+            self._store(session_id, data, time.time())
+
+    def update(self, session_id, change):
+        """
+        Atomically replace a session's data with change(data). change returns
+        (new data, result); new data None leaves the session as it was. Returns
+        the result, or None for an unknown session.
+        """
+        with self._lock:
+            now = time.time()
+            data = self._live(session_id, now)
+            if data is None:
+                return None
+            new_data, result = change(data)
+            if new_data is not None:
+                self._store(session_id, new_data, now)
+            return result
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file shared by several server processes (or restarts).
+    update() runs inside an immediate transaction, so two processes handling
+    selections for the same session never lose one another's progress.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                used_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_used ON sessions (used_at)")
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cutoff(self):
+        return -1.0 if self.ttl is None else time.time() - self.ttl
+
+    def get(self, session_id):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE id = ? AND used_at >= ?", (session_id, self._cutoff())
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, session_id, data):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (session_id, data, time.time())
+        )
+
+    def update(self, session_id, change):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND used_at >= ?", (session_id, self._cutoff())
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            new_data, result = change(row[0])
+            if new_data is not None:
+                conn.execute("UPDATE sessions SET data = ?, used_at = ? WHERE id = ?",
+                             (new_data, time.time(), session_id))
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def expire(self):
+        """
+        Delete idle sessions; returns how many were removed.
+        """
+        return self._conn().execute("DELETE FROM sessions WHERE used_at < ?", (self._cutoff(),)).rowcount
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+# Function to open a session store from a spec: "memory" or "sqlite:<path>"
+def open_session_store(spec='memory'):
+    if spec == 'memory':
+        return MemorySessionStore()
+    if spec.startswith('sqlite:'):
+        return SQLiteSessionStore(spec[len('sqlite:'):])
+    raise ValueError(f"Unknown session store {spec!r} (use 'memory' or 'sqlite:<path>')")
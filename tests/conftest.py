@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+# The modules live at the top of the repository, next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend  # noqa: E402
+from word_sources import StaticSource  # noqa: E402
+
+TOPICS = {
+    'Volcano': "A volcano is a rupture in the crust of a planet through which magma, ash and "
+               "gases escape from a chamber below the surface during an eruption.",
+    'Photosynthesis': "Photosynthesis lets plants capture sunlight and convert carbon dioxide and "
+                      "water into sugars, releasing oxygen through their leaves.",
+}
+
+
+@pytest.fixture(scope='session')
+def source():
+    """
+    Offline word source for TOPICS.
+    """
+    return StaticSource(TOPICS)
+
+
+@pytest.fixture(scope='session')
+def make_puzzle(source):
+    """
+    make_puzzle(seed) builds the same generate_puzzle() result for the same arguments.
+    """
+    def make(seed, topic='Volcano', num_words=6, grid_size=10):
+        return backend.generate_puzzle(topic, num_words, grid_size, source, seed)
+    return make
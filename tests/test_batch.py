@@ -0,0 +1,82 @@
+import csv
+import json
+import pytest
+from batch import build_jobs, iter_batch, generate_batch, puzzle_seed, main
+
+JOBS = build_jobs(['Volcano', 'Photosynthesis', 'Atlantis'], [4, 6], [9, 11], count=3)
+
+
+def by_index(records):
+    return sorted(records, key=lambda record: record['index'])
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_build_jobs():
+    assert len(JOBS) == 3 * 2 * 2 * 3
+    assert JOBS[:4] == [('Volcano', 4, 9)] * 3 + [('Volcano', 4, 11)]
+
+
+def test_puzzle_seed_depends_on_batch_seed_and_position_only():
+    assert puzzle_seed(1, 5) == puzzle_seed(1, 5)
+    assert len({puzzle_seed(1, i) for i in range(100)} | {puzzle_seed(2, i) for i in range(100)}) == 200
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_worker_count_does_not_change_the_puzzles(source, workers):
+    serial = list(iter_batch(JOBS, seed=7, workers=1, source=source, chunk_size=4))
+    parallel = list(iter_batch(JOBS, seed=7, workers=workers, source=source, chunk_size=4))
+    assert by_index(parallel) == by_index(serial)
+    # Jobs for a topic without words are skipped
+    assert len(serial) == len(JOBS) * 2 // 3
+    assert {record['topic'] for record in serial} == {'Volcano', 'Photosynthesis'}
+
+
+def test_seed_changes_the_puzzles(source):
+    first = by_index(iter_batch(JOBS[:6], seed=1, workers=1, source=source))
+    again = by_index(iter_batch(JOBS[:6], seed=1, workers=1, source=source))
+    other = by_index(iter_batch(JOBS[:6], seed=2, workers=1, source=source))
+    assert first == again
+    assert [record['grid'] for record in first] != [record['grid'] for record in other]
+
+
+def test_records_are_valid_puzzles(source):
+    for record in iter_batch(JOBS, seed=3, workers=1, source=source):
+        assert len(record['grid']) == record['grid_size']
+        assert all(len(row) == record['grid_size'] for row in record['grid'])
+        assert set(record['placements']) == set(record['words'])
+        assert record['seed'] == puzzle_seed(3, record['index'])
+
+
+def test_jsonl_writer(source, tmp_path):
+    path = str(tmp_path / 'pack.jsonl')
+    summary = generate_batch(JOBS, path, 'jsonl', seed=5, workers=2, source=source, chunk_size=4)
+    records = read_jsonl(path)
+    assert summary['puzzles'] == len(records) == 24 and summary['skipped'] == 12
+    expected = json.loads(json.dumps(by_index(iter_batch(JOBS, seed=5, workers=1, source=source))))
+    assert by_index(records) == expected
+
+
+def test_csv_writer(source, tmp_path):
+    path = str(tmp_path / 'pack.csv')
+    summary = generate_batch(JOBS, path, 'csv', seed=5, workers=1, source=source)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert summary['puzzles'] == len(rows) == 24
+    for row, record in zip(rows, by_index(iter_batch(JOBS, seed=5, workers=1, source=source))):
+        assert int(row['index']) == record['index'] and int(row['seed']) == record['seed']
+        assert (row['topic'], int(row['num_words']), int(row['grid_size'])) == \
+               (record['topic'], record['num_words'], record['grid_size'])
+        assert row['words'].split() == record['words']
+        assert row['words_not_placed'].split() == record['words_not_placed']
+        assert row['grid'].split('/') == record['grid']
+        assert json.loads(row['placements']) == json.loads(json.dumps(record['placements']))
+
+
+def test_cli_requires_topics(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(['-o', str(tmp_path / 'pack.jsonl')])
+    assert 'at least one topic' in capsys.readouterr().err
@@ -0,0 +1,62 @@
+import random
+import numpy as np
+import pytest
+import difficulty
+from difficulty import (generate_layout, difficulty_target, difficulty_label, layout_features,
+                        difficulty_scores, DIFFICULTY_TARGETS)
+from backend import create_word_search
+
+WORDS = ['VOLCANO', 'MAGMA', 'CRATER', 'LAVA', 'ASH', 'ERUPTION', 'BASALT', 'VENT']
+
+
+def same_layout(first, second):
+    return (np.array_equal(first.grid, second.grid) and first.placements == second.placements and
+            first.score == second.score and first.candidates == second.candidates)
+
+
+def test_targets_and_labels():
+    assert difficulty_target('Hard') == DIFFICULTY_TARGETS['Hard']
+    assert difficulty_target(1.5) == 1.0 and difficulty_target(-2) == 0.0
+    with pytest.raises(ValueError):
+        difficulty_target('Impossible')
+    assert difficulty_label(0.65) == 'Hard' and difficulty_label(0.1) == 'Beginner'
+
+
+def test_every_candidate_is_scored_within_the_budget():
+    layout = generate_layout(WORDS, 12, 'Intermediate', random.Random(1), candidates=8, budget=30, workers=1)
+    assert layout.candidates == 8
+    features = layout_features(layout.grid[None], WORDS, [layout.placements])
+    assert layout.score == pytest.approx(float(difficulty_scores(features)[0]))
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_zero_budget_still_builds_one_layout(workers):
+    layout = generate_layout(WORDS, 12, 'Hard', random.Random(2), candidates=8, budget=0, workers=workers)
+    assert layout.candidates == 1 and layout.placements
+
+
+def test_same_seed_gives_the_same_layout_with_or_without_workers():
+    inline = generate_layout(WORDS, 12, 'Hard', random.Random(3), candidates=12, budget=60, workers=1)
+    pooled = generate_layout(WORDS, 12, 'Hard', random.Random(3), candidates=12, budget=60, workers=3)
+    assert same_layout(inline, pooled) and pooled.candidates == 12
+    assert same_layout(pooled, generate_layout(WORDS, 12, 'Hard', random.Random(3), candidates=12,
+                                               budget=60, workers=3))
+
+
+def test_workers_are_shared_between_calls():
+    generate_layout(WORDS, 12, 'Beginner', random.Random(4), candidates=4, budget=60, workers=2)
+    pool = difficulty._pool
+    assert pool is not None
+    generate_layout(WORDS, 12, 'Beginner', random.Random(5), candidates=4, budget=60, workers=2)
+    assert difficulty._pool is pool
+
+
+def test_targets_order_the_scores():
+    scores = {label: np.mean([generate_layout(WORDS, 12, label, random.Random(seed), candidates=16, budget=60,
+                                              workers=1).score for seed in range(5)])
+              for label in DIFFICULTY_TARGETS}
+    assert scores['Beginner'] < scores['Intermediate'] < scores['Hard']
+    plain = np.mean([difficulty_scores(layout_features(grid[None], WORDS, [placements]))[0]
+                     for grid, _, placements in (create_word_search(WORDS, 12, rng=random.Random(seed))
+                                                 for seed in range(5))])
+    assert scores['Beginner'] < plain < scores['Hard']
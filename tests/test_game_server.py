@@ -0,0 +1,186 @@
+import json
+import http.client
+import pytest
+from puzzle_state import PuzzleState
+from game_server import GameService, GameError, start_server, MAX_SEED
+from puzzle_store import PuzzleStore
+from session_store import open_session_store
+
+
+@pytest.fixture
+def service(tmp_path, source):
+    return GameService(open_session_store('memory'), source, PuzzleStore(str(tmp_path / 'puzzles.mfpz')))
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory, source):
+    path = str(tmp_path_factory.mktemp('server') / 'puzzles.mfpz')
+    server = start_server(GameService(open_session_store('memory'), source, PuzzleStore(path)))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None, raw=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        data = raw if raw is not None else (None if body is None else json.dumps(body))
+        connection.request(method, path, data, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_new_game_and_check(service):
+    game = service.new_game('Volcano', 5, 10, seed=4)
+    assert game['topic'] == 'Volcano' and game['code'] is None and len(game['grid']) == 10
+    result = service.check(game['game_id'], [0, 0], [0, 0])
+    assert result['correct'] is False and result['remaining'] == len(game['words'])
+
+
+def test_only_shared_games_are_stored(service):
+    games = [service.new_game('Volcano', 5, 10, seed=seed) for seed in range(3)]
+    assert len(service.puzzles) == 0
+    code = service.share(games[0]['game_id'])['code']
+    assert len(service.puzzles) == 1
+    assert service.share(games[0]['game_id'])['code'] == code
+    again = service.new_game(code=code)
+    assert again['grid'] == games[0]['grid'] and again['code'] == code and again['game_id'] != games[0]['game_id']
+    # Sharing a game opened from a code gives the same code without storing anything
+    assert service.share(again['game_id'])['code'] == code and len(service.puzzles) == 1
+    # The same puzzle generated again shares under the same code
+    twin = service.new_game('Volcano', 5, 10, seed=0)
+    assert service.share(twin['game_id'])['code'] == code and len(service.puzzles) == 1
+
+
+def test_shared_puzzle_has_no_progress(service):
+    game = service.new_game('Volcano', 5, 10, seed=2)
+    state = PuzzleState.from_bytes(service.sessions.get(game['game_id']))
+    start_row, start_col, end_row, end_col = state.endpoints(0)
+    service.check(game['game_id'], [start_row, start_col], [end_row, end_col])
+    again = service.new_game(code=service.share(game['game_id'])['code'])
+    assert again['found'] == [] and service.state(game['game_id'])['found'] == [0]
+
+
+def test_share_errors(service, source):
+    with pytest.raises(GameError) as error:
+        service.share('missing')
+    assert error.value.status == 404
+    unshared = GameService(open_session_store('memory'), source)
+    game = unshared.new_game('Volcano', 5, 10, seed=1)
+    with pytest.raises(GameError) as error:
+        unshared.share(game['game_id'])
+    assert error.value.status == 404
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'topic': ''},
+    {'topic': 42},
+    {'topic': ['Volcano']},
+    {'topic': 'Volcano', 'num_words': 0},
+    {'topic': 'Volcano', 'num_words': 501},
+    {'topic': 'Volcano', 'num_words': 'ten'},
+    {'topic': 'Volcano', 'num_words': 2.5},
+    {'topic': 'Volcano', 'num_words': True},
+    {'topic': 'Volcano', 'num_words': None},
+    {'topic': 'Volcano', 'grid_size': 4},
+    {'topic': 'Volcano', 'grid_size': 101},
+    {'topic': 'Volcano', 'grid_size': [13]},
+    {'topic': 'Volcano', 'seed': -1},
+    {'topic': 'Volcano', 'seed': MAX_SEED + 1},
+    {'topic': 'Volcano', 'seed': '1e3'},
+    {'topic': 'Volcano', 'seed': {'value': 1}},
+    {'topic': 'Volcano', 'difficulty': 'Impossible'},
+    {'topic': 'Volcano', 'difficulty': ['Hard']},
+])
+def test_new_game_rejects_bad_parameters(service, params):
+    with pytest.raises(GameError) as error:
+        service.new_game(**params)
+    assert error.value.status == 400
+
+
+def test_new_game_accepts_numeric_strings_and_edge_values(service):
+    game = service.new_game('Volcano', '5', '10', seed=str(MAX_SEED))
+    assert len(game['grid']) == 10
+    assert service.new_game('Volcano', 1, 5, seed=0)['rows'] == 5
+
+
+def test_unknown_codes_and_games(service):
+    for code in ('nosuchcode', 12345, ['abc']):
+        with pytest.raises(GameError) as error:
+            service.new_game(code=code)
+        assert error.value.status == 404
+    with pytest.raises(GameError) as error:
+        service.state('missing')
+    assert error.value.status == 404
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, [0, 0]),
+    ([0], [0, 0]),
+    ([0, 0, 0], [0, 0]),
+    (['a', 0], [0, 0]),
+    ([[0], 0], [0, 0]),
+    ([0, 0], 7),
+    ([0.0, 0], [0, 1]),
+    ([0, 0], [0, 1.9]),
+    ([True, 0], [0, 1]),
+    (['0', '0'], [0, 1]),
+])
+def test_check_rejects_bad_selections(service, start, end):
+    game = service.new_game('Volcano', 5, 10, seed=1)
+    with pytest.raises(GameError) as error:
+        service.check(game['game_id'], start, end)
+    assert error.value.status == 400
+
+
+def test_http_game_round_trip(server):
+    status, game = request(server, 'POST', '/games', {'topic': 'Volcano', 'num_words': 5, 'grid_size': 10})
+    assert status == 201
+    status, state = request(server, 'GET', f"/games/{game['game_id']}")
+    assert status == 200 and state['grid'] == game['grid']
+    status, result = request(server, 'POST', f"/games/{game['game_id']}/check", {'start': [0, 0], 'end': [2, 1]})
+    assert status == 200 and result['error'] == 'not_straight'
+    status, result = request(server, 'POST', f"/games/{game['game_id']}/check", {'start': [0, 0], 'end': [0, 99]})
+    assert status == 200 and result['error'] == 'out_of_bounds'
+    status, shared = request(server, 'POST', f"/games/{game['game_id']}/share")
+    assert status == 200 and shared['code']
+    status, again = request(server, 'POST', '/games', {'code': shared['code']})
+    assert status == 201 and again['grid'] == game['grid']
+
+
+@pytest.mark.parametrize('body, raw', [
+    (None, 'not json'),
+    (None, '[1, 2]'),
+    ({'num_words': 5}, None),
+    ({'topic': 'Volcano', 'num_words': 'lots'}, None),
+    ({'topic': 'Volcano', 'grid_size': 1000}, None),
+    ({'topic': 'Volcano', 'seed': 2 ** 64}, None),
+    ({'topic': 'Volcano', 'seed': 1.5}, None),
+])
+def test_http_new_game_bad_requests(server, body, raw):
+    status, payload = request(server, 'POST', '/games', body, raw)
+    assert status == 400
+    assert payload['error']
+
+
+def test_http_check_bad_requests(server):
+    _, game = request(server, 'POST', '/games', {'topic': 'Volcano', 'num_words': 5, 'grid_size': 10})
+    path = f"/games/{game['game_id']}/check"
+    assert request(server, 'POST', path, raw='{')[0] == 400
+    assert request(server, 'POST', path, {'start': 'top', 'end': [0, 0]})[0] == 400
+    assert request(server, 'POST', path, {'end': [0, 0]})[0] == 400
+    assert request(server, 'POST', path, {'start': [0, 0.5], 'end': [0, 1]})[0] == 400
+
+
+def test_http_not_found_and_too_large(server):
+    assert request(server, 'GET', '/games/missing')[0] == 404
+    assert request(server, 'POST', '/games/missing/check', {'start': [0, 0], 'end': [0, 1]})[0] == 404
+    assert request(server, 'POST', '/games/missing/share')[0] == 404
+    assert request(server, 'GET', '/games/missing/share')[0] == 404
+    assert request(server, 'GET', '/elsewhere')[0] == 404
+    assert request(server, 'POST', '/games', {'code': 'nosuchcode'})[0] == 404
+    status, _ = request(server, 'POST', '/games', raw=json.dumps({'topic': 'x' * 70000}))
+    assert status == 413
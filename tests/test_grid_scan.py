@@ -0,0 +1,106 @@
+import random
+import numpy as np
+import pytest
+from grid_scan import WordScanner, find_occurrences, clean_fill
+from placement import DIRECTIONS, place_words, fill_empty, to_char_grid
+
+
+def brute_force(grid, words):
+    # Every (word, start, end) found by walking all 8 directions from every cell
+    rows, cols = grid.shape
+    found = set()
+    for word in set(words):
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in DIRECTIONS:
+                    end = (r + dr * (len(word) - 1), c + dc * (len(word) - 1))
+                    if not (0 <= end[0] < rows and 0 <= end[1] < cols):
+                        continue
+                    if all(grid[r + i * dr, c + i * dc] == ch for i, ch in enumerate(word)):
+                        found.add(canonical(word, (r, c), end))
+    return found
+
+
+def canonical(word, start, end):
+    # A palindrome reads the same from both ends (and a single letter in every direction)
+    if word == word[::-1]:
+        start, end = sorted((start, end))
+    return word, start, end
+
+
+def random_grid(rng, rows, cols, alphabet):
+    return np.array([[rng.choice(alphabet) for _ in range(cols)] for _ in range(rows)])
+
+
+def random_words(rng, alphabet, count, longest):
+    words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, longest))) for _ in range(count)]
+    # Palindromes, and the reverse of another word
+    words += ['ABA', 'ABBA', 'A', 'BAB', words[0][::-1]]
+    return words
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 9), rng.randint(1, 9)
+    alphabet = 'ABC' if seed % 2 else 'ABCDE'
+    grid = random_grid(rng, rows, cols, alphabet)
+    # Some words are longer than either side of the grid
+    words = random_words(rng, alphabet, 12, max(rows, cols) + 2)
+    occurrences = find_occurrences(grid, words)
+    found = [canonical(*occurrence) for occurrence in occurrences]
+    assert len(found) == len(set(found))
+    assert set(found) == brute_force(grid, words)
+
+
+@pytest.mark.parametrize('direction', DIRECTIONS)
+def test_each_direction_reports_start_and_end(direction):
+    grid = np.full((7, 7), 'X')
+    start = (3 - 2 * direction[0], 3 - 2 * direction[1])
+    for i, ch in enumerate('WORD'):
+        grid[start[0] + i * direction[0], start[1] + i * direction[1]] = ch
+    end = (start[0] + 3 * direction[0], start[1] + 3 * direction[1])
+    assert find_occurrences(grid, ['WORD']) == [('WORD', start, end)]
+
+
+def test_palindromes_are_reported_once():
+    grid = np.array([list('XLEVELX'), list('XXXXXXX')])
+    assert find_occurrences(grid, ['LEVEL']) == [('LEVEL', (0, 1), (0, 5))]
+    assert sorted(find_occurrences(grid, ['X'])) == [('X', (0, 0), (0, 0)), ('X', (0, 6), (0, 6))] + \
+        [('X', (1, c), (1, c)) for c in range(7)]
+
+
+def test_words_longer_than_the_grid_are_never_found():
+    grid = np.array([list('ABC'), list('DEF'), list('GHI')])
+    assert find_occurrences(grid, ['ABCD', 'ADGA', 'AEIAE', 'ABCDEFGHI']) == []
+    # Lines never run into each other through the separators
+    assert find_occurrences(grid, ['CD', 'GB', 'IA']) == []
+
+
+def test_words_and_their_reverses_are_both_found():
+    grid = np.array([list('STOP')])
+    assert sorted(find_occurrences(grid, ['STOP', 'POTS', 'STOP'])) == \
+        [('POTS', (0, 3), (0, 0)), ('STOP', (0, 0), (0, 3))]
+
+
+def test_code_point_grids_and_shared_scanner():
+    rng = random.Random(5)
+    grid = random_grid(rng, 6, 8, 'AB')
+    words = ['AB', 'BBA', 'AAA']
+    scanner = WordScanner(words)
+    codes = grid.view('<u4').copy()
+    assert find_occurrences(codes, words, scanner) == find_occurrences(grid, words)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_clean_fill_leaves_only_placed_words(seed):
+    rng = random.Random(seed)
+    words = ['CAT', 'ACT', 'TAC', 'TACT', 'ATTACK']
+    result = place_words(words, 8, rng)
+    protected = result.grid != 0
+    grid = fill_empty(result.grid, rng, alphabet='ACKT')
+    leftover = clean_fill(grid, result.placements, protected, blocked_words=['KAT'], rng=rng, alphabet='ACKT')
+    occurrences = {canonical(*occurrence) for occurrence in find_occurrences(grid, words + ['KAT'])}
+    placed = {canonical(word, start, end) for word, (start, end) in result.placements.items()}
+    assert occurrences - placed == {canonical(*occurrence) for occurrence in leftover}
+    assert set(to_char_grid(grid).flat) <= set('ACKT')
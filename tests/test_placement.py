@@ -0,0 +1,117 @@
+import random
+import numpy as np
+import pytest
+from placement import (DIRECTIONS, place_words, place_words_dense, feasible_slots, slot_table,
+                       encode_word, to_char_grid)
+from backend import create_word_search
+
+WORDS = ['PYTHON', 'NUMPY', 'GRID', 'SEARCH', 'PUZZLE', 'LETTER', 'WORD', 'STREAMLIT']
+# Words hidden inside one another: a slot made of letters already placed must not be used
+NESTED = ['LEVEL', 'LEVELS', 'RADAR', 'BORDER', 'BORDERS', 'REDROB']
+
+
+def read_placement(grid, start, end):
+    # The letters on the straight line from start to end, checking the direction is one of DIRECTIONS
+    length = max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1
+    step = (int(np.sign(end[0] - start[0])), int(np.sign(end[1] - start[1])))
+    assert step in DIRECTIONS
+    assert (end[0] - start[0], end[1] - start[1]) == (step[0] * (length - 1), step[1] * (length - 1))
+    return ''.join(grid[start[0] + i * step[0]][start[1] + i * step[1]] for i in range(length))
+
+
+def assert_valid(result, words, grid_size):
+    grid = to_char_grid(result.grid.copy())
+    assert grid.shape == (grid_size, grid_size)
+    assert not set(result.placements) & set(result.words_not_placed)
+    assert set(result.placements) | set(result.words_not_placed) == set(words)
+    for word, (start, end) in result.placements.items():
+        assert read_placement(grid, start, end) == word
+    # No two words share both endpoints (one would just be hidden in the other)
+    endpoints = [frozenset(ends) for ends in result.placements.values()]
+    assert len(set(endpoints)) == len(endpoints)
+    # Every letter on the board belongs to some placed word
+    covered = np.zeros((grid_size, grid_size), dtype=bool)
+    for start, end in result.placements.values():
+        length = max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1
+        step = np.sign(np.subtract(end, start))
+        for i in range(length):
+            covered[start[0] + i * step[0], start[1] + i * step[1]] = True
+    assert np.array_equal(covered, result.grid != 0)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_place_words_invariants(seed):
+    result = place_words(WORDS, 12, random.Random(seed))
+    assert_valid(result, WORDS, 12)
+    assert result.words_not_placed == []
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_nested_words_get_their_own_endpoints(seed):
+    result = place_words(NESTED, 7, random.Random(seed))
+    assert_valid(result, NESTED, 7)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_place_words_dense_invariants(seed):
+    words = NESTED + WORDS + [f"{word}S" for word in WORDS]
+    result = place_words_dense(words, 10, random.Random(seed))
+    assert_valid(result, words, 10)
+
+
+def test_words_longer_than_the_board_are_not_placed():
+    result = place_words(['ABCDEFGH', 'ABC'], 5, random.Random(1))
+    assert result.words_not_placed == ['ABCDEFGH']
+    assert_valid(result, ['ABCDEFGH', 'ABC'], 5)
+
+
+def test_overfull_board_falls_back_and_reports_leftovers():
+    words = [f"{a}{b}{c}" for a in 'ABCD' for b in 'EFGH' for c in 'IJKL']
+    result = place_words(words, 5, random.Random(3), max_steps=200)
+    assert result.words_not_placed
+    assert_valid(result, words, 5)
+
+
+def test_same_seed_gives_same_placement():
+    first = place_words(WORDS, 12, random.Random(7))
+    second = place_words(WORDS, 12, random.Random(7))
+    assert first.placements == second.placements
+    assert np.array_equal(first.grid, second.grid)
+    first = place_words_dense(WORDS, 12, random.Random(7))
+    second = place_words_dense(WORDS, 12, random.Random(7))
+    assert first.placements == second.placements
+
+
+def test_zero_weight_directions_are_never_used():
+    # Only left to right and top to bottom
+    weights = [1 if step in ((1, 0), (0, 1)) else 0 for step in DIRECTIONS]
+    for place in (place_words, place_words_dense):
+        for seed in range(10):
+            result = place(WORDS, 12, random.Random(seed), direction_weights=weights)
+            for start, end in result.placements.values():
+                assert end[0] >= start[0] and end[1] >= start[1]
+                assert start[0] == end[0] or start[1] == end[1]
+
+
+def test_feasible_slots_rejects_slots_already_spelled_out():
+    grid = np.zeros(25, dtype=np.uint32)
+    cells = slot_table(5, 3)
+    codes = encode_word('CAT')
+    grid[cells[0]] = codes
+    feasible = feasible_slots(grid, cells, codes)
+    assert 0 not in feasible
+    assert len(feasible) > 0
+    for slot in cells[feasible]:
+        current = grid[slot]
+        assert np.all((current == 0) | (current == codes)) and np.any(current == 0)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_create_word_search_fills_the_board(seed):
+    grid, not_placed, placements = create_word_search(WORDS, 12, rng=random.Random(seed))
+    assert not_placed == []
+    assert all(letter.isalpha() for letter in grid.flat)
+    for word, (start, end) in placements.items():
+        assert read_placement(grid, start, end) == word
+    again = create_word_search(WORDS, 12, rng=random.Random(seed))
+    assert np.array_equal(grid, again[0])
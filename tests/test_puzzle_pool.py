@@ -0,0 +1,116 @@
+import time
+import threading
+import pytest
+from puzzle_pool import PuzzlePool
+
+
+class Generator:
+    # Stand-in for generate_puzzle: counts calls and fails or returns None on demand
+    def __init__(self, failures=0, empty=()):
+        self.failures = failures
+        self.empty = set(empty)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, topic, num_words, grid_size):
+        with self._lock:
+            self.calls.append(topic)
+            if self.failures:
+                self.failures -= 1
+                raise OSError("Wikipedia is unreachable")
+        if topic in self.empty:
+            return None
+        return {'topic': topic, 'num_words': num_words, 'grid_size': grid_size}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the pool")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(generate, **options):
+        pool = PuzzlePool(generate, **options)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def test_warm_fills_and_take_refills(make_pool):
+    generate = Generator()
+    pool = make_pool(generate, depth=3)
+    pool.warm([('Volcano', 8, 13)])
+    wait_for(lambda: pool.stats()['ready'] == 3)
+    assert pool.take(' VOLCANO ', 8, 13) == {'topic': 'Volcano', 'num_words': 8, 'grid_size': 13}
+    wait_for(lambda: pool.stats()['ready'] == 3)
+    stats = pool.stats()
+    assert (stats['hits'], stats['misses'], stats['refilled']) == (1, 0, 4)
+    assert len(generate.calls) == 4
+
+
+def test_combinations_are_pooled_once_popular(make_pool):
+    generate = Generator()
+    pool = make_pool(generate, depth=2, popular_after=2)
+    assert pool.take('Volcano', 8, 13) is None
+    time.sleep(0.05)
+    assert generate.calls == [] and pool.stats()['depth'] == {}
+    assert pool.take('Volcano', 8, 13) is None
+    wait_for(lambda: pool.stats()['ready'] == 2)
+    assert pool.take('Volcano', 8, 13) is not None
+    assert pool.stats()['miss_rate'] == pytest.approx(2 / 3)
+
+
+def test_failed_refills_are_retried_with_backoff(make_pool):
+    generate = Generator(failures=3)
+    pool = make_pool(generate, depth=1, retry_delay=0.01)
+    pool.warm([('Volcano', 8, 13)])
+    wait_for(lambda: pool.stats()['ready'] == 1)
+    stats = pool.stats()
+    assert stats['refill_errors'] == 3 and stats['retrying'] == 0
+    assert len(generate.calls) == 4
+
+
+def test_retries_back_off_and_stop_on_shutdown(make_pool):
+    generate = Generator(failures=100)
+    pool = make_pool(generate, depth=1, retry_delay=0.02, max_retry_delay=0.04)
+    pool.warm([('Volcano', 8, 13)])
+    wait_for(lambda: pool.stats()['refill_errors'] >= 3)
+    stats = pool.stats()
+    assert stats['retrying'] == 1 and stats['in_flight'] == 1 and stats['ready'] == 0
+    pool.shutdown(wait=True)
+    calls = len(generate.calls)
+    time.sleep(0.15)
+    assert len(generate.calls) == calls
+
+
+def test_topics_without_words_are_dropped_until_popular_again(make_pool):
+    generate = Generator(empty={'Atlantis'})
+    pool = make_pool(generate, depth=2, popular_after=2)
+    pool.take('Atlantis', 8, 13)
+    pool.take('Atlantis', 8, 13)
+    wait_for(lambda: pool.stats()['depth'] == {} and pool.stats()['in_flight'] == 0)
+    calls = len(generate.calls)
+    # The next request starts counting from scratch instead of scheduling right away
+    assert pool.take('Atlantis', 8, 13) is None
+    time.sleep(0.05)
+    assert len(generate.calls) == calls
+    pool.take('Atlantis', 8, 13)
+    wait_for(lambda: len(generate.calls) > calls)
+
+
+def test_least_recently_requested_combinations_are_evicted(make_pool):
+    pool = make_pool(Generator(), depth=1, max_keys=2)
+    pool.warm([('Alpha', 8, 13), ('Bravo', 8, 13)])
+    pool.take('Alpha', 8, 13)
+    pool.warm([('Charlie', 8, 13)])
+    wait_for(lambda: pool.stats()['in_flight'] == 0)
+    assert set(pool.stats()['depth']) == {('alpha', 8, 13), ('charlie', 8, 13)}
@@ -0,0 +1,109 @@
+import random
+import pytest
+from backend import create_word_search
+from puzzle_state import PuzzleState
+
+WORDS = ['PYTHON', 'NUMPY', 'GRID', 'SEARCH', 'PUZZLE', 'LETTER', 'WORD']
+
+
+def word_search_puzzle(seed=1, grid_size=11, words=WORDS):
+    grid, _, placements = create_word_search(words, grid_size, rng=random.Random(seed))
+    return {'topic': 'Testing', 'grid': grid, 'words': list(words), 'placements': placements}
+
+
+@pytest.fixture
+def puzzle():
+    return word_search_puzzle()
+
+
+def test_from_puzzle_keeps_grid_and_words(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    assert (state.rows, state.cols) == (11, 11)
+    assert (state.char_grid() == puzzle['grid']).all()
+    assert state.words == [word for word in WORDS if word in puzzle['placements']]
+    assert state.word_count == len(state.words)
+    for index, word in enumerate(state.words):
+        (sr, sc), (er, ec) = puzzle['placements'][word]
+        assert state.endpoints(index) == (sr, sc, er, ec)
+    assert state.found_count == 0 and not state.all_found
+
+
+def test_check_finds_every_word_from_either_end(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    for index, word in enumerate(state.words):
+        (sr, sc), (er, ec) = puzzle['placements'][word]
+        assert state.check(sr, sc, er, ec) == index
+        assert state.check(er, ec, sr, sc) == index
+
+
+def test_check_misses(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    placed = {frozenset(ends) for ends in puzzle['placements'].values()}
+    for sr, sc, er, ec in [(0, 0, 0, 0), (0, 0, 10, 10), (10, 0, 0, 10), (5, 0, 5, 10)]:
+        if frozenset([(sr, sc), (er, ec)]) not in placed:
+            assert state.check(sr, sc, er, ec) is None
+    # Off-grid cells must not alias real ones (column -1 of a row would be the end of the row above)
+    (sr, sc), (er, ec) = puzzle['placements'][state.words[0]]
+    for sr2, sc2, er2, ec2 in [(sr - 11, sc, er, ec), (sr, sc + 11, er, ec), (sr, sc, er + 11, ec),
+                               (-1, 0, 0, 0), (0, 0, 11, 11), (0, -1, 0, 5)]:
+        assert state.check(sr2, sc2, er2, ec2) is None
+
+
+def test_mark_found_tracks_words_cells_and_version(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    word = state.words[0]
+    (sr, sc), (er, ec) = puzzle['placements'][word]
+    assert state.mark_found(0)
+    assert not state.mark_found(0)
+    assert state.is_found(0) and state.found_count == 1 and state.version == 1
+    mask = state.found_mask()
+    assert mask.sum() == len(word)
+    assert mask[sr, sc] and mask[er, ec]
+
+    for index in range(1, len(state.words)):
+        state.mark_found(index)
+    assert state.all_found
+    state.reset_progress()
+    assert state.found_count == 0 and not state.found_mask().any()
+    assert state.version == len(state.words) + 1
+
+
+def test_bytes_round_trip(puzzle):
+    state = PuzzleState.from_puzzle(puzzle)
+    state.mark_found(1)
+    state.mark_found(3)
+    copy = PuzzleState.from_bytes(state.to_bytes())
+    assert (copy.topic, copy.rows, copy.cols, copy.alphabet) == (state.topic, state.rows, state.cols, state.alphabet)
+    assert copy.letters == state.letters
+    assert copy.words == state.words
+    assert copy.layout == state.layout
+    assert (copy.found_cells, copy.found_words, copy.version) == (state.found_cells, state.found_words, 2)
+    assert copy.to_bytes() == state.to_bytes()
+    (sr, sc), (er, ec) = puzzle['placements'][state.words[2]]
+    assert copy.check(er, ec, sr, sc) == 2
+
+
+def test_bytes_round_trip_of_unusual_puzzles():
+    # Non-Latin letters, a non-square grid, no words at all
+    grid = [['Ä', 'B', 'Ж'], ['C', 'D', 'E']]
+    state = PuzzleState.from_puzzle({'topic': 'Ünïcode', 'grid': grid, 'words': ['ÄB', 'MISSING'],
+                                     'placements': {'ÄB': ((0, 0), (0, 1))}})
+    copy = PuzzleState.from_bytes(state.to_bytes())
+    assert copy.topic == 'Ünïcode' and copy.words == ['ÄB']
+    assert copy.char_grid().tolist() == grid
+    assert copy.check(0, 1, 0, 0) == 0
+
+    empty = PuzzleState.from_puzzle({'grid': grid, 'words': [], 'placements': {}})
+    copy = PuzzleState.from_bytes(empty.to_bytes())
+    assert copy.words == [] and copy.all_found
+    assert copy.check(0, 0, 0, 1) is None
+
+
+def test_from_bytes_rejects_bad_data(puzzle):
+    data = PuzzleState.from_puzzle(puzzle).to_bytes()
+    with pytest.raises(ValueError):
+        PuzzleState.from_bytes(b'X' + data[1:])
+    with pytest.raises(ValueError):
+        PuzzleState.from_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        PuzzleState.from_bytes(data + b'\0')
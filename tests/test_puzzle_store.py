@@ -0,0 +1,120 @@
+import os
+import multiprocessing
+import pytest
+import puzzle_store
+from puzzle_store import PuzzleStore, puzzle_code, share_key, daily_name
+from puzzle_state import PuzzleState
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'puzzles.mfpz')
+
+
+def test_put_then_get(path, make_puzzle):
+    store = PuzzleStore(path)
+    puzzle = make_puzzle(1)
+    code = store.put(puzzle)
+    assert code == puzzle_code('volcano', puzzle['words'], 10, 1)
+    assert code in store and len(store) == 1
+    state = store.get(code)
+    assert (state.char_grid() == puzzle['grid']).all()
+    assert state.words == puzzle['words']
+    assert store.get_record(code)[:2] == (code, 1)
+    assert store.get('nosuchcode') is None and 'nosuchcode' not in store
+
+
+def test_put_is_idempotent_and_drops_progress(path, make_puzzle):
+    store = PuzzleStore(path)
+    puzzle = make_puzzle(2)
+    state = PuzzleState.from_puzzle(puzzle)
+    state.mark_found(0)
+    code = store.put_state(state, share_key(puzzle))
+    size = os.path.getsize(path)
+    assert store.put(puzzle) == code
+    assert os.path.getsize(path) == size and len(store) == 1
+    stored = store.get(code)
+    assert stored.found_count == 0 and stored.version == 0
+
+
+def test_names_point_at_puzzles(path, make_puzzle):
+    store = PuzzleStore(path)
+    puzzle = make_puzzle(3)
+    code = store.put(puzzle)
+    # Naming an already stored puzzle appends one more record carrying the name
+    assert store.put(puzzle, name=daily_name()) == code
+    assert store.get(daily_name()).words == puzzle['words']
+    assert store.get_record(daily_name())[0] == code
+
+
+def test_records_survive_reopening(path, make_puzzle):
+    store = PuzzleStore(path)
+    codes = [store.put(make_puzzle(seed)) for seed in range(5)]
+    store.close()
+    reopened = PuzzleStore(path, readonly=True)
+    assert len(reopened) == 5
+    assert all(code in reopened for code in codes)
+    with pytest.raises(ValueError):
+        reopened.put(make_puzzle(9))
+
+
+def test_other_instances_see_new_records(path, make_puzzle):
+    writer = PuzzleStore(path)
+    reader = PuzzleStore(path, readonly=True)
+    first = writer.put(make_puzzle(1))
+    assert len(reader) == 0
+    reader.refresh()
+    assert len(reader) == 1
+    # A code that is not in the index yet is looked up again before giving up
+    second = writer.put(make_puzzle(2))
+    assert reader.get(second) is not None
+    assert first in reader and len(reader) == 2
+
+
+def test_records_mapped_before_they_were_indexed_are_picked_up(path, make_puzzle, monkeypatch):
+    writer = PuzzleStore(path)
+    reader = PuzzleStore(path, readonly=True)
+    first = writer.put(make_puzzle(1))
+    size = os.path.getsize(path)
+    second = writer.put(make_puzzle(2))
+    # The second record lands between the reader's fstat and its mmap
+    real_fstat = os.fstat
+    monkeypatch.setattr(puzzle_store.os, 'fstat', lambda fd: type('Stat', (), {'st_size': size}))
+    reader.refresh()
+    monkeypatch.setattr(puzzle_store.os, 'fstat', real_fstat)
+    assert first in reader and len(reader) == 1
+    reader.refresh()
+    assert len(reader) == 2 and reader.get(second).words == make_puzzle(2)['words']
+
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'something else')
+    with pytest.raises(ValueError):
+        PuzzleStore(str(path))
+
+
+def _put_range(path, seeds, make_puzzle):
+    store = PuzzleStore(path)
+    for seed in seeds:
+        store.put(make_puzzle(seed))
+    store.close()
+
+
+@pytest.mark.skipif(puzzle_store.fcntl is None, reason="needs fcntl file locks")
+def test_concurrent_writers_in_other_processes(path, make_puzzle):
+    PuzzleStore(path).close()
+    context = multiprocessing.get_context('fork')
+    # Overlapping seed ranges: every puzzle must still end up stored exactly once
+    workers = [context.Process(target=_put_range, args=(path, range(start, start + 30), make_puzzle))
+               for start in (0, 10, 20, 30)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    store = PuzzleStore(path, readonly=True)
+    assert len(store) == 60
+    for seed in range(60):
+        puzzle = make_puzzle(seed)
+        assert store.get(puzzle_code('Volcano', puzzle['words'], 10, seed)).words == puzzle['words']
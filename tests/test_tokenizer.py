@@ -0,0 +1,66 @@
+import random
+import pytest
+from tokenizer import WORD_RE, word_counts, extract_candidates, word_rarity, STOP_WORDS
+from backend import select_words
+
+
+@pytest.mark.parametrize('text, tokens', [
+    ("Malaysia, a country.", ['Malaysia', 'a', 'country']),
+    ('"Quoted" (bracketed) words!', ['Quoted', 'bracketed', 'words']),
+    ("well-known 1990s B2B e-mail", []),
+    ("snake_case under_score", []),
+    ("Zürich São Paulo", ['Zürich', 'São', 'Paulo']),
+    ("  spaced\tout\nlines  ", ['spaced', 'out', 'lines']),
+])
+def test_word_re(text, tokens):
+    assert WORD_RE.findall(text) == tokens
+
+
+def test_word_counts_filters_and_counts():
+    text = "Volcanoes erupt. VOLCANOES erupt ashes, and volcanoes sleep; there their about."
+    assert word_counts(text) == {'volcanoes': 3, 'erupt': 2, 'ashes': 1, 'sleep': 1}
+    assert word_counts(text, min_length=6) == {'volcanoes': 3}
+    assert word_counts(text, max_length=5) == {'erupt': 2, 'ashes': 1, 'sleep': 1}
+    assert not set(word_counts(' '.join(STOP_WORDS), min_length=1)) & STOP_WORDS
+
+
+def test_extract_candidates_is_sorted_and_unique():
+    assert extract_candidates("magma Crust MAGMA planet crust") == ['crust', 'magma', 'planet']
+    assert extract_candidates("") == []
+
+
+def test_words_that_change_length_with_case_are_dropped():
+    # One letter per grid cell: "ß" upper-cases to "SS", "İ" lower-cases to "i" plus a combining dot
+    text = "Straße STRASSE İstanbul ǰoking Zürich Ærøskøbing"
+    words = extract_candidates(text)
+    assert words == ['strasse', 'zürich', 'ærøskøbing']
+    assert all(len(word.upper()) == len(word) for word in words)
+
+
+def test_word_rarity_prefers_unusual_letters():
+    assert word_rarity('quixotic') > word_rarity('station')
+    assert word_rarity('zürich') > word_rarity('zurich')
+    assert word_rarity('') == 0
+
+
+CANDIDATES = extract_candidates(
+    "Volcanoes erupt molten magma and ash from chambers below the crust of a planet; "
+    "quartz, jasper and zircon crystallize in cooling lava while geysers and fumaroles vent steam."
+)
+
+
+@pytest.mark.parametrize('challenging', [False, True])
+def test_select_words(challenging):
+    words = select_words(CANDIDATES, 6, 8, challenging, random.Random(1))
+    assert len(words) == 6 and len(set(words)) == 6
+    assert all(word.isupper() and len(word) <= 8 and word.lower() in CANDIDATES for word in words)
+    assert select_words(CANDIDATES, 6, 8, challenging, random.Random(1)) == words
+    assert len(select_words(CANDIDATES, 100, 20, challenging, random.Random(1))) == len(CANDIDATES)
+    assert select_words(CANDIDATES, 5, 3, challenging, random.Random(1)) == []
+
+
+def test_challenging_selection_leans_towards_rare_words():
+    rng = random.Random(3)
+    plain = [word_rarity(word) for _ in range(200) for word in select_words(CANDIDATES, 3, 13, False, rng)]
+    rare = [word_rarity(word) for _ in range(200) for word in select_words(CANDIDATES, 3, 13, True, rng)]
+    assert sum(rare) / len(rare) > sum(plain) / len(plain)
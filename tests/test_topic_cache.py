@@ -0,0 +1,94 @@
+import pytest
+import topic_cache
+from topic_cache import TopicCache
+from word_sources import WikipediaSource
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A fake time.time for topic_cache that the test moves forward by hand
+    now = [1_000_000.0]
+    monkeypatch.setattr(topic_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_put_then_get_from_memory_and_disk(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = TopicCache(path)
+    cache.put(' Malaysia ', 'en', 'Malaysia is a country.', ['malaysia', 'country'])
+    assert cache.get('MALAYSIA')['candidates'] == ['malaysia', 'country']
+    assert cache.memory_hits == 1
+
+    # A second cache on the same file starts with an empty memory tier
+    reopened = TopicCache(path)
+    assert reopened.get('malaysia')['summary'] == 'Malaysia is a country.'
+    assert reopened.disk_hits == 1
+    assert reopened.get('malaysia', 'fr') is None
+
+
+def test_expired_entry_is_a_miss(tmp_path, clock):
+    cache = TopicCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    cache.put('volcano', 'en', 'A volcano erupts.', ['volcano'])
+    clock[0] += 60
+    assert cache.get('volcano') is not None
+    clock[0] += 1
+    assert cache.get('volcano') is None
+    assert cache.misses == 1
+
+
+def test_expired_entry_is_served_when_stale_allowed(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = TopicCache(path, ttl=60)
+    cache.put('volcano', 'en', 'A volcano erupts.', ['volcano'])
+    clock[0] += 3600
+    assert cache.get('volcano', allow_stale=True)['candidates'] == ['volcano']
+    assert cache.stale_hits == 1
+    # Stale entries survive on disk too
+    assert TopicCache(path, ttl=60).get('volcano', allow_stale=True) is not None
+
+
+def test_memory_tier_is_bounded():
+    cache = TopicCache(None, memory_size=2)
+    for topic in ('alpha', 'bravo', 'charlie'):
+        cache.put(topic, 'en', topic, [topic])
+    assert cache.get('alpha') is None
+    assert cache.get('charlie') is not None
+    assert cache.evictions == 1
+
+
+class FlakySource(WikipediaSource):
+    # Wikipedia stand-in: returns canned summaries until it is told to fail
+    def __init__(self, cache):
+        super().__init__(cache=cache)
+        self.calls = 0
+        self.offline = False
+
+    def load(self, topic):
+        self.calls += 1
+        if self.offline:
+            raise OSError("Wikipedia is unreachable")
+        return f"{topic} summary", [topic, 'summary']
+
+
+def test_source_serves_stale_entry_when_offline(tmp_path, clock):
+    source = FlakySource(TopicCache(str(tmp_path / 'cache.sqlite3'), ttl=60))
+    assert source.get_candidates('volcano') == ['volcano', 'summary']
+    assert source.get_candidates('volcano') == ['volcano', 'summary']
+    assert source.calls == 1
+
+    clock[0] += 3600
+    source.offline = True
+    assert source.get_candidates('volcano') == ['volcano', 'summary']
+    assert source.calls == 2
+    assert source.get_candidates('photosynthesis') == []
+
+
+def test_source_refetches_expired_entry_when_online(tmp_path, clock):
+    cache = TopicCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    source = FlakySource(cache)
+    source.get_candidates('volcano')
+    fetched_at = cache.get('volcano')['fetched_at']
+    clock[0] += 3600
+    source.get_candidates('volcano')
+    assert source.calls == 2
+    assert cache.get('volcano')['fetched_at'] == fetched_at + 3600
@@ -0,0 +1,156 @@
+import time
+import random
+import threading
+import pytest
+import backend
+import topic_cache
+from topic_cache import TopicCache
+from tokenizer import extract_candidates
+from wiki_fetch import LinkedWikipediaSource
+
+SHORT = 'Obscure hamlet'
+PAGES = {
+    SHORT: {'intro': "Obscure hamlet is a tiny settlement.", 'text': "Obscure hamlet is a tiny settlement "
+            "beside meadows, orchards and a crumbling watermill.", 'links': ['Meadow', 'Orchard', 'Watermill',
+                                                                              'River', 'Chapel', 'Bakery']},
+    'Meadow': {'intro': "A meadow is grassland full of wildflowers, clover and buzzing insects."},
+    'Orchard': {'intro': "An orchard grows apples, pears, cherries and plums in tidy rows."},
+    'Watermill': {'intro': "A watermill turns grindstones using a wheel pushed by flowing water."},
+    'River': {'intro': "Rivers carry sediment through valleys toward estuaries and deltas."},
+    'Chapel': {'intro': "The chapel holds candles, pews, hymnals and stained windows."},
+    'Bakery': {'intro': "Bakers knead dough, shape loaves and glaze pastries before sunrise."},
+}
+
+
+class StubResponse:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'query': {'pages': self.pages}}
+
+
+class StubSession:
+    """
+    Stands in for requests.Session: answers MediaWiki queries for PAGES after a
+    random delay, sleeping `slow` seconds and raising for the titles asked for.
+    """
+
+    def __init__(self, seed=0, jitter=0.02, slow=(), failing=(), slow_seconds=1.0):
+        self.rng = random.Random(seed)
+        self.jitter = jitter
+        self.slow = set(slow)
+        self.failing = set(failing)
+        self.slow_seconds = slow_seconds
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params, timeout):
+        titles = params['titles'].split('|')
+        with self._lock:
+            self.queries.append((params['prop'], 'exintro' in params, titles))
+            delay = self.rng.random() * self.jitter
+        if self.slow & set(titles):
+            delay = self.slow_seconds
+        time.sleep(delay)
+        if self.failing & set(titles):
+            raise ConnectionError(f"Cannot reach {titles}")
+        pages = []
+        for title in titles:
+            page = PAGES.get(title)
+            if page is None:
+                pages.append({'title': title, 'missing': True})
+                continue
+            entry = {'title': title}
+            if 'extracts' in params['prop']:
+                entry['extract'] = page['intro'] if 'exintro' in params else page.get('text', page['intro'])
+            if 'links' in params['prop']:
+                entry['links'] = [{'ns': 0, 'title': link} for link in page.get('links', [])]
+            pages.append(entry)
+        return StubResponse(pages)
+
+    def close(self):
+        pass
+
+
+def make_source(session, cache=None, **options):
+    options.setdefault('titles_per_request', 2)
+    source = LinkedWikipediaSource(cache=cache or TopicCache(None), api_url='http://stub/w/api.php', **options)
+    source.fetcher.session.close()
+    source.fetcher.session = session
+    return source
+
+
+ALL_WORDS = sorted(set(extract_candidates(PAGES[SHORT]['text'])).union(
+    *(extract_candidates(page['intro']) for page in PAGES.values())))
+
+
+def test_summary_with_enough_words_takes_one_request():
+    session = StubSession()
+    words = make_source(session).get_words([SHORT], min_words=2)
+    assert words == extract_candidates(PAGES[SHORT]['intro'])
+    assert len(session.queries) == 1
+
+
+def test_short_summaries_are_topped_up_from_the_article_and_links():
+    session = StubSession()
+    words = make_source(session).get_words([SHORT], min_words=1000)
+    assert words == ALL_WORDS
+    # One summary, one full article and one request per pair of linked pages
+    assert len(session.queries) == 2 + 3
+
+
+def test_topped_up_words_do_not_depend_on_response_order():
+    results = [make_source(StubSession(seed=seed)).get_words([SHORT], min_words=1000) for seed in range(6)]
+    assert all(words == results[0] for words in results)
+    puzzles = [backend.generate_puzzle(SHORT, 8, 12, make_source(StubSession(seed=seed)), seed=3)
+               for seed in range(6)]
+    assert all(puzzle['words'] == puzzles[0]['words'] and (puzzle['grid'] == puzzles[0]['grid']).all()
+               for puzzle in puzzles)
+
+
+def test_failed_linked_pages_are_skipped():
+    session = StubSession(failing={'Orchard'})
+    words = make_source(session).get_words([SHORT], min_words=1000)
+    # Orchard shares its request with Meadow, the other batches still count
+    assert 'apples' not in words and 'wildflowers' not in words
+    assert 'grindstones' in words and 'sediment' in words and 'hymnals' in words
+    assert words == sorted(words)
+
+
+def test_slow_linked_pages_time_out():
+    session = StubSession(slow={'River'}, slow_seconds=1.0)
+    started = time.monotonic()
+    words = make_source(session, timeout=0.2).get_words([SHORT], min_words=1000)
+    assert time.monotonic() - started < 0.9
+    assert 'sediment' not in words and 'apples' in words
+
+
+def test_whole_call_stops_at_the_deadline():
+    session = StubSession(slow={'Meadow', 'Orchard', 'Watermill', 'River', 'Chapel', 'Bakery'}, slow_seconds=1.0)
+    started = time.monotonic()
+    words = make_source(session, timeout=5.0, deadline=0.3).get_words([SHORT], min_words=1000)
+    assert time.monotonic() - started < 0.9
+    assert set(extract_candidates(PAGES[SHORT]['text'])) <= set(words)
+    assert 'apples' not in words
+
+
+def test_unreachable_summary_serves_the_stale_cache(monkeypatch):
+    cache = TopicCache(None, ttl=60)
+    cache.put(SHORT, 'en', 'Old summary about hamlets.', ['hamlets', 'summary'])
+    now = time.time() + 3600
+    monkeypatch.setattr(topic_cache.time, 'time', lambda: now)
+    assert make_source(StubSession(failing={SHORT}), cache).get_words([SHORT], min_words=1000) == \
+        ['hamlets', 'summary']
+    assert make_source(StubSession(failing={SHORT})).get_words([SHORT], min_words=10) == []
+
+
+def test_mixed_topics_read_each_linked_page_once():
+    session = StubSession()
+    words = make_source(session).get_words(['Meadow', SHORT], min_words=1000)
+    assert words == sorted(words) and 'wildflowers' in words and 'apples' in words
+    linked = [title for prop, intro, titles in session.queries if prop == 'extracts' and intro for title in titles]
+    assert len(linked) == len(set(linked))
@@ -0,0 +1,109 @@
+import json
+import pytest
+from word_sources import build_corpus_index, iter_corpus, CorpusSource, StaticSource, split_topics
+
+ARTICLES = {
+    'Volcano': "A volcano erupts molten magma and ash from the crust of a planet.",
+    'Photosynthesis': "Plants capture sunlight and convert carbon dioxide into sugars.",
+    'Malaysia': "Malaysia is a country in Southeast Asia with beaches and rainforests.",
+}
+
+
+def write_jsonl(path, articles):
+    with open(path, 'w', encoding='utf-8') as f:
+        for title, text in articles.items():
+            f.write(json.dumps({'title': title, 'abstract': text}) + '\n')
+    return str(path)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / 'topics.idx')
+    assert build_corpus_index(write_jsonl(tmp_path / 'corpus.jsonl', ARTICLES), path) == 3
+    return path
+
+
+def test_index_matches_the_static_source(index_path):
+    source = CorpusSource(index_path)
+    static = StaticSource(ARTICLES)
+    assert len(source) == 3
+    for title in ARTICLES:
+        assert sorted(source.get_candidates(title)) == sorted(static.get_candidates(title))
+        assert source.get_candidates(f"  {title.upper()} ") == source.get_candidates(title)
+    source.close()
+
+
+def test_max_word_length(index_path):
+    source = CorpusSource(index_path)
+    words = source.get_candidates('Malaysia', max_word_length=7)
+    assert words and all(len(word) <= 7 for word in words)
+    assert set(words) == {word for word in source.get_candidates('Malaysia') if len(word) <= 7}
+    source.close()
+
+
+def test_missing_topics(index_path, tmp_path):
+    source = CorpusSource(index_path)
+    for topic in ('Atlantis', '', 'volcano photosynthesis'):
+        assert source.get_candidates(topic) == []
+    source.close()
+
+    # An index of nothing is still a valid index
+    path = str(tmp_path / 'empty.idx')
+    assert build_corpus_index(write_jsonl(tmp_path / 'empty.jsonl', {'Blank': '', '': 'No title'}), path) == 0
+    empty = CorpusSource(path)
+    assert len(empty) == 0 and empty.get_candidates('Blank') == []
+    empty.close()
+
+
+def test_duplicate_titles_keep_the_first_article(tmp_path):
+    corpus = tmp_path / 'corpus.jsonl'
+    with open(corpus, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'title': 'Volcano', 'abstract': ARTICLES['Volcano']}) + '\n\n')
+        f.write(json.dumps({'title': 'VOLCANO', 'abstract': "Entirely different words here."}) + '\n')
+    path = str(tmp_path / 'topics.idx')
+    assert build_corpus_index(str(corpus), path) == 1
+    source = CorpusSource(path)
+    assert 'magma' in source.get_candidates('volcano')
+    source.close()
+
+
+def test_rebuilding_replaces_the_file_under_open_sources(index_path, tmp_path):
+    before = CorpusSource(index_path)
+    changed = dict(ARTICLES, Volcano="Lava flows from fissures during eruptions.", Glacier="Glaciers carve valleys.")
+    del changed['Malaysia']
+    assert build_corpus_index(write_jsonl(tmp_path / 'changed.jsonl', changed), index_path) == 3
+    # An open source keeps its mapping of the old file...
+    assert 'magma' in before.get_candidates('Volcano')
+    assert before.get_candidates('Malaysia')
+    before.close()
+    # ...and reopening picks up the new one
+    after = CorpusSource(index_path)
+    assert 'magma' not in after.get_candidates('Volcano') and 'eruptions' in after.get_candidates('Volcano')
+    assert after.get_candidates('Malaysia') == []
+    assert sorted(after.get_candidates('Glacier')) == ['carve', 'glaciers', 'valleys']
+    after.close()
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'x' * 64)
+    with pytest.raises(ValueError):
+        CorpusSource(str(path))
+
+
+def test_xml_abstracts_dump(tmp_path):
+    path = tmp_path / 'abstracts.xml'
+    docs = ''.join(f"<doc><title>Wikipedia: {title}</title><url>u</url><abstract>{text}</abstract></doc>"
+                   for title, text in ARTICLES.items())
+    path.write_text(f"<feed>{docs}</feed>", encoding='utf-8')
+    assert list(iter_corpus(str(path))) == list(ARTICLES.items())
+    index = str(tmp_path / 'topics.idx')
+    assert build_corpus_index(str(path), index) == 3
+    source = CorpusSource(index)
+    assert 'sunlight' in source.get_candidates('Photosynthesis')
+    source.close()
+
+
+def test_split_topics():
+    assert split_topics(' Malaysia | Volcano |') == ['Malaysia', 'Volcano']
+    assert split_topics('Volcano') == ['Volcano']
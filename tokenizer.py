@@ -0,0 +1,59 @@
+import re
+import math
+from stop_words import get_stop_words
+
+# Loaded once at import instead of on every get_topic_words call
+STOP_WORDS = frozenset(get_stop_words('english'))
+
+# A whitespace-separated token made of letters only, once surrounding punctuation
+# is stripped ("Malaysia," -> "Malaysia"; "well-known" and "1990s" are skipped).
+# Letters outside A-Z are kept ("Zürich"), see word_counts
+WORD_RE = re.compile(r"(?<!\S)[^\w\s]*([^\W\d_]+)[^\w\s]*(?!\S)")
+
+MIN_WORD_LENGTH = 5
+
+# Relative frequency of letters in English text, used to score how unusual a word looks
+LETTER_FREQUENCIES = {
+    'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7, 's': 6.3, 'h': 6.1,
+    'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8, 'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2,
+    'g': 2.0, 'y': 2.0, 'p': 1.9, 'b': 1.5, 'v': 0.98, 'k': 0.77, 'j': 0.15, 'x': 0.15,
+    'q': 0.095, 'z': 0.074,
+}
+LETTER_SURPRISAL = {letter: -math.log(freq / 100) for letter, freq in LETTER_FREQUENCIES.items()}
+UNKNOWN_LETTER_SURPRISAL = max(LETTER_SURPRISAL.values())
+
+
+# Function to count candidate words in a text in a single pass
+def word_counts(text, min_length=MIN_WORD_LENGTH, max_length=None):
+    """
+    Lowercase, length-filtered, stop-word-free words with their number of
+    occurrences. Works on whole articles as well as summaries.
+    """
+    counts = {}
+    for token in WORD_RE.findall(text):
+        word = token.lower()
+        # Each grid cell holds one letter, so skip words whose case mapping changes
+        # their length ("straße" -> "STRASSE", "İstanbul" -> "i̇stanbul")
+        if not token.isascii() and not len(token) == len(word) == len(word.upper()):
+            continue
+        if len(word) < min_length or (max_length is not None and len(word) > max_length):
+            continue
+        if word in STOP_WORDS:
+            continue
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+# Function to extract the unique candidate puzzle words from a text
+def extract_candidates(text, min_length=MIN_WORD_LENGTH, max_length=None):
+    return sorted(word_counts(text, min_length, max_length))
+
+
+# Function to score how challenging a word is to spot
+def word_rarity(word):
+    """
+    Average surprisal of the word's letters under English letter frequencies,
+    plus a small bonus for length: "quixotic" scores higher than "station".
+    """
+    surprisal = sum(LETTER_SURPRISAL.get(letter, UNKNOWN_LETTER_SURPRISAL) for letter in word.lower())
+    return surprisal / max(len(word), 1) + 0.1 * len(word)
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Default location of the on-disk cache (can be overridden with MINDFORGE_CACHE_PATH)
+DEFAULT_CACHE_PATH = os.environ.get(
+    'MINDFORGE_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'topic_cache.sqlite3')
+)
+DEFAULT_TTL = 7 * 24 * 60 * 60  # One week
+
+
+def normalize_topic(topic):
+    """
+    Normalize a topic so that "Malaysia", " malaysia " and "MALAYSIA" share one entry.
+    """
+    return ' '.join(topic.split()).casefold()
+
+
+class TopicCache:
+    """
+    Two-tier cache for topic lookups: a small in-process LRU in front of a SQLite
+    store on disk. Entries are keyed by (topic, language) and hold the raw page
+    summary together with the filtered candidate words.
+
+    Expired entries are not returned by default, but are kept around so they can
+    still be served (allow_stale=True) when Wikipedia is slow or unreachable.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, memory_size=256, disk_size=10000):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS topics (
+                    topic TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    candidates TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (topic, language)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS topics_accessed ON topics (accessed_at)")
+            conn.commit()
+        except (OSError, sqlite3.Error):
+            # Read-only filesystems still get the in-memory tier
+            return
+        self._conn = conn
+
+    def _is_fresh(self, entry, now):
+        return self.ttl is None or now - entry['fetched_at'] <= self.ttl
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _load_from_disk(self, key, now):
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT summary, candidates, fetched_at FROM topics WHERE topic = ? AND language = ?",
+                key
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE topics SET accessed_at = ? WHERE topic = ? AND language = ?",
+                (now,) + key
+            )
+            self._conn.commit()
+        except sqlite3.Error:
+            return None
+        return {'summary': row[0], 'candidates': json.loads(row[1]), 'fetched_at': row[2]}
+
+    def get(self, topic, language='en', allow_stale=False):
+        """
+        Return the cached entry for (topic, language), or None on a miss.
+        """
+        key = (normalize_topic(topic), language)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                tier = 'memory'
+                self._memory.move_to_end(key)
+            else:
+                tier = 'disk'
+                entry = self._load_from_disk(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            if not self._is_fresh(entry, now):
+                if not allow_stale:
+                    self.misses += 1
+                    return None
+                self.stale_hits += 1
+            elif tier == 'memory':
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+            return entry
+
+    def put(self, topic, language, summary, candidates):
+        """
+        Store a freshly fetched summary and its candidate words, evicting the
+        least recently used entries once either tier is over its size bound.
+        """
+        key = (normalize_topic(topic), language)
+        now = time.time()
+        entry = {'summary': summary, 'candidates': list(candidates), 'fetched_at': now}
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, ?, ?)",
+                        key + (summary, json.dumps(entry['candidates']), now, now)
+                    )
+                    self._evict_disk()
+                    self._conn.commit()
+                except sqlite3.Error:
+                    pass
+        return entry
+
+    def _evict_disk(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+        excess = count - self.disk_size
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM topics WHERE rowid IN "
+                "(SELECT rowid FROM topics ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def warm(self, topics, loader, language='en'):
+        """
+        Fill the cache in bulk. loader(topic) must return (summary, candidates);
+        topics that already have a fresh entry are skipped. Returns the number of
+        topics that were loaded.
+        """
+        loaded = 0
+        for topic in topics:
+            if self.get(topic, language) is not None:
+                continue
+            summary, candidates = loader(topic)
+            self.put(topic, language, summary, candidates)
+            loaded += 1
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM topics")
+                self._conn.commit()
+
+    def stats(self):
+        """
+        Hit/miss counters and current size of both tiers.
+        """
+        with self._lock:
+            disk_entries = 0
+            if self._conn is not None:
+                try:
+                    disk_entries = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            lookups = self.memory_hits + self.disk_hits + self.stale_hits + self.misses
+            hits = lookups - self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+            }
@@ -0,0 +1,222 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from tokenizer import extract_candidates
+from word_sources import WikipediaSource, WIKI_USER_AGENT, WIKI_TIMEOUT
+
+# MediaWiki Action API endpoint; point api_url at a stub server to run offline
+WIKI_API_URL = 'https://{language}.wikipedia.org/w/api.php'
+
+MAX_CONNECTIONS = 10   # Requests in flight at once (and HTTP connections kept alive)
+MAX_LINKED_PAGES = 24  # Linked articles read when a summary is too short
+TITLES_PER_REQUEST = 3  # Linked intros fetched per request (the API allows up to 20)
+
+# requests' exceptions are OSErrors; bad JSON is a ValueError
+FETCH_ERRORS = (OSError, ValueError, KeyError, asyncio.TimeoutError)
+
+
+class WikiFetcher:
+    """
+    Runs MediaWiki API queries from asyncio code. Each query is a blocking
+    requests call on a small thread pool sharing one keep-alive connection pool,
+    so at most max_connections requests are in flight and a query never waits
+    longer than timeout.
+    """
+
+    def __init__(self, api_url, max_connections=MAX_CONNECTIONS, timeout=WIKI_TIMEOUT):
+        import requests  # Deferred like wikipediaapi: only needed once we go online
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = WIKI_USER_AGENT
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='wiki-fetch')
+
+    def _get(self, params):
+        params = dict(params, action='query', format='json', formatversion=2, redirects=1)
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get('query', {}).get('pages', [])
+
+    async def query(self, deadline=None, **params):
+        """
+        Returns the 'pages' list of the response. Raises asyncio.TimeoutError when
+        the request takes longer than timeout or runs past deadline (loop time).
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if deadline is None else min(self.timeout, deadline - loop.time())
+        if timeout <= 0:
+            raise asyncio.TimeoutError
+        return await asyncio.wait_for(loop.run_in_executor(self._executor, self._get, params), timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def _existing(pages):
+    return [page for page in pages if not page.get('missing') and page.get('extract') is not None]
+
+
+class LinkedWikipediaSource(WikipediaSource):
+    """
+    WikipediaSource that tops up short summaries. When a topic yields fewer than
+    min_words usable words, the rest of its article and the intros of the pages it
+    links to are fetched concurrently and merged in, stopping as soon as there are
+    enough words or the deadline passes. The topics of a mixed puzzle are fetched
+    at the same time, so a call takes about two round trips however many pages
+    are read. Every page read is cached like a plain summary.
+    """
+
+    def __init__(self, language='en', cache=None, timeout=WIKI_TIMEOUT, api_url=None,
+                 max_connections=MAX_CONNECTIONS, max_linked_pages=MAX_LINKED_PAGES,
+                 titles_per_request=TITLES_PER_REQUEST, deadline=None):
+        super().__init__(language, cache, timeout)
+        self.api_url = api_url or WIKI_API_URL.format(language=language)
+        self.max_connections = max_connections
+        self.max_linked_pages = max_linked_pages
+        self.titles_per_request = titles_per_request
+        self.deadline = deadline if deadline is not None else 2 * timeout  # Seconds for a whole call
+        self.full_key = f"{language}:full"
+        self._fetcher = None
+
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            self._fetcher = WikiFetcher(self.api_url, self.max_connections, self.timeout)
+        return self._fetcher
+
+    def load(self, topic):
+        summary, candidates, _ = asyncio.run(self._summary(topic, None))
+        return summary, candidates
+
+    def get_words(self, topics, min_words=0, max_word_length=None):
+        return asyncio.run(self.fetch_words(topics, min_words, max_word_length))
+
+    async def fetch_words(self, topics, min_words=0, max_word_length=None):
+        """
+        Coroutine behind get_words, for callers that already run an event loop.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        claimed = set()  # Linked titles already being read for one of the topics
+        share = -(-min_words // max(len(topics), 1))
+        results = await asyncio.gather(*(
+            self._topic_words(topic, share, max_word_length, deadline, claimed) for topic in topics
+        ))
+        merged = set()
+        for words in results:
+            merged.update(words)
+        # Sorted so the topics' order and timing do not change what a seed selects
+        return sorted(merged)
+
+    async def _summary(self, topic, deadline):
+        """
+        (summary, candidates, linked titles) of a page; all empty if it does not exist.
+        """
+        pages = _existing(await self.fetcher.query(deadline, titles=topic, prop='extracts|links', exintro=1,
+                                                   explaintext=1, pllimit='max', plnamespace=0))
+        if not pages:
+            return '', [], []
+        summary = pages[0]['extract']
+        return summary, extract_candidates(summary), [link['title'] for link in pages[0].get('links', [])]
+
+    async def _links(self, topic, deadline):
+        pages = await self.fetcher.query(deadline, titles=topic, prop='links', pllimit='max', plnamespace=0)
+        return [link['title'] for page in pages for link in page.get('links', [])]
+
+    async def _sections(self, topic, deadline):
+        entry = self.cache.get(topic, self.full_key)
+        if entry is not None:
+            return entry['candidates']
+        pages = _existing(await self.fetcher.query(deadline, titles=topic, prop='extracts', explaintext=1))
+        if not pages:
+            return []
+        candidates = extract_candidates(pages[0]['extract'])
+        self.cache.put(topic, self.full_key, pages[0]['extract'], candidates)
+        return candidates
+
+    async def _intros(self, titles, deadline):
+        candidates = []
+        missing = []
+        for title in titles:
+            entry = self.cache.get(title, self.cache_key)
+            if entry is None:
+                missing.append(title)
+            else:
+                candidates.extend(entry['candidates'])
+        if missing:
+            pages = await self.fetcher.query(deadline, titles='|'.join(missing), prop='extracts',
+                                             exintro=1, explaintext=1, exlimit='max')
+            for page in _existing(pages):
+                words = extract_candidates(page['extract'])
+                self.cache.put(page['title'], self.cache_key, page['extract'], words)
+                candidates.extend(words)
+        return candidates
+
+    def _pick_links(self, links, summary, claimed):
+        # Pages mentioned in the summary itself are the most related ones
+        text = summary.casefold()
+        ranked = sorted(dict.fromkeys(links), key=lambda title: title.casefold() not in text)
+        picked = [title for title in ranked if title not in claimed][:self.max_linked_pages]
+        claimed.update(picked)
+        return [picked[i:i + self.titles_per_request] for i in range(0, len(picked), self.titles_per_request)]
+
+    async def _topic_words(self, topic, min_words, max_word_length, deadline, claimed):
+        words = {}
+
+        def add(candidates):
+            words.update(dict.fromkeys(
+                word for word in candidates if max_word_length is None or len(word) <= max_word_length
+            ))
+
+        links = None  # Not known yet when the summary comes from the cache
+        entry = self.cache.get(topic, self.cache_key)
+        if entry is None:
+            try:
+                summary, candidates, links = await self._summary(topic, deadline)
+            except FETCH_ERRORS:
+                # Wikipedia is slow or unreachable: serve an expired entry if we have one
+                entry = self.cache.get(topic, self.cache_key, allow_stale=True)
+                add(entry['candidates'] if entry else [])
+                return list(words)
+            self.cache.put(topic, self.cache_key, summary, candidates)
+        else:
+            summary, candidates = entry['summary'], entry['candidates']
+        add(candidates)
+        if len(words) >= min_words or not summary:
+            return list(words)
+
+        tasks = [asyncio.ensure_future(self._sections(topic, deadline))]
+        try:
+            if links is None:
+                links = await self._links(topic, deadline)
+            tasks += [asyncio.ensure_future(self._intros(batch, deadline))
+                      for batch in self._pick_links(links, summary, claimed)]
+            merged = 0  # Tasks before this one have been added
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    await next_done
+                except FETCH_ERRORS:
+                    pass
+                # Add results in the order the tasks were started, not the order they
+                # finished, so stopping early keeps the same words from run to run
+                while merged < len(tasks) and tasks[merged].done() and len(words) < min_words:
+                    try:
+                        add(tasks[merged].result())
+                    except FETCH_ERRORS:
+                        pass
+                    merged += 1
+                if len(words) >= min_words:
+                    break
+        except FETCH_ERRORS:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Collect the cancellations so no task is left pending when the loop closes
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return list(words)
@@ -0,0 +1,259 @@
+import os
+import sys
+import shutil
+import tempfile
+import json
+import mmap
+import hashlib
+import xml.etree.ElementTree as ET
+import numpy as np
+from tokenizer import extract_candidates
+from topic_cache import TopicCache, normalize_topic
+
+# Wikipedia clients are reused across reruns instead of being rebuilt per click
+WIKI_USER_AGENT = 'MindForgeWordPuzzle/1.0 (your_email@example.com)'
+WIKI_TIMEOUT = 5.0  # Seconds; on timeout we fall back to whatever is cached
+
+# Layout of a corpus index file: header, a table sorted by title hash, then the word blob
+INDEX_MAGIC = b'MFIDX001'
+INDEX_HEADER = np.dtype([('magic', 'S8'), ('count', '<u8')])
+INDEX_TABLE = np.dtype([('hash', '<u8'), ('offset', '<u8'), ('length', '<u4'), ('pad', '<u4')])
+
+
+# Joins the topics of a mixed puzzle ("Malaysia | Volcano"); Wikipedia titles never contain it
+MIX_SEPARATOR = '|'
+
+
+def split_topics(topic):
+    return [part.strip() for part in topic.split(MIX_SEPARATOR) if part.strip()]
+
+
+class WordSource:
+    """
+    Anything that can turn a topic into candidate puzzle words.
+    get_candidates returns lowercase words, or an empty list for unknown topics.
+    """
+
+    def get_candidates(self, topic, max_word_length=None):
+        raise NotImplementedError
+
+    def get_words(self, topics, min_words=0, max_word_length=None):
+        """
+        Candidates of one or more topics merged without duplicates. Sources that
+        can look further afield (see wiki_fetch.py) use min_words to decide when
+        a topic needs topping up.
+        """
+        merged = {}
+        for topic in topics:
+            merged.update(dict.fromkeys(self.get_candidates(topic, max_word_length)))
+        return list(merged)
+
+
+class WikipediaSource(WordSource):
+    """
+    Live Wikipedia page summaries (or whole articles with full_text=True),
+    cached per (topic, language) in a TopicCache.
+    """
+
+    def __init__(self, language='en', cache=None, timeout=WIKI_TIMEOUT, full_text=False):
+        self.language = language
+        self.cache = cache if cache is not None else TopicCache()
+        self.timeout = timeout
+        self.full_text = full_text
+        # Full articles are cached separately from summaries
+        self.cache_key = f"{language}:full" if full_text else language
+        self._wiki = None
+
+    @property
+    def wiki(self):
+        if self._wiki is None:
+            import wikipediaapi  # Deferred so offline sources start without it
+
+            self._wiki = wikipediaapi.Wikipedia(
+                language=self.language,
+                user_agent=WIKI_USER_AGENT,
+                timeout=self.timeout
+            )
+        return self._wiki
+
+    def load(self, topic):
+        page = self.wiki.page(topic)
+        if not page.exists():
+            return '', []
+        text = page.text if self.full_text else page.summary
+        return text, extract_candidates(text)
+
+    def get_candidates(self, topic, max_word_length=None):
+        entry = self.cache.get(topic, self.cache_key)
+        if entry is None:
+            try:
+                summary, candidates = self.load(topic)
+            except (OSError, ValueError, KeyError):  # requests' errors are OSErrors
+                # Wikipedia is slow or unreachable: serve an expired entry if we have one
+                entry = self.cache.get(topic, self.cache_key, allow_stale=True)
+                return entry['candidates'] if entry else []
+            entry = self.cache.put(topic, self.cache_key, summary, candidates)
+        return entry['candidates']
+
+    def warm(self, topics):
+        return self.cache.warm(topics, self.load, self.cache_key)
+
+
+class StaticSource(WordSource):
+    """
+    In-memory stand-in backend: maps topics to text (or to ready word lists).
+    Useful for tests, benchmarks and demos without network access.
+    """
+
+    def __init__(self, topics):
+        self._candidates = {}
+        for topic, text in topics.items():
+            if not isinstance(text, str):
+                text = ' '.join(text)
+            self._candidates[normalize_topic(topic)] = extract_candidates(text)
+
+    def get_candidates(self, topic, max_word_length=None):
+        return list(self._candidates.get(normalize_topic(topic), []))
+
+
+def _title_hash(title):
+    digest = hashlib.blake2b(normalize_topic(title).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _encode_entry(title, candidates):
+    """
+    Entry layout: the normalized title on the first line, then one line per word
+    length ("5 alpha bravo"), shortest first, so lookups with a maximum word length
+    can stop reading early.
+    """
+    buckets = {}
+    for word in candidates:
+        buckets.setdefault(len(word), []).append(word)
+    lines = [normalize_topic(title)]
+    for length in sorted(buckets):
+        lines.append(f"{length} {' '.join(buckets[length])}")
+    return '\n'.join(lines).encode('utf-8')
+
+
+# Function to read (title, text) pairs from a JSONL corpus or a Wikipedia abstracts dump
+def iter_corpus(corpus_path, title_field='title', text_field='abstract'):
+    """
+    JSONL files need one object per line with title_field and text_field.
+    Anything ending in .xml is read as a Wikipedia abstracts dump
+    (enwiki-latest-abstract.xml), whose titles carry a "Wikipedia: " prefix.
+    """
+    if corpus_path.endswith('.xml'):
+        title = None
+        root = None
+        for event, elem in ET.iterparse(corpus_path, events=('start', 'end')):
+            if root is None:
+                root = elem  # The first start event is the document element (<feed>)
+            if event != 'end':
+                continue
+            if elem.tag == 'title':
+                title = (elem.text or '').removeprefix('Wikipedia: ')
+            elif elem.tag == 'abstract':
+                yield title, elem.text or ''
+            elif elem.tag == 'doc':
+                # Empty the <doc> and drop it from the root too, or the root keeps every one
+                elem.clear()
+                root.clear()
+        return
+    with open(corpus_path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record.get(title_field, ''), record.get(text_field, '')
+
+
+# Function to build a memory-mappable topic-to-vocabulary index from a corpus
+def build_corpus_index(corpus_path, index_path, title_field='title', text_field='abstract'):
+    """
+    Read the corpus once and write an index mapping each normalized title to its
+    pre-filtered candidate words. Returns the number of indexed titles.
+    """
+    seen = set()
+    rows = []
+    blob = tempfile.TemporaryFile()  # Spooled to disk so large dumps don't sit in memory
+    for title, text in iter_corpus(corpus_path, title_field, text_field):
+        if not title:
+            continue
+        title_hash = _title_hash(title)
+        if title_hash in seen:
+            continue  # Keep the first article for duplicate titles
+        candidates = extract_candidates(text)
+        if not candidates:
+            continue
+        seen.add(title_hash)
+        entry = _encode_entry(title, candidates)
+        rows.append((title_hash, blob.tell(), len(entry), 0))
+        blob.write(entry)
+
+    table = np.array(rows, dtype=INDEX_TABLE)
+    table.sort(order='hash')
+    header = np.array([(INDEX_MAGIC, len(table))], dtype=INDEX_HEADER)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+        blob.seek(0)
+        shutil.copyfileobj(blob, f)
+    blob.close()
+    os.replace(tmp_path, index_path)
+    return len(table)
+
+
+class CorpusSource(WordSource):
+    """
+    Offline backend serving lookups from an index built by build_corpus_index.
+    The file is memory-mapped, so opening it is cheap and pages are shared
+    between processes.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(self._mmap, dtype=INDEX_HEADER, count=1)[0]
+        if header['magic'] != INDEX_MAGIC:
+            raise ValueError(f"{index_path} is not a MindForge corpus index")
+        count = int(header['count'])
+        self._table = np.frombuffer(self._mmap, dtype=INDEX_TABLE, count=count,
+                                    offset=INDEX_HEADER.itemsize)
+        self._hashes = self._table['hash']
+        self._blob_start = INDEX_HEADER.itemsize + INDEX_TABLE.itemsize * count
+
+    def __len__(self):
+        return len(self._table)
+
+    def get_candidates(self, topic, max_word_length=None):
+        title = normalize_topic(topic)
+        title_hash = _title_hash(title)
+        i = int(np.searchsorted(self._hashes, title_hash))
+        if i >= len(self._table) or self._hashes[i] != title_hash:
+            return []
+        start = self._blob_start + int(self._table['offset'][i])
+        lines = self._mmap[start:start + int(self._table['length'][i])].decode('utf-8').split('\n')
+        if lines[0] != title:
+            return []  # Hash collision with a different title
+        words = []
+        for line in lines[1:]:
+            length, bucket = line.split(' ', 1)
+            if max_word_length is not None and int(length) > max_word_length:
+                break
+            words.extend(bucket.split(' '))
+        return words
+
+    def close(self):
+        # Drop the views into the map first, otherwise mmap refuses to close
+        self._table = self._hashes = None
+        self._mmap.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("usage: python word_sources.py CORPUS(.jsonl|.xml) INDEX_PATH")
+    count = build_corpus_index(sys.argv[1], sys.argv[2])
+    print(f"Indexed {count} titles into {sys.argv[2]}")